@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import subprocess
-from ask_gui_helper import show
+from ask_gui_helper import ask_answer, show
 
 try:
     text = subprocess.check_output(
@@ -11,5 +11,5 @@ except:
     show("Ask Clipboard", "Clipboard empty.")
     exit()
 
-answer = subprocess.check_output(["ask", text], text=True)
+answer = ask_answer(text)
 show("Ask Clipboard", answer)
@@ -1,17 +1,13 @@
 #!/usr/bin/env python3
-import subprocess
+import error_clusters
 from ask_gui_helper import show
 
-errors = subprocess.check_output(
-    ["journalctl", "-p", "err", "-n", "30", "--no-pager"],
-    text=True
-)
+args = error_clusters.parse_args(["--lines", "30"])
+entries, _ = error_clusters.observer.read_journal(None, "err", last=args.lines)
 
-if not errors.strip():
+if not entries:
     show("System Errors", "No recent system errors.")
 else:
-    answer = subprocess.check_output(
-        ["ask", "Explain these system errors:\n" + errors],
-        text=True
-    )
-    show("System Errors", answer)
+    lines = []
+    error_clusters.explain_clusters(error_clusters.cluster(entries), args, out=lines.append)
+    show("System Errors", "\n".join(lines))
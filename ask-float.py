@@ -1,14 +1,39 @@
 #!/usr/bin/env python3
-import subprocess, tkinter as tk
+import os, queue, threading, tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 
+import ask_core
+
+MODEL = os.environ.get("ASK_MODEL", ask_core.MODEL_DEFAULT)
+API = os.environ.get("ASK_API", ask_core.API_DEFAULT)
+tokens = queue.Queue()
+
+def worker(q):
+    streamed = []
+    def on_token(token):
+        streamed.append(token)
+        tokens.put(token)
+    reply = ask_core.dispatch(ask_core.make_request(q, MODEL, API, stream=True, caller="ask-float"), on_token)
+    if not streamed and reply["response"]:
+        tokens.put(reply["response"])
+    if reply["error"]:
+        tokens.put(f"\n{reply['error']}\n")
+
+def drain():
+    while True:
+        try:
+            out.insert(tk.END, tokens.get_nowait())
+        except queue.Empty:
+            break
+    out.see(tk.END)
+    root.after(50, drain)
+
 def run():
     q = entry.get().strip()
     if not q:
         return
     out.delete("1.0", tk.END)
-    res = subprocess.check_output(["ask", q], text=True)
-    out.insert(tk.END, res)
+    threading.Thread(target=worker, args=(q,), daemon=True).start()
 
 root = tk.Tk()
 root.title("Ask")
@@ -26,4 +51,5 @@ out.pack(expand=True, fill=tk.BOTH, padx=6, pady=6)
 
 root.bind("<Return>", lambda e: run())
 root.bind("<Escape>", lambda e: root.destroy())
+drain()
 root.mainloop()
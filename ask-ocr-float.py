@@ -1,52 +1,43 @@
 #!/usr/bin/env python3
-import subprocess
-import tempfile
 import os
+import subprocess
 import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 
-def run_ocr_and_ask():
-    with tempfile.TemporaryDirectory() as tmp:
-        img = os.path.join(tmp, "ocr.png")
-        txt = os.path.join(tmp, "ocr")
-
-        # Screenshot selection
-        subprocess.run(
-            ["flameshot", "gui", "-p", img],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-
-        if not os.path.exists(img):
-            return "OCR cancelled."
+import ask_core
+import ocr_worker
 
-        # OCR Chinese + English
-        subprocess.run(
-            ["tesseract", img, txt, "-l", "chi_sim+eng"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-
-        text_file = txt + ".txt"
-        if not os.path.exists(text_file):
-            return "No text detected."
-
-        with open(text_file, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read().strip()
-
-        if not text:
-            return "No text detected."
-
-        # Ask Ollama via `ask`
-        try:
-            result = subprocess.check_output(
-                ["ask", "Explain or translate the following text:", text],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            return result
-        except subprocess.CalledProcessError as e:
-            return e.output
+def run_ocr_and_ask():
+    # Screenshot selection, as PNG bytes on stdout
+    capture = subprocess.run(
+        ["flameshot", "gui", "--raw"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+
+    if capture.returncode != 0 or not capture.stdout:
+        return "OCR cancelled."
+
+    # OCR Chinese + English, through ocrd when it is running
+    ocr = ocr_worker.recognize(capture.stdout, lang="chi_sim+eng")
+    timing = f"[OCR {ocr.get('ocr_s', 0):.2f}s{', cached' if ocr.get('cached') else ''}]"
+
+    if ocr.get("error"):
+        return f"{timing}\nOCR failed: {ocr['error']}"
+
+    text = ocr["text"].strip()
+    if not text:
+        return f"{timing}\nNo text detected."
+
+    # Ask Ollama through askd.py when it is running
+    req = ask_core.make_request(
+        f"Explain or translate the following text: {text}",
+        os.environ.get("ASK_MODEL", ask_core.MODEL_DEFAULT),
+        os.environ.get("ASK_API", ask_core.API_DEFAULT),
+        caller="ask-ocr-float",
+    )
+    reply = ask_core.dispatch(req)
+    return f"{timing}\n\n{reply['error'] or reply['response']}"
 
 # -------------------------
 # GUI
@@ -4,10 +4,16 @@ set -euo pipefail
 MODEL_DEFAULT="PopPooB-Linux:latest"
 API_DEFAULT="http://96.242.172.92:11434/api/generate"
 LOG_DEFAULT="$HOME/.autonomy/ask-operator.log"
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
 
 MODEL="${ASK_OPERATOR_MODEL:-$MODEL_DEFAULT}"
 API="${ASK_OPERATOR_API:-$API_DEFAULT}"
 LOG="${ASK_OPERATOR_LOG:-$LOG_DEFAULT}"
+# Upper bound on generated tokens per step; generation also stops at the
+# first complete line, since only that line is used.
+NUM_PREDICT="${ASK_OPERATOR_NUM_PREDICT:-128}"
+# Token budget for earlier steps plus the last command output in each prompt.
+CONTEXT_TOKENS="${ASK_OPERATOR_CONTEXT_TOKENS:-1500}"
 AUTO_APPROVE=false
 MAX_STEPS=0
 TASK=""
@@ -25,6 +31,8 @@ Options:
   --log <path>        Override log path
   --auto-approve      Automatically approve proposed steps
   --max-steps <n>     Stop after n steps (0 = unlimited)
+  --context-tokens <n>
+                      Token budget for command output in prompts (default 1500)
   -h | --help         Show this help
 
 Available models:
@@ -53,6 +61,7 @@ while [ $# -gt 0 ]; do
     --log) LOG="${2:-}"; shift ;;
     --auto-approve) AUTO_APPROVE=true ;;
     --max-steps) MAX_STEPS="${2:-}"; shift ;;
+    --context-tokens) CONTEXT_TOKENS="${2:-}"; shift ;;
     -h|--help) usage; exit 0 ;;
     *) TASK="$TASK $1" ;;
   esac
@@ -69,9 +78,45 @@ fi
 [ -n "$TASK" ] || { echo "No task provided. Exiting." >&2; exit 1; }
 
 need jq
-need curl
+need python3
 log "TASK: $TASK"
 
+# One long-lived client process keeps the HTTP connection warm across steps.
+coproc OLLAMA { python3 "$LIB_DIR/ollama_client.py" --serve --api "$API" --model "$MODEL" --caller operator; }
+# A second one keeps the rolling, budgeted history of steps and their
+# output. Bash allows a single coproc, so this one talks over a FIFO pair.
+CTX_DIR=$(mktemp -d)
+mkfifo "$CTX_DIR/in" "$CTX_DIR/out"
+python3 "$LIB_DIR/operator_context.py" --serve --budget "$CONTEXT_TOKENS" \
+  <"$CTX_DIR/in" >"$CTX_DIR/out" &
+CTX_PID=$!
+trap 'kill "${OLLAMA_PID:-}" "${CTX_PID:-}" 2>/dev/null || true; rm -rf "$CTX_DIR"' EXIT
+exec {CTX_W}>"$CTX_DIR/in" {CTX_R}<"$CTX_DIR/out"
+
+generate() {
+  local req resp
+  req=$(jq -cn --arg model "$MODEL" --arg prompt "$1" --argjson n "$NUM_PREDICT" \
+    '{model: $model, prompt: $prompt, first_line: true, options: {num_predict: $n}}')
+  printf '%s\n' "$req" >&"${OLLAMA[1]}"
+  IFS= read -r resp <&"${OLLAMA[0]}" || return 1
+  printf '%s' "$resp"
+}
+
+context_call() {
+  local resp
+  printf '%s\n' "$1" >&"$CTX_W"
+  IFS= read -r resp <&"$CTX_R" || return 1
+  printf '%s' "$resp"
+}
+
+remember_output() {
+  context_call "$(jq -cn --arg c "$1" --arg o "$2" '{op: "add", command: $c, output: $o}')" >/dev/null
+}
+
+remember_note() {
+  context_call "$(jq -cn --arg t "$1" '{op: "note", text: $t}')" >/dev/null
+}
+
 CONTEXT="You are a cautious Linux system operator.
 
 RULES (MANDATORY):
@@ -82,26 +127,33 @@ RULES (MANDATORY):
 - Wait for command output before continuing
 - If the task is complete, respond with exactly: DONE"
 
-LAST_OUTPUT="(none yet)"
 STEP_COUNT=0
 
 while true; do
-  PROMPT=$(jq -Rn --arg p "$CONTEXT
+  STEP_CONTEXT=$(context_call '{"op": "render"}' | jq -r '.context // "Previous command output:\n(unavailable)"') \
+    || { echo "❌ Context helper exited." >&2; exit 1; }
+  PROMPT="$CONTEXT
 
 Task:
 $TASK
 
-Previous command output:
-$LAST_OUTPUT
+$STEP_CONTEXT
 
-Next step (ONE command only or DONE):" '$p')
+Next step (ONE command only or DONE):"
+  log "PROMPT SIZE: ${#PROMPT} chars (~$(( (${#PROMPT} + 3) / 4 )) tokens, budget ${CONTEXT_TOKENS} for output)"
 
-  RAW=$(curl -s "$API" -d "{\"model\": \"$MODEL\", \"stream\": false, \"prompt\": $PROMPT}")
-  STEP=$(echo "$RAW" | jq -r '.response // empty' | head -n 1 | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')
+  RAW=$(generate "$PROMPT") || { echo "❌ Model client exited." >&2; exit 1; }
+  ERROR=$(echo "$RAW" | jq -r '.error // empty')
+  [ -n "$ERROR" ] && log "MODEL ERROR: $ERROR"
+  read -r TTFT TOTAL EARLY < <(echo "$RAW" | jq -r \
+    'def r: if . == null then "n/a" else (. * 1000 | round / 1000) end;
+     "\(.ttft_s | r) \(.duration_s | r) \(.stopped_early)"')
+  log "TIMING: ttft=${TTFT}s total=${TOTAL}s early_stop=${EARLY}"
+  STEP=$(echo "$RAW" | jq -r '.response // empty' | sed '/^[[:space:]]*$/d' | head -n 1 | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')
 
   if [ -z "$STEP" ]; then
     echo "❌ Model returned no usable response."
-    LAST_OUTPUT="Model returned empty response."
+    remember_note "Model returned empty response."
     continue
   fi
 
@@ -126,7 +178,7 @@ Next step (ONE command only or DONE):" '$p')
     y|Y) ;;
     q|Q) echo "Quit."; log "USER QUIT"; exit 0 ;;
     *)
-      LAST_OUTPUT="User declined the proposed command: $STEP"
+      remember_note "User declined the proposed command: $STEP"
       log "DECLINED: $STEP"
       continue
       ;;
@@ -144,7 +196,7 @@ Next step (ONE command only or DONE):" '$p')
   OUTPUT=$(bash -c "$CMD" 2>&1 || true)
   echo "$OUTPUT"
   log "OUTPUT: $OUTPUT"
-  LAST_OUTPUT="$OUTPUT"
+  remember_output "$CMD" "$OUTPUT"
 
   if [ "$MAX_STEPS" -gt 0 ]; then
     STEP_COUNT=$((STEP_COUNT + 1))
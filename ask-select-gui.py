@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import subprocess
-from ask_gui_helper import show
+from ask_gui_helper import ask_answer, show
 
 try:
     text = subprocess.check_output(
@@ -15,5 +15,5 @@ if not text:
     show("Ask Selection", "No text selected.")
     exit()
 
-answer = subprocess.check_output(["ask", text], text=True)
+answer = ask_answer(text)
 show("Ask Selection", answer)
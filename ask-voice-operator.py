@@ -1,25 +1,16 @@
 #!/usr/bin/env python3
-import sounddevice as sd
-import whisper
-import tempfile
 import subprocess
-import numpy as np
-import scipy.io.wavfile as wav
 
-RATE = 16000
-DURATION = 6
+import voice_service
 
-print("🎤 Speak operator task...")
+print("🎤 Speak operator task...", flush=True)
 
-audio = sd.rec(int(DURATION * RATE), samplerate=RATE, channels=1, dtype='int16')
-sd.wait()
-
-with tempfile.NamedTemporaryFile(suffix=".wav") as f:
-    wav.write(f.name, RATE, audio)
-    model = whisper.load_model("base")
-    result = model.transcribe(f.name)
+result = voice_service.transcribe_speech()
+if result.get("error"):
+    print(f"❌ {result['error']}")
+    exit(1)
 
-task = result["text"].strip()
+task = result["text"]
 
 if not task:
     print("❌ No speech detected")
@@ -1,30 +1,22 @@
 #!/usr/bin/env python3
-import sounddevice as sd
-import whisper
-import tempfile
+import os
 import subprocess
-import numpy as np
-import scipy.io.wavfile as wav
 import sys
 
-RATE = 16000
-DURATION = 6  # seconds
+import voice_service
 
-print("🎤 Speak now...")
+print("🎤 Speak now...", flush=True)
 
-audio = sd.rec(int(DURATION * RATE), samplerate=RATE, channels=1, dtype='int16')
-sd.wait()
-
-with tempfile.NamedTemporaryFile(suffix=".wav") as f:
-    wav.write(f.name, RATE, audio)
-    model = whisper.load_model("base")
-    result = model.transcribe(f.name)
+result = voice_service.transcribe_speech()
+if result.get("error"):
+    print(f"❌ {result['error']}")
+    sys.exit(1)
 
-text = result["text"].strip()
+text = result["text"]
 
 if not text:
     print("❌ No speech detected")
     sys.exit(1)
 
 print(f"🗣️  You said: {text}\n")
-subprocess.run(["ask", text])
+subprocess.run(["ask", text], env=dict(os.environ, ASK_CALLER="ask-voice"))
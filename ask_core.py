@@ -0,0 +1,309 @@
+"""Prompt building and request handling behind the `ask` command.
+
+The HTTP client and response cache are imported on first use, so a call
+answered by askd.py only pays for the socket round trip.
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import socket
+import subprocess
+import sys
+
+MODEL_DEFAULT = "PopPooB-Linux:latest"
+API_DEFAULT = "http://96.242.172.92:11434/api/generate"
+DEFAULT_TIMEOUT = 120
+
+MODELS = [
+    "PopPooB-Chris:latest",
+    "PopPooB-Linux:latest",
+    "PopPooB-Nurse:latest",
+    "PopPooB-Dr:latest",
+    "PopPooB-Pin-Yin:latest",
+    "mistral:7b",
+]
+
+USAGE = """Usage:
+  ask [options] [text]
+
+Options:
+  --zh | --en                Force response language
+  --translate | --explain     Choose mode (default: explain)
+  --model <name>             Override model
+  --api <url>                Override API endpoint
+  --stream                   Stream tokens as they arrive
+  --system-info              Include basic system info in the prompt
+  --task <text>              Override the default task description
+  --raw                      Send input as-is (no system prompt)
+  --timeout <seconds>        Request timeout in seconds
+  --no-cache                 Skip the response cache for this call
+  --refresh                  Ignore a cached answer and store a fresh one
+  --cache-stats              Print response cache counters and exit
+  --no-daemon                Do not use a running askd.py
+  -h | --help                Show this help
+
+Environment:
+  ASK_CACHE=0                Disable the response cache
+  ASK_CACHE_MAX_MB           Cache size cap (default: 64)
+  ASK_CACHE_TTL              Cache entry lifetime in seconds (default: 604800)
+  ASK_DAEMON=0               Never use a running askd.py
+
+Available models:
+{models}
+
+Examples:
+  ask --explain "What does dmesg do?"
+  echo "systemd" | ask --translate
+""".format(models="\n".join(f"  {m}" for m in MODELS))
+
+CJK = re.compile("[\u4e00-\u9fff]")
+
+TASKS = {
+    "translate": "Translate the following text accurately.",
+    "explain": "Explain the following text clearly as a system assistant.",
+}
+
+PROMPT_TEMPLATE = """You are a Linux system assistant integrated into the OS.
+
+Reply language:
+- zh: Simplified Chinese
+- en: English
+
+Current language: {lang}
+Mode: {mode}
+
+Rules:
+- Be concise
+- No markdown
+- No emojis
+- No speculation
+
+{sys_block}
+Task:
+{task}
+
+Input:
+{text}"""
+
+
+def detect_language(text: str) -> str:
+    return "zh" if CJK.search(text) else "en"
+
+
+def _quiet(cmd) -> str:
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def system_info_block() -> str:
+    os_info = _quiet(["lsb_release", "-d"]).partition(":")[2].strip()
+    return (
+        "System info:\n"
+        f"- Kernel: {_quiet(['uname', '-a'])}\n"
+        f"- Uptime: {_quiet(['uptime', '-p'])}\n"
+        f"- OS: {os_info}"
+    )
+
+
+def build_prompt(text: str, mode: str = "explain", lang: str = "auto",
+                 task: str = "", system_info: bool = False, raw: bool = False) -> str:
+    if raw:
+        return text
+    if lang == "auto":
+        lang = detect_language(text)
+    return PROMPT_TEMPLATE.format(
+        lang=lang,
+        mode=mode,
+        sys_block=system_info_block() if system_info else "",
+        task=task or TASKS.get(mode, TASKS["explain"]),
+        text=text,
+    )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="ask", add_help=False, allow_abbrev=False)
+    parser.add_argument("--zh", dest="lang", action="store_const", const="zh")
+    parser.add_argument("--en", dest="lang", action="store_const", const="en")
+    parser.add_argument("--translate", dest="mode", action="store_const", const="translate")
+    parser.add_argument("--explain", dest="mode", action="store_const", const="explain")
+    parser.add_argument("--model", default=os.environ.get("ASK_MODEL", MODEL_DEFAULT))
+    parser.add_argument("--api", default=os.environ.get("ASK_API", API_DEFAULT))
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--system-info", action="store_true")
+    parser.add_argument("--task", default="")
+    parser.add_argument("--raw", action="store_true")
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--no-cache", action="store_true",
+                        default=os.environ.get("ASK_CACHE") == "0")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--cache-stats", action="store_true")
+    parser.add_argument("--no-daemon", action="store_true")
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.set_defaults(lang="auto", mode="explain")
+    args, rest = parser.parse_known_args(argv)
+    args.text = " ".join(rest)
+    return args
+
+
+def open_cache():
+    import sqlite3
+    import response_cache
+    try:
+        return response_cache.open_ask_cache()
+    except (sqlite3.Error, OSError, ValueError) as exc:
+        print(f"Response cache unavailable: {exc}", file=sys.stderr)
+        return None
+
+
+def cache_key(req, prompt):
+    import response_cache
+    lang = detect_language(req["text"]) if req["lang"] == "auto" else req["lang"]
+    return response_cache.make_key(
+        model=req["model"],
+        mode=req["mode"],
+        lang=lang,
+        task=req["task"] or TASKS.get(req["mode"], ""),
+        prompt=prompt,
+    )
+
+
+def make_request(text, model=MODEL_DEFAULT, api=API_DEFAULT, mode="explain", lang="auto",
+                 task="", system_info=False, raw=False, stream=False, timeout=None,
+                 use_cache=True, refresh=False, caller=None) -> dict:
+    """Everything needed to answer one question, as plain JSON-able data."""
+    return {
+        "text": text, "model": model, "api": api, "mode": mode, "lang": lang,
+        "task": task, "system_info": system_info, "raw": raw, "stream": stream,
+        "timeout": timeout, "use_cache": use_cache, "refresh": refresh,
+        "caller": caller or os.environ.get("ASK_CALLER") or "ask",
+    }
+
+
+def query(req: dict, on_token=None, cache=None) -> dict:
+    """Answer a request in this process.
+
+    Returns {"response", "error", "cached"}. Pass a long-lived cache to reuse
+    its connection; otherwise one is opened when the request allows it.
+    """
+    import sqlite3
+    import ollama_client
+    prompt = build_prompt(req["text"], req["mode"], req["lang"], req["task"],
+                          req["system_info"], req["raw"])
+    if not req["use_cache"]:
+        cache = None
+    elif cache is None:
+        cache = open_cache()
+    key = cache_key(req, prompt) if cache else None
+    if cache and not req["refresh"]:
+        try:
+            cached = cache.get(key)
+        except sqlite3.Error:
+            cached = None
+        if cached is not None:
+            import telemetry
+            telemetry.record(telemetry.make_span(req.get("caller"), req["model"], None, "hit"))
+            return {"response": cached, "error": None, "cached": True}
+
+    try:
+        result = ollama_client.generate(req["model"], prompt, api=req["api"], interactive=True,
+                                        stream=req["stream"],
+                                        on_token=on_token if req["stream"] else None,
+                                        timeout=req["timeout"], caller=req.get("caller"),
+                                        cache="miss" if cache else "off")
+    except ValueError as exc:
+        return {"response": "", "error": str(exc), "cached": False}
+    answer = result.response.replace("\\n", "\n")
+    if result.ok and cache and answer:
+        try:
+            cache.put(key, answer)
+        except sqlite3.Error:
+            pass
+    return {"response": answer, "error": result.error, "cached": False}
+
+
+# ---------------- Daemon client ----------------
+def daemon_socket() -> pathlib.Path:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = pathlib.Path(runtime) if runtime else pathlib.Path.home() / ".autonomy"
+    return pathlib.Path(os.environ.get("ASKD_SOCKET", base / "askd.sock"))
+
+
+def daemon_query(req: dict, on_token=None):
+    """Answer via askd.py if it is running; None means fall back."""
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(0.25)
+        sock.connect(str(daemon_socket()))
+    except OSError:
+        return None
+    with sock:
+        sock.settimeout(req["timeout"] or DEFAULT_TIMEOUT)
+        try:
+            sock.sendall((json.dumps(req) + "\n").encode())
+            for line in sock.makefile("r", encoding="utf-8"):
+                msg = json.loads(line)
+                if "token" in msg:
+                    if on_token:
+                        on_token(msg["token"])
+                elif msg.get("done"):
+                    return {k: msg.get(k) for k in ("response", "error", "cached")}
+        except (OSError, ValueError) as exc:
+            return {"response": "", "error": f"askd: {exc}", "cached": False}
+    return {"response": "", "error": "askd closed the connection", "cached": False}
+
+
+def dispatch(req: dict, on_token=None, use_daemon=True) -> dict:
+    """Answer through the resident daemon when available, else directly."""
+    if use_daemon and os.environ.get("ASK_DAEMON") != "0":
+        reply = daemon_query(req, on_token)
+        if reply is not None:
+            return reply
+    return query(req, on_token)
+
+
+def main(argv=None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.help:
+        print(USAGE, end="")
+        return 0
+    if args.cache_stats:
+        cache = open_cache()
+        if cache is None:
+            return 1
+        for name, value in cache.stats().items():
+            print(f"{name}: {value}")
+        return 0
+
+    text = args.text
+    if not text and not sys.stdin.isatty():
+        text = sys.stdin.read().rstrip("\n")
+    if not text:
+        print(USAGE, end="")
+        return 1
+    if not args.model or not args.api:
+        print("Model and API must be specified.", file=sys.stderr)
+        return 1
+
+    req = make_request(text, args.model, args.api, args.mode, args.lang, args.task,
+                       args.system_info, args.raw, args.stream, args.timeout,
+                       use_cache=not args.no_cache, refresh=args.refresh)
+    streamed = []
+
+    def on_token(token):
+        streamed.append(token)
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    reply = dispatch(req, on_token, use_daemon=not args.no_daemon)
+    if streamed:
+        print()
+    elif reply["error"] is None:
+        print(reply["response"])
+    if reply["error"]:
+        print(reply["error"], file=sys.stderr)
+        return 1
+    return 0
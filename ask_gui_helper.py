@@ -0,0 +1,29 @@
+import os, sys, tkinter as tk
+from tkinter.scrolledtext import ScrolledText
+
+import ask_core
+
+def ask_answer(text):
+    # Through askd.py when it is running, otherwise in this process.
+    req = ask_core.make_request(
+        text,
+        os.environ.get("ASK_MODEL", ask_core.MODEL_DEFAULT),
+        os.environ.get("ASK_API", ask_core.API_DEFAULT),
+        caller=os.path.basename(sys.argv[0]).removesuffix(".py"),
+    )
+    reply = ask_core.dispatch(req)
+    return reply["error"] or reply["response"]
+
+def show(title, text):
+    root = tk.Tk()
+    root.title(title)
+    root.geometry("600x400")
+    root.attributes("-topmost", True)
+
+    box = ScrolledText(root, font=("Sans", 11))
+    box.pack(expand=True, fill=tk.BOTH, padx=6, pady=6)
+    box.insert(tk.END, text)
+    box.config(state=tk.DISABLED)
+
+    root.bind("<Escape>", lambda e: root.destroy())
+    root.mainloop()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Resident ask daemon.
+
+Listens on a Unix socket ($XDG_RUNTIME_DIR/askd.sock, or ASKD_SOCKET) and
+answers ask requests with warm HTTP connections and an open response
+cache, streaming tokens back as JSON lines. `ask`, ask-float.py and the
+GUI helpers use it when it is running and fall back to answering
+in-process when it is not.
+
+Start it once per session, e.g. from autostart:  askd.py --detach
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import time
+
+import ask_core
+
+
+class AskHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            req = ask_core.make_request(**json.loads(line))
+        except (ValueError, TypeError) as exc:
+            self.send({"done": True, "response": "", "error": f"bad request ({exc})", "cached": False})
+            return
+
+        def on_token(token):
+            self.send({"token": token})
+
+        started = time.monotonic()
+        reply = ask_core.query(req, on_token, cache=self.server.cache)
+        self.server.served += 1
+        self.send({"done": True, **reply, "elapsed_s": round(time.monotonic() - started, 3)})
+
+    def send(self, msg):
+        self.wfile.write((json.dumps(msg) + "\n").encode())
+        self.wfile.flush()
+
+
+class AskServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.cache = ask_core.open_cache()
+        self.served = 0
+        super().__init__(str(path), AskHandler)
+
+
+def is_running(path) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve(path) -> int:
+    if path.exists():
+        if is_running(path):
+            print(f"askd already running on {path}", file=sys.stderr)
+            return 1
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    old_umask = os.umask(0o077)
+    try:
+        server = AskServer(path)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"askd listening on {path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Resident daemon for ask")
+    parser.add_argument("--socket", help="Socket path (default: $XDG_RUNTIME_DIR/askd.sock)")
+    parser.add_argument("--detach", action="store_true", help="Start in the background and return")
+    parser.add_argument("--status", action="store_true", help="Exit 0 if a daemon is listening")
+    args = parser.parse_args()
+
+    if args.socket:
+        os.environ["ASKD_SOCKET"] = args.socket
+    path = ask_core.daemon_socket()
+
+    if args.status:
+        running = is_running(path)
+        print(f"askd {'running' if running else 'not running'} ({path})")
+        return 0 if running else 1
+
+    if args.detach:
+        if is_running(path):
+            return 0
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return 0
+
+    return serve(path)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,11 @@
 #!/usr/bin/env bash
-LOG="$HOME/.autonomy/logs/$(date +%F_%H-%M-%S).json"
-mkdir -p "$(dirname "$LOG")"
+# Usage: audit-log.sh ACTION CONTENT [SUBSYSTEM] [DECISION]
+# Appends one event to the segmented store in ~/.autonomy/events.
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
 
-jq -n \
-  --arg time "$(date)" \
-  --arg action "$1" \
-  --arg content "$2" \
-  '{time:$time, action:$action, content:$content}' \
-  > "$LOG"
+python3 "$LIB_DIR/event_store.py" append \
+  --action "$1" \
+  --content "${2:-}" \
+  ${3:+--subsystem "$3"} \
+  ${4:+--decision "$4"} \
+  > /dev/null
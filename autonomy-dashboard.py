@@ -1,21 +1,191 @@
-chris#!/usr/bin/env python3
-import tkinter as tk, pathlib, json, time
+#!/usr/bin/env python3
+"""Autonomy dashboard.
+
+A background thread keeps a stat cache of the files under ~/.autonomy and
+only re-reads, parses and renders a file when its (mtime, size, inode)
+changes. Rendered text is handed to the Tk thread through a queue, and only
+the panel whose text changed is redrawn, keeping its scroll position.
+"""
+import json
+import os
+import pathlib
+import queue
+import threading
+import tkinter as tk
+from datetime import datetime
+
+import health_state
 
 BASE = pathlib.Path.home() / ".autonomy"
+POLL_S = float(os.environ.get("DASHBOARD_POLL_S", "1"))
+MAX_ERRORS = 5
+TREND_CHECKS = 5
+
+
+# ---------------- Renderers (worker thread) ----------------
+def load_json(text):
+    try:
+        return json.loads(text), None
+    except ValueError as exc:
+        return None, f"(unreadable: {exc})"
+
+
+def render_status(files):
+    enabled, role = files
+    return (f"Autonomy: {'ON' if enabled is not None else 'OFF'}    "
+            f"Role: {role.strip() if role else 'none'}")
+
+
+def render_proposal(text):
+    if text is None:
+        return "(no proposal.json)"
+    proposal, error = load_json(text)
+    if error or not isinstance(proposal, dict):
+        return error or text
+    lines = [f"Task: {proposal.get('task', '(unknown)')}",
+             f"Confidence: {proposal.get('confidence', 0)}", ""]
+    for step in proposal.get("steps", []):
+        lines.append(f"{step.get('id', '?')}  [{step.get('risk', '?')}]  {step.get('command', '')}")
+        if step.get("description"):
+            lines.append(f"    {step['description']}")
+    return "\n".join(lines)
+
+
+def render_debate(text):
+    if text is None:
+        return "(no debate.json)"
+    debate, error = load_json(text)
+    if error:
+        return error
+    lines = [f"Task: {debate.get('task', '(unknown)')}   at {debate.get('time', '?')}", ""]
+    for step in debate.get("steps", []):
+        summary = step.get("summary", {})
+        lines.append(f"{step.get('step_id', '?')}  risk={summary.get('risk_level', '?')}  "
+                     f"agreement={summary.get('agreement', '?')}  {step.get('command', '')}")
+        for phase in step.get("phases", []):
+            if phase.get("error"):
+                lines.append(f"    {phase.get('phase')}: {phase['error']}")
+    return "\n".join(lines)
+
+
+def render_observer(text):
+    if text is None:
+        return "(no observer.json)"
+    snap, error = load_json(text)
+    if error:
+        return error
+    deltas = snap.get("deltas", {})
+    lines = [f"Snapshot: {snap.get('time', '?')}",
+             f"Memory: {snap.get('mem', '?')}",
+             f"Disk:   {snap.get('disk', '?')}",
+             f"Failed units: {', '.join(snap.get('failed_units', [])) or 'none'}",
+             f"New errors: {deltas.get('new_errors', 0)}"]
+    recent = [line for line in snap.get("errors", "").splitlines() if line][-MAX_ERRORS:]
+    lines += [f"    {line}" for line in recent]
+    return "\n".join(lines)
+
+
+def render_health(text):
+    if text is None:
+        return "(no health.json)"
+    health, error = load_json(text)
+    if error:
+        return error
+    lines = [f"Failures: {health.get('failures', '?')}   total {health.get('total_s', '?')}s"
+             + ("   (running)" if health.get("partial") else "")]
+    lines += [f"    ✖ {r['check']}" for r in health.get("results", []) if r.get("status") == "fail"]
+    lines += health_state.format_trends(health_state.latency_trends(), top=TREND_CHECKS)
+    return "\n".join(lines)
+
+
+PANELS = {
+    # panel: (files, renderer, height in lines)
+    "status": (("enabled", "current_role"), render_status, 1),
+    "proposal": (("proposal.json",), render_proposal, 10),
+    "debate": (("debate.json",), render_debate, 8),
+    "observer": (("observer.json",), render_observer, 8),
+    "health": (("health.json",), render_health, 6),
+}
+
+
+def stamp(path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def read(path):
+    try:
+        return path.read_text(errors="replace")
+    except OSError:
+        return None
+
+
+def watch(updates: queue.Queue, stop: threading.Event):
+    seen = {}
+    while not stop.is_set():
+        for name, (files, renderer, _) in PANELS.items():
+            stamps = tuple(stamp(BASE / f) for f in files)
+            if seen.get(name) == stamps:
+                continue
+            seen[name] = stamps
+            contents = [read(BASE / f) for f in files]
+            try:
+                text = renderer(contents if len(files) > 1 else contents[0])
+            except (AttributeError, TypeError, KeyError) as exc:
+                text = f"(unexpected format: {exc})"
+            updates.put((name, text))
+        stop.wait(POLL_S)
+
+
+# ---------------- UI ----------------
 root = tk.Tk()
 root.title("Autonomy Dashboard")
-root.geometry("600x400")
+root.geometry("700x600")
+
+texts = {}
+for name, (_, _, height) in PANELS.items():
+    frame = tk.LabelFrame(root, text=name.capitalize())
+    frame.pack(expand=height > 1, fill=tk.BOTH, padx=4, pady=2)
+    widget = tk.Text(frame, font=("Sans", 11), height=height, wrap=tk.NONE)
+    widget.pack(expand=True, fill=tk.BOTH)
+    widget.configure(state=tk.DISABLED)
+    texts[name] = widget
+
+updated = tk.Label(root, anchor="w", fg="gray")
+updated.pack(fill=tk.X, padx=4)
+
+updates = queue.Queue()
+stop = threading.Event()
+shown = {}
+
 
-txt = tk.Text(root, font=("Sans",11))
-txt.pack(expand=True, fill=tk.BOTH)
+def drain():
+    changed = False
+    try:
+        while True:
+            name, text = updates.get_nowait()
+            if shown.get(name) == text:
+                continue
+            shown[name] = text
+            widget = texts[name]
+            top = widget.yview()[0]
+            widget.configure(state=tk.NORMAL)
+            widget.delete("1.0", tk.END)
+            widget.insert(tk.END, text)
+            widget.configure(state=tk.DISABLED)
+            widget.yview_moveto(top)
+            changed = True
+    except queue.Empty:
+        pass
+    if changed:
+        updated.config(text=f"Updated {datetime.now().strftime('%H:%M:%S')}")
+    root.after(250, drain)
 
-def refresh():
-    txt.delete("1.0", tk.END)
-    txt.insert(tk.END, f"Autonomy: {'ON' if (BASE/'enabled').exists() else 'OFF'}\n")
-    txt.insert(tk.END, f"Role: {(BASE/'current_role').read_text() if (BASE/'current_role').exists() else 'none'}\n\n")
-    if (BASE/'proposal.json').exists():
-        txt.insert(tk.END, (BASE/'proposal.json').read_text())
-    root.after(5000, refresh)
 
-refresh()
+threading.Thread(target=watch, args=(updates, stop), daemon=True).start()
+drain()
 root.mainloop()
+stop.set()
@@ -1,17 +1,4 @@
 #!/usr/bin/env bash
-H="$HOME/.autonomy/health.json"
-
-if [ ! -f "$H" ]; then
-  echo "unknown"
-  exit 0
-fi
-
-FAILS=$(jq -r '.failures // 0' "$H")
-
-if [ "$FAILS" -eq 0 ]; then
-  echo "green"
-elif [ "$FAILS" -le 3 ]; then
-  echo "yellow"
-else
-  echo "red"
-fi
+# Prints green|yellow|red|unknown; thresholds live in health_state.py.
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+exec python3 "$LIB_DIR/health_state.py" state "$@"
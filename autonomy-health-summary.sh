@@ -1,18 +1,4 @@
 #!/usr/bin/env bash
-H="$HOME/.autonomy/health.json"
-
-if [ ! -f "$H" ]; then
-  echo "No health data yet"
-  exit 0
-fi
-
-FAILS=$(jq -r '.failures // "?"' "$H")
-TIME=$(stat -c %y "$H" | cut -d'.' -f1)
-
-if [ "$FAILS" = "0" ]; then
-  STATUS="HEALTHY"
-else
-  STATUS="ISSUES ($FAILS)"
-fi
-
-echo "Autonomy: $STATUS | Last check: $TIME"
+# One-line health summary for tooltips; see health_state.py.
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+exec python3 "$LIB_DIR/health_state.py" summary "$@"
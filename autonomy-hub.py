@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
+import argparse
+import codecs
+import collections
 import importlib.util
 import pathlib
 import os
 import queue
+import selectors
+import signal
 import subprocess
 import threading
 import time
@@ -13,6 +18,15 @@ from tkinter import filedialog, messagebox, scrolledtext, ttk
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 LOG_DIR = pathlib.Path.home() / ".autonomy"
 HUB_LOG = LOG_DIR / "autonomy-hub.log"
+HUB_LOG_MAX_BYTES = 5 * 1024 * 1024
+HUB_LOG_BACKUPS = 3
+
+MAX_OUTPUT_LINES = int(os.environ.get("AUTONOMY_HUB_MAX_LINES", "5000"))
+POLL_INTERVAL_MS = 100
+POLL_BUDGET_S = 0.02
+
+MAX_JOBS = int(os.environ.get("AUTONOMY_HUB_MAX_JOBS", "4"))
+KILL_GRACE_S = 3.0
 
 COMMANDS = [
     ("Ask (Floating)", ["ask-float.py"]),
@@ -45,6 +59,295 @@ def shutil_which(binary):
     return shutil.which(binary)
 
 
+class OutputBuffer:
+    """Last max_lines lines of output, plus text not yet shown in the widget."""
+
+    def __init__(self, max_lines=MAX_OUTPUT_LINES):
+        self.lines = collections.deque(maxlen=max(max_lines, 1))
+        self.pending = []
+        self.total_lines = 0
+
+    def append(self, text):
+        if not text:
+            return
+        self.pending.append(text)
+        parts = text.splitlines(keepends=True)
+        if self.lines and not self.lines[-1].endswith("\n"):
+            self.lines[-1] += parts.pop(0)
+        self.lines.extend(parts)
+        self.total_lines += text.count("\n")
+
+    def take_pending(self):
+        text = "".join(self.pending)
+        self.pending.clear()
+        return text
+
+    def text(self):
+        return "".join(self.lines)
+
+    def clear(self):
+        self.lines.clear()
+        self.pending.clear()
+
+
+class RotatingLogWriter:
+    """Buffered append-only log that rotates to path.1..path.N by size."""
+
+    def __init__(self, path, max_bytes=HUB_LOG_MAX_BYTES, backups=HUB_LOG_BACKUPS):
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.handle = None
+        self.size = 0
+
+    def write(self, text):
+        if self.handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.handle = self.path.open("a", buffering=64 * 1024)
+            self.size = self.handle.tell()
+        self.handle.write(text)
+        self.size += len(text.encode(errors="replace"))
+        if self.size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        self.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0 and self.path.exists():
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.flush()
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+class Job:
+    def __init__(self, job_id, cmd, resolved, input_text, timeout_s):
+        self.id = job_id
+        self.cmd = cmd
+        self.resolved = resolved
+        self.input_text = input_text
+        self.timeout_s = timeout_s
+        self.state = "queued"
+        self.proc = None
+        self.pid = None
+        self.returncode = None
+        self.started = None
+        self.ended = None
+        self.kill_at = None
+        self.cancel_requested = False
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.output = OutputBuffer(MAX_OUTPUT_LINES)
+
+    @property
+    def label(self):
+        return " ".join(self.cmd)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+
+class JobManager:
+    """Runs up to max_jobs commands at once from a single supervisor thread.
+
+    Output is read with non-blocking selects, so wall-clock timeouts fire
+    even when a process hangs without writing anything. Each job runs in
+    its own session and is stopped by signalling the whole process group.
+    Progress is reported as (type, payload) events on the given queue.
+    """
+
+    def __init__(self, events, max_jobs=MAX_JOBS):
+        self.events = events
+        self.max_jobs = max(max_jobs, 1)
+        self.jobs = {}
+        self.queued = collections.deque()
+        self.running = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.selector = selectors.DefaultSelector()
+        self.thread = None
+
+    def submit(self, cmd, resolved, input_text="", timeout_s=120):
+        with self.lock:
+            job = Job(self.next_id, cmd, resolved, input_text, timeout_s)
+            self.next_id += 1
+            self.jobs[job.id] = job
+            self.queued.append(job)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.supervise, daemon=True)
+                self.thread.start()
+        self.events.put(("job-state", job.id))
+        self.wakeup.set()
+        return job
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            if job.state == "queued":
+                self.queued.remove(job)
+                job.state = "cancelled"
+                self.events.put(("job-state", job.id))
+                return
+            job.cancel_requested = True
+        self.wakeup.set()
+
+    def supervise(self):
+        while True:
+            self.start_queued()
+            if not self.running:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            for key, _ in self.selector.select(timeout=0.1):
+                self.read(key.data, key.fileobj)
+            self.check_running()
+
+    def start_queued(self):
+        while True:
+            with self.lock:
+                if not self.queued or len(self.running) >= self.max_jobs:
+                    return
+                job = self.queued.popleft()
+            self.launch(job)
+
+    def launch(self, job):
+        try:
+            job.proc = subprocess.Popen(
+                job.resolved,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            self.finish(job, "failed", f"Missing: {job.cmd[0]}\n")
+            return
+        except Exception as exc:
+            self.finish(job, "failed", f"Failed to launch {job.cmd[0]}: {exc}\n")
+            return
+
+        job.pid = job.proc.pid
+        job.started = time.monotonic()
+        job.state = "running"
+        self.running[job.id] = job
+        os.set_blocking(job.proc.stdout.fileno(), False)
+        self.selector.register(job.proc.stdout, selectors.EVENT_READ, job)
+        threading.Thread(target=self.feed_stdin, args=(job,), daemon=True).start()
+        self.events.put(("job-state", job.id))
+
+    @staticmethod
+    def feed_stdin(job):
+        try:
+            job.proc.stdin.write(job.input_text.encode())
+        except OSError:
+            pass
+        finally:
+            try:
+                job.proc.stdin.close()
+            except OSError:
+                pass
+
+    def read(self, job, stream):
+        try:
+            data = os.read(stream.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            text = job.decoder.decode(data)
+            if text:
+                self.events.put(("job-output", (job.id, text)))
+            return
+        self.selector.unregister(stream)
+        stream.close()
+
+    def close_output(self, job):
+        stream = job.proc.stdout
+        if stream.closed:
+            return
+        for _ in range(16):  # whatever is already buffered, not a writer that never stops
+            try:
+                data = os.read(stream.fileno(), 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            text = job.decoder.decode(data)
+            if text:
+                self.events.put(("job-output", (job.id, text)))
+        self.selector.unregister(stream)
+        stream.close()
+
+    def signal_group(self, job, sig):
+        try:
+            os.killpg(job.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def check_running(self):
+        now = time.monotonic()
+        for job in list(self.running.values()):
+            if job.proc.poll() is not None and job.proc.stdout.closed:
+                if job.state == "running":
+                    job.state = "done" if job.proc.returncode == 0 else "failed"
+                self.finish(job, job.state)
+                continue
+            if job.kill_at is not None:
+                if job.kill_at == float("inf") and job.proc.poll() is not None:
+                    # The group is gone, but a child that left it (setsid)
+                    # may still hold the pipe open; stop waiting for EOF.
+                    self.close_output(job)
+                    self.finish(job, job.state)
+                elif now >= job.kill_at:
+                    self.signal_group(job, signal.SIGKILL)
+                    job.kill_at = float("inf")
+                continue
+            if job.cancel_requested or now - job.started > job.timeout_s:
+                job.state = "cancelled" if job.cancel_requested else "timeout"
+                note = "[cancelled]" if job.cancel_requested else "[timeout reached]"
+                self.events.put(("job-output", (job.id, f"\n{note}\n")))
+                self.signal_group(job, signal.SIGTERM)
+                job.kill_at = now + KILL_GRACE_S
+
+    def finish(self, job, state, message=None):
+        job.state = state
+        job.ended = time.monotonic()
+        if job.proc is not None:
+            job.returncode = job.proc.returncode
+            tail = job.decoder.decode(b"", final=True)
+            if tail:
+                self.events.put(("job-output", (job.id, tail)))
+        if message:
+            self.events.put(("job-output", (job.id, message)))
+        self.running.pop(job.id, None)
+        self.events.put(("job-state", job.id))
+
+    def active(self):
+        return [job for job in self.jobs.values() if job.state in ("queued", "running")]
+
+    def shutdown(self):
+        with self.lock:
+            self.queued.clear()
+        for job in list(self.running.values()):
+            self.signal_group(job, signal.SIGTERM)
+
+
 class HubApp:
     def __init__(self, root):
         self.root = root
@@ -59,6 +362,13 @@ class HubApp:
         self.args_var = tk.StringVar(value="")
         self.command_map = {label: cmd for label, cmd in COMMANDS}
         self.output_queue = queue.Queue()
+        self.output = OutputBuffer(MAX_OUTPUT_LINES)
+        self.log_writer = RotatingLogWriter(HUB_LOG)
+        self.rate_var = tk.StringVar(value="")
+        self.rate_mark = (time.monotonic(), 0)
+        self.jobs = JobManager(self.output_queue, MAX_JOBS)
+        self.view_job = None
+        self.log_line_start = {}
         self.tray_icon = None
         self.run_history = []
 
@@ -106,15 +416,34 @@ class HubApp:
         ttk.Button(button_row, text="Save Output", command=self.save_output).pack(side=tk.LEFT, padx=(0, 6))
         ttk.Button(button_row, text="Copy Output", command=self.copy_output).pack(side=tk.LEFT, padx=(0, 6))
         ttk.Button(button_row, text="Toggle Tray", command=self.toggle_tray).pack(side=tk.LEFT, padx=(0, 6))
-        ttk.Button(button_row, text="Clear", command=lambda: self.output_box.delete("1.0", tk.END)).pack(side=tk.LEFT)
-
-        ttk.Label(frame, text="Output:").pack(anchor=tk.W)
+        ttk.Button(button_row, text="Clear", command=self.clear_output).pack(side=tk.LEFT)
+
+        jobs_row = ttk.Frame(frame)
+        jobs_row.pack(fill=tk.X, pady=(0, 8))
+        columns = ("id", "command", "pid", "state", "elapsed", "rc")
+        self.job_table = ttk.Treeview(jobs_row, columns=columns, show="headings", height=4)
+        for col, title, width in (
+            ("id", "#", 40), ("command", "Command", 360), ("pid", "PID", 70),
+            ("state", "State", 90), ("elapsed", "Elapsed", 80), ("rc", "RC", 50),
+        ):
+            self.job_table.heading(col, text=title)
+            self.job_table.column(col, width=width, anchor=tk.W)
+        self.job_table.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.job_table.bind("<<TreeviewSelect>>", lambda _evt: self.on_job_selected())
+        job_buttons = ttk.Frame(jobs_row)
+        job_buttons.pack(side=tk.LEFT, padx=(6, 0), anchor=tk.N)
+        ttk.Button(job_buttons, text="Cancel Job", command=self.cancel_selected_job).pack(fill=tk.X)
+        ttk.Button(job_buttons, text="Hub Log", command=lambda: self.show_view(None)).pack(fill=tk.X, pady=(4, 0))
+
+        self.output_label = tk.StringVar(value="Output:")
+        ttk.Label(frame, textvariable=self.output_label).pack(anchor=tk.W)
         self.output_box = scrolledtext.ScrolledText(frame, height=18, wrap=tk.WORD)
         self.output_box.pack(fill=tk.BOTH, expand=True)
         self.output_box.insert(tk.END, "Output will appear here.\n")
 
         ttk.Separator(frame, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=10)
         ttk.Label(frame, textvariable=self.status, wraplength=850).pack(anchor=tk.W)
+        ttk.Label(frame, textvariable=self.rate_var, foreground="#555").pack(anchor=tk.W)
 
     def populate_commands(self):
         needle = self.filter_var.get().strip().lower()
@@ -138,10 +467,110 @@ class HubApp:
         return cmd
 
     def append_output(self, text):
-        self.output_box.insert(tk.END, text)
+        # Widget inserts are coalesced and applied once per poll tick.
+        self.output.append(text)
+        self.log_writer.write(text)
+
+    def current_buffer(self):
+        job = self.jobs.jobs.get(self.view_job)
+        return job.output if job else self.output
+
+    def show_view(self, job_id):
+        self.view_job = job_id
+        job = self.jobs.jobs.get(job_id)
+        self.output_label.set(f"Output: job {job.id} — {job.label}" if job else "Output:")
+        buffer = self.current_buffer()
+        buffer.take_pending()
+        self.output_box.delete("1.0", tk.END)
+        self.output_box.insert(tk.END, buffer.text())
         self.output_box.see(tk.END)
-        with HUB_LOG.open("a") as f:
-            f.write(text)
+
+    def flush_output(self):
+        text = self.current_buffer().take_pending()
+        for buffer in [self.output, *(job.output for job in self.jobs.jobs.values())]:
+            buffer.pending.clear()
+        if text:
+            self.output_box.insert(tk.END, text)
+            lines = int(self.output_box.index("end-1c").split(".")[0])
+            excess = lines - self.output.lines.maxlen
+            if excess > 0:
+                self.output_box.delete("1.0", f"{excess + 1}.0")
+            self.output_box.see(tk.END)
+        self.log_writer.flush()
+
+        now = time.monotonic()
+        since, seen = self.rate_mark
+        if now - since >= 1.0:
+            rate = (self.output.total_lines - seen) / (now - since)
+            self.rate_var.set(f"Output: {self.output.total_lines} lines, {rate:.0f} lines/s")
+            self.rate_mark = (now, self.output.total_lines)
+
+    def clear_output(self):
+        self.current_buffer().clear()
+        self.output_box.delete("1.0", tk.END)
+
+    def append_job_output(self, job_id, text):
+        job = self.jobs.jobs.get(job_id)
+        if job is None:
+            return
+        job.output.append(text)
+        self.output.total_lines += text.count("\n")
+        # Prefix each logged line so parallel jobs stay readable in the log.
+        at_start = self.log_line_start.get(job_id, True)
+        lines = text.splitlines(keepends=True)
+        logged = "".join(
+            (f"[job {job_id}] " if (i > 0 or at_start) else "") + line
+            for i, line in enumerate(lines)
+        )
+        self.log_writer.write(logged)
+        self.log_line_start[job_id] = text.endswith("\n")
+
+    def refresh_job_row(self, job):
+        values = (
+            job.id,
+            job.label,
+            job.pid or "",
+            job.state,
+            f"{job.elapsed():.1f}s",
+            "" if job.returncode is None else job.returncode,
+        )
+        iid = str(job.id)
+        if self.job_table.exists(iid):
+            self.job_table.item(iid, values=values)
+        else:
+            self.job_table.insert("", tk.END, iid=iid, values=values)
+
+    def on_job_selected(self):
+        selection = self.job_table.selection()
+        if selection:
+            self.show_view(int(selection[0]))
+
+    def cancel_selected_job(self):
+        selection = self.job_table.selection()
+        if not selection:
+            self.set_status("Select a job to cancel.")
+            return
+        self.jobs.cancel(int(selection[0]))
+        self.set_status(f"Cancelling job {selection[0]}")
+
+    def on_job_state(self, job_id):
+        job = self.jobs.jobs.get(job_id)
+        if job is None:
+            return
+        self.refresh_job_row(job)
+        if job.state in ("queued", "running"):
+            return
+        rc = "" if job.returncode is None else f" (rc={job.returncode})"
+        if job.state == "done":
+            status = f"Completed: {job.label} in {job.elapsed():.1f}s{rc}"
+        elif job.state == "timeout":
+            status = f"Timed out: {job.label}"
+        elif job.state == "cancelled":
+            status = f"Cancelled: {job.label}"
+        else:
+            status = f"Failed: {job.label}{rc}"
+        self.append_output(f"[job {job.id}] {status}\n")
+        self.set_status(status)
 
     def set_status(self, text):
         self.status.set(text)
@@ -165,51 +594,16 @@ class HubApp:
         input_text = self.input_box.get("1.0", tk.END)
         timeout_s = self.parse_timeout()
 
-        self.append_output(f"\n$ {' '.join(cmd)}\n")
-        self.set_status(f"Running: {' '.join(cmd)}")
+        job = self.jobs.submit(cmd, resolved, input_text, timeout_s)
+        self.append_output(f"\n$ {' '.join(cmd)} [job {job.id}]\n")
         self.record_history(cmd, mode="io")
-
-        def worker():
-            started = time.time()
-            try:
-                proc = subprocess.Popen(
-                    resolved,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                )
-            except FileNotFoundError:
-                self.output_queue.put(("output", f"Missing: {cmd[0]}\n"))
-                self.output_queue.put(("status", f"Missing: {cmd[0]}"))
-                return
-            except Exception as exc:
-                self.output_queue.put(("output", f"Failed to launch {cmd[0]}: {exc}\n"))
-                self.output_queue.put(("status", f"Failed to launch {cmd[0]}: {exc}"))
-                return
-
-            try:
-                if proc.stdin:
-                    proc.stdin.write(input_text)
-                    proc.stdin.close()
-
-                while True:
-                    line = proc.stdout.readline() if proc.stdout else ""
-                    if not line and proc.poll() is not None:
-                        break
-                    if line:
-                        self.output_queue.put(("output", line))
-
-                proc.wait(timeout=max(timeout_s, 1))
-                elapsed = time.time() - started
-                self.output_queue.put(("status", f"Completed: {' '.join(cmd)} in {elapsed:.1f}s (rc={proc.returncode})"))
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                self.output_queue.put(("output", "[timeout reached]\n"))
-                self.output_queue.put(("status", f"Timed out: {' '.join(cmd)}"))
-
-        threading.Thread(target=worker, daemon=True).start()
+        running = len(self.jobs.active())
+        if running > self.jobs.max_jobs:
+            self.set_status(f"Queued job {job.id}: {' '.join(cmd)} ({self.jobs.max_jobs} already running)")
+        else:
+            self.set_status(f"Running job {job.id}: {' '.join(cmd)}")
+        self.refresh_job_row(job)
+        self.job_table.selection_set(str(job.id))
 
     def parse_timeout(self):
         try:
@@ -220,7 +614,13 @@ class HubApp:
             return 120
 
     def poll_output_queue(self):
+        # Drain for at most POLL_BUDGET_S so a chatty command cannot starve Tk.
+        deadline = time.monotonic() + POLL_BUDGET_S
+        backlog = False
         while True:
+            if time.monotonic() >= deadline:
+                backlog = True
+                break
             try:
                 typ, payload = self.output_queue.get_nowait()
             except queue.Empty:
@@ -228,10 +628,17 @@ class HubApp:
 
             if typ == "output":
                 self.append_output(payload)
+            elif typ == "job-output":
+                self.append_job_output(*payload)
+            elif typ == "job-state":
+                self.on_job_state(payload)
             elif typ == "status":
                 self.set_status(payload)
 
-        self.root.after(100, self.poll_output_queue)
+        for job in self.jobs.active():
+            self.refresh_job_row(job)
+        self.flush_output()
+        self.root.after(1 if backlog else POLL_INTERVAL_MS, self.poll_output_queue)
 
     def open_proposal(self):
         try:
@@ -250,13 +657,13 @@ class HubApp:
             return
 
         try:
-            pathlib.Path(path).write_text(self.output_box.get("1.0", tk.END))
+            pathlib.Path(path).write_text(self.current_buffer().text())
             self.set_status(f"Saved output: {path}")
         except Exception as exc:
             self.set_status(f"Failed to save output: {exc}")
 
     def copy_output(self):
-        text = self.output_box.get("1.0", tk.END)
+        text = self.current_buffer().text()
         self.root.clipboard_clear()
         self.root.clipboard_append(text)
         self.set_status("Copied output to clipboard.")
@@ -282,6 +689,7 @@ class HubApp:
             lines.append(f"- {name}: {state}")
         report = "\n".join(lines)
         self.append_output(report + "\n")
+        self.flush_output()
         self.set_status("System check completed.")
         messagebox.showinfo("Autonomy Hub Check", report)
 
@@ -328,10 +736,38 @@ class HubApp:
         self.set_status("Restored from tray.")
 
 
+def bench_output(app, count):
+    """Push count lines through the output pipeline and report lines/s."""
+    line = "x" * 60 + "\n"
+    started = time.monotonic()
+    for i in range(count):
+        app.output_queue.put(("output", f"{i:08d} {line}"))
+    while not app.output_queue.empty():
+        app.root.update()
+    app.flush_output()
+    app.root.update()
+    elapsed = time.monotonic() - started
+    print(f"{count} lines in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} lines/s)")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Autonomy Hub")
+    parser.add_argument("--bench-output", type=int, metavar="N",
+                        help="Measure output throughput with N lines and exit")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    HubApp(root)
-    root.mainloop()
+    app = HubApp(root)
+    try:
+        if args.bench_output:
+            root.withdraw()
+            bench_output(app, args.bench_output)
+            root.destroy()
+        else:
+            root.mainloop()
+    finally:
+        app.jobs.shutdown()
+        app.log_writer.close()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,5 @@
 #!/usr/bin/env bash
-set -e
-while true; do
-  ~/.local/bin/planner.py | grep -vq NO_ACTION && ~/.local/bin/proposal-ui.py
-  sleep 300
-done
+# Event-driven autonomy loop: plans, debates and opens the proposal UI only
+# when ~/.autonomy sees new input. See autonomy_scheduler.py --help.
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+exec python3 "$LIB_DIR/autonomy_scheduler.py" "$@"
@@ -4,7 +4,8 @@ LOG="$HOME/.autonomy/logs/nightly-$(date +%F).log"
 
 mkdir -p "$HOME/.autonomy/logs"
 
-./autonomy-selftest.sh --json > "$OUT" 2> "$LOG"
+# --partial rewrites health.json as checks finish, so the tray sees failures early.
+./autonomy-selftest.sh --partial --output "$OUT" > "$LOG" 2>&1
 RC=$?
 
 if [ "$RC" -eq 0 ]; then
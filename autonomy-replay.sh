@@ -1,4 +1,5 @@
 #!/usr/bin/env bash
-ls -1 ~/.autonomy/logs
-read -p "Replay which log? " FILE
-cat ~/.autonomy/logs/"$FILE" | jq
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+python3 "$LIB_DIR/event_store.py" list --limit "${1:-50}"
+read -p "Replay which event? " ID
+python3 "$LIB_DIR/event_store.py" show "$ID" | jq
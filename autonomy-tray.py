@@ -2,7 +2,9 @@
 import gi, subprocess, os, pathlib
 gi.require_version('Gtk', '3.0')
 gi.require_version('AppIndicator3', '0.1')
-from gi.repository import Gtk, AppIndicator3
+from gi.repository import Gtk, Gio, AppIndicator3
+
+import health_state
 
 BASE = pathlib.Path.home() / ".autonomy"
 STATE = BASE / "enabled"
@@ -22,43 +24,33 @@ def toggle_autonomy(_):
 def set_role(role):
     ROLE.write_text(role)
 
-def icon_for_state():
-    try:
-        state = subprocess.check_output(
-            ["autonomy-health-state.sh"],
-            text=True
-        ).strip()
-    except:
-        state = "unknown"
-
-    if state == "green":
-        return "dialog-information"
-    elif state == "yellow":
-        return "dialog-warning"
-    elif state == "red":
-        return "dialog-error"
-    else:
-        return "dialog-question"
+ICONS = {
+    "green": "dialog-information",
+    "yellow": "dialog-warning",
+    "red": "dialog-error",
+}
+
+health = health_state.HealthMonitor()
 
 indicator = AppIndicator3.Indicator.new(
     "autonomy",
-    icon_for_state(),
+    "dialog-question",
     AppIndicator3.IndicatorCategory.APPLICATION_STATUS
 )
 
 indicator.set_status(AppIndicator3.IndicatorStatus.ACTIVE)
 
-def refresh_tooltip():
-    try:
-        tip = subprocess.check_output(
-            ["autonomy-health-summary.sh"],
-            text=True
-        ).strip()
-    except:
-        tip = "Autonomy status unknown"
+def refresh_health(*_):
+    # Read health.json in-process; touch the indicator only on a change.
+    state, tip, changed = health.check()
+    if changed:
+        indicator.set_icon(ICONS.get(state, "dialog-question"))
+        indicator.set_title(tip)
 
-    indicator.set_title(tip)
-    return True
+# GIO watches the file (inotify where available), so there is no timer.
+health_monitor = Gio.File.new_for_path(str(health.path)).monitor_file(Gio.FileMonitorFlags.NONE, None)
+health_monitor.connect("changed", refresh_health)
+refresh_health()
 
 
 menu = Gtk.Menu()
@@ -81,6 +73,7 @@ menu.append(Gtk.SeparatorMenuItem())
 
 item("📊 Autonomy Dashboard", "autonomy-dashboard.py")
 item("✅ Check System Health", "autonomy-health.sh")
+item("⏱ Self-test Latency", "notify-send 'Self-test latency' \"$(python3 ~/.local/bin/health_state.py trends)\"")
 
 item("🛡 Policy Editor", "policy-editor-gui.py")
 item("🔁 Toggle Autonomy", "autonomy-toggle.sh")
@@ -98,11 +91,3 @@ menu.append(quit_item)
 
 indicator.set_menu(menu)
 Gtk.main()
-
-def refresh_icon():
-    indicator.set_icon(icon_for_state())
-    return True  # keep timer
-
-from gi.repository import GLib
-GLib.timeout_add_seconds(60, refresh_tooltip)
-refresh_tooltip()
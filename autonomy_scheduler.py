@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""Event-driven scheduler for the autonomy loop.
+
+Replaces the fixed 300 s planner loop. ~/.autonomy is watched with inotify
+(mtime polling where inotify is unavailable) and work only runs when there
+is new input:
+
+  observer.json with new journal errors or failed units  -> plan
+  proposal.json with new content                         -> debate, then UI
+  remote_decision                                        -> record decision
+  enabled created / removed                              -> resume / pause
+
+The scheduler also takes observer snapshots itself every --observe-interval
+seconds. Events are debounced (a burst is handled once it has been quiet
+for --debounce seconds), coalesced (one run per action per burst) and
+rate-limited per action by --min-interval; a run that is too soon is
+deferred, not dropped. Trigger and run counts go to scheduler-stats.json
+(see --stats).
+
+Model residency rides along: a plan or review trigger starts loading the
+models configured for that burst right away, so the load overlaps the
+debounce, and the residency plan is maintained on the observe interval
+(see model_residency.py).
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import pathlib
+import select
+import signal
+import struct
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import model_residency
+import observer
+import ollama_client
+
+AUTON = pathlib.Path.home() / ".autonomy"
+LIB_DIR = pathlib.Path(__file__).resolve().parent
+STATS = AUTON / "scheduler-stats.json"
+LOG = AUTON / "scheduler.log"
+ENABLED = "enabled"
+WATCHED = {"proposal.json", "remote_decision", ENABLED, "observer.json"}
+# The expensive actions: plan runs planner.py and its new proposal leads to
+# a review, which runs the multi-model debate.
+RATE_LIMITED = ("plan", "review")
+
+DEBOUNCE_S = float(os.environ.get("AUTONOMY_DEBOUNCE_S", "2"))
+MIN_INTERVAL_S = float(os.environ.get("AUTONOMY_MIN_INTERVAL_S", "60"))
+OBSERVE_INTERVAL_S = float(os.environ.get("AUTONOMY_OBSERVE_INTERVAL_S", "60"))
+RUN_DEBATE = os.environ.get("AUTONOMY_DEBATE", "1") != "0"
+# Burst warm-ups go where debate.py sends its phases; the plan where ask does.
+DEBATE_API = os.environ.get("DEBATE_API") or ollama_client.local_api()
+ASK_API = os.environ.get("ASK_API") or ollama_client.DEFAULT_API
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def log(msg: str) -> None:
+    line = f"[{datetime.now().isoformat(timespec='seconds')}] {msg}"
+    print(line, flush=True)
+    with LOG.open("a") as f:
+        f.write(line + "\n")
+
+
+def script(name: str) -> list:
+    # Not every installed script keeps its executable bit.
+    interpreter = sys.executable if name.endswith(".py") else "bash"
+    return [interpreter, str(LIB_DIR / name)]
+
+
+# ---------------- Watching ----------------
+class InotifyWatcher:
+    """Names of changed files in one directory, via inotify(7) through ctypes."""
+
+    def __init__(self, directory: pathlib.Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, str(directory).encode(), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> set:
+        ready, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not ready:
+            return set()
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            # Only the watched files; our own stats and log writes land in
+            # the same directory and must not wake the loop.
+            if name in WATCHED:
+                names.add(name)
+        return names
+
+
+class PollingWatcher:
+    """Fallback: compare mtimes of the watched files every second."""
+
+    def __init__(self, directory: pathlib.Path):
+        self.directory = directory
+        self.seen = self._scan()
+
+    def _scan(self) -> dict:
+        stamps = {}
+        for name in WATCHED:
+            try:
+                stamps[name] = (self.directory / name).stat().st_mtime_ns
+            except OSError:
+                stamps[name] = None
+        return stamps
+
+    def wait(self, timeout: float) -> set:
+        time.sleep(min(max(timeout, 0), 1.0))
+        current = self._scan()
+        changed = {name for name in WATCHED if current[name] != self.seen.get(name)}
+        self.seen = current
+        return changed
+
+
+def make_watcher(directory):
+    try:
+        return InotifyWatcher(directory)
+    except (OSError, AttributeError) as exc:
+        log(f"inotify unavailable ({exc}); polling instead")
+        return PollingWatcher(directory)
+
+
+# ---------------- Scheduler ----------------
+class Scheduler:
+    def __init__(self, debounce=DEBOUNCE_S, min_interval=MIN_INTERVAL_S,
+                 observe_interval=OBSERVE_INTERVAL_S, debate=RUN_DEBATE):
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.observe_interval = observe_interval
+        self.debate = debate
+        self.pending = {}        # action -> reasons
+        self.burst_at = None     # time of the last event in the current burst
+        self.last_run = {}
+        self.last_observe = 0.0
+        self.last_maintain = 0.0
+        self.deferred = set()
+        self.ui = None
+        self.proposal_hash = self._hash("proposal.json")
+        self.decision_hash = self._hash("remote_decision")
+        self.stats = {"started": time.time(), "triggers": {}, "runs": {}, "coalesced": 0,
+                      "deferred": 0, "ignored": 0}
+
+    @staticmethod
+    def _hash(name):
+        try:
+            return hashlib.sha256((AUTON / name).read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def enabled(self) -> bool:
+        return (AUTON / ENABLED).exists()
+
+    def save_stats(self) -> None:
+        stats = dict(self.stats, last_run=self.last_run, pending=sorted(self.pending))
+        tmp = STATS.with_suffix(".tmp")
+        tmp.write_text(json.dumps(stats, indent=2, sort_keys=True))
+        os.replace(tmp, STATS)
+
+    def trigger(self, source: str, action: str, reason: str) -> None:
+        self.stats["triggers"][source] = self.stats["triggers"].get(source, 0) + 1
+        if action in self.pending:
+            self.stats["coalesced"] += 1
+        self.pending.setdefault(action, []).append(reason)
+        self.burst_at = time.monotonic()
+        if action in RATE_LIMITED and self.enabled():
+            model_residency.prewarm(action, DEBATE_API)
+
+    # Translate changed file names into triggers.
+    def on_changes(self, names) -> bool:
+        """True when the changes produced at least one trigger."""
+        before = sum(self.stats["triggers"].values())
+        for name in names & WATCHED:
+            if name == ENABLED:
+                state = "on" if self.enabled() else "off"
+                self.trigger(ENABLED, "observe" if state == "on" else "pause", f"autonomy {state}")
+            elif name == "observer.json":
+                self.on_snapshot(observer.read_snapshot())
+            elif name == "proposal.json":
+                digest = self._hash(name)
+                if digest and digest != self.proposal_hash:
+                    self.proposal_hash = digest
+                    self.trigger("proposal", "review", "proposal changed")
+                else:
+                    self.stats["ignored"] += 1
+            elif name == "remote_decision":
+                digest = self._hash(name)
+                if digest and digest != self.decision_hash:
+                    self.decision_hash = digest
+                    self.trigger("decision", "decision", "decision received")
+                else:
+                    self.stats["ignored"] += 1
+        return sum(self.stats["triggers"].values()) != before
+
+    def on_snapshot(self, snap) -> None:
+        if not snap:
+            return
+        deltas = snap.get("deltas", {})
+        if deltas.get("new_errors"):
+            latest = (snap.get("new_errors") or [""])[-1]
+            self.trigger("journal", "plan", f"{deltas['new_errors']} new journal error(s); latest: {latest}")
+        if deltas.get("units_failed"):
+            self.trigger("units", "plan", "failed units: " + ", ".join(deltas["units_failed"]))
+        if not deltas.get("new_errors") and not deltas.get("units_failed"):
+            self.stats["ignored"] += 1
+
+    # ---------------- Actions ----------------
+    def due(self, now) -> list:
+        """Pending actions allowed to run now; the rest stay pending."""
+        if self.burst_at is None or time.monotonic() - self.burst_at < self.debounce:
+            return []
+        ready = []
+        for action in list(self.pending):
+            wait = self.min_interval - (now - self.last_run.get(action, 0))
+            if action in RATE_LIMITED and wait > 0:
+                if action not in self.deferred:
+                    self.deferred.add(action)
+                    self.stats["deferred"] += 1
+                    log(f"defer {action} for {wait:.0f}s (min interval)")
+                continue
+            self.deferred.discard(action)
+            ready.append(action)
+        return ready
+
+    def next_wakeup(self, now) -> float:
+        wakeups = [self.last_maintain + self.observe_interval - now]
+        if self.pending and self.burst_at is not None:
+            quiet_at = self.burst_at + self.debounce - time.monotonic()
+            if quiet_at > 0:
+                wakeups.append(quiet_at)
+            for action in self.pending:
+                if action in RATE_LIMITED:
+                    wakeups.append(self.last_run.get(action, 0) + self.min_interval - now)
+        return max(min(wakeups), 0.05)
+
+    def run(self, action: str, reasons) -> None:
+        if action != "pause" and action != "decision" and not self.enabled():
+            log(f"skip {action}: autonomy is off")
+            return
+        self.stats["runs"][action] = self.stats["runs"].get(action, 0) + 1
+        self.last_run[action] = time.time()
+        log(f"run {action} ({len(reasons)} trigger(s)): {reasons[-1]}")
+        if action == "observe":
+            self.observe()
+        elif action == "plan":
+            task = "Investigate and resolve: " + "; ".join(dict.fromkeys(reasons))
+            self.call(["planner.py", "--quiet", task[:2000]])
+        elif action == "review":
+            if self.debate:
+                self.call(["debate.py"])
+            self.open_ui()
+        elif action == "decision":
+            try:
+                decision = (AUTON / "remote_decision").read_text().strip()
+            except OSError:
+                decision = "unknown"
+            self.call(["audit-log.sh", "decision", decision, "scheduler", decision])
+        elif action == "pause":
+            if self.ui and self.ui.poll() is None:
+                self.ui.terminate()
+
+    def call(self, cmd) -> None:
+        started = time.monotonic()
+        try:
+            proc = subprocess.run(script(cmd[0]) + cmd[1:], stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        except OSError as exc:
+            log(f"  {cmd[0]} failed: {exc}")
+            return
+        log(f"  {cmd[0]} exited {proc.returncode} in {time.monotonic() - started:.1f}s")
+
+    def open_ui(self) -> None:
+        # One proposal window at a time; a newer proposal replaces it.
+        if self.ui and self.ui.poll() is None:
+            self.ui.terminate()
+        try:
+            self.ui = subprocess.Popen(script("proposal-ui.py"), stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError as exc:
+            log(f"  proposal-ui.py failed: {exc}")
+
+    def observe(self) -> None:
+        self.last_observe = time.time()
+        try:
+            observer.observe()  # its observer.json write arrives as a watch event
+        except OSError as exc:
+            log(f"observer failed: {exc}")
+
+    def maintain_residency(self) -> None:
+        # Runs whether or not autonomy is on: the plan is for ask, too.
+        self.last_maintain = time.time()
+        model_residency.warmup_async([e["model"] for e in model_residency.active_plan()], ASK_API)
+
+    def loop(self, watcher) -> None:
+        if self.enabled():
+            self.observe()
+        while True:
+            now = time.time()
+            if now - self.last_maintain >= self.observe_interval:
+                self.maintain_residency()
+            if self.enabled() and now - self.last_observe >= self.observe_interval:
+                self.observe()
+            names = watcher.wait(self.next_wakeup(time.time())) & WATCHED
+            triggered = bool(names) and self.on_changes(names)
+            ran = self.due(time.time())
+            for action in ran:
+                self.run(action, self.pending.pop(action))
+            if triggered or ran:
+                self.save_stats()
+
+
+def print_stats() -> int:
+    try:
+        stats = json.loads(STATS.read_text())
+    except (OSError, ValueError):
+        print("No scheduler stats yet.", file=sys.stderr)
+        return 1
+    triggers = sum(stats["triggers"].values())
+    runs = sum(stats["runs"].values())
+    print(f"triggers: {triggers}  runs: {runs}  coalesced: {stats['coalesced']}  "
+          f"deferred: {stats['deferred']}  ignored: {stats['ignored']}")
+    for name, count in sorted(stats["triggers"].items()):
+        print(f"  trigger {name:10} {count}")
+    for name, count in sorted(stats["runs"].items()):
+        print(f"  run     {name:10} {count}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the autonomy loop when there is new input")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_S,
+                        help="Quiet seconds that end a burst of events")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL_S,
+                        help="Minimum seconds between two plan or review runs")
+    parser.add_argument("--observe-interval", type=float, default=OBSERVE_INTERVAL_S,
+                        help="Seconds between observer snapshots")
+    parser.add_argument("--no-debate", action="store_true", help="Open the UI without debating first")
+    parser.add_argument("--stats", action="store_true", help="Print trigger and run counts and exit")
+    args = parser.parse_args()
+
+    if args.stats:
+        return print_stats()
+
+    AUTON.mkdir(parents=True, exist_ok=True)
+    scheduler = Scheduler(args.debounce, args.min_interval, args.observe_interval,
+                          RUN_DEBATE and not args.no_debate)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    log("scheduler started")
+    try:
+        scheduler.loop(make_watcher(AUTON))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.save_stats()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,27 +1,60 @@
 #!/usr/bin/env python3
+import argparse
+import concurrent.futures
+import contextlib
 import json
-import subprocess
+import os
 import pathlib
+import sqlite3
 import sys
+import threading
 import time
 import datetime
 
+import debate_history
+import ollama_client
+import response_cache
+import telemetry
+
 # ---------------- Paths ----------------
 HOME = pathlib.Path.home()
 AUTON = HOME / ".autonomy"
 PROP  = AUTON / "proposal.json"
 OUT   = AUTON / "debate.json"
-HIST  = AUTON / "debate-history.jsonl"
 LOG   = AUTON / "debate.log"
 
 AUTON.mkdir(parents=True, exist_ok=True)
 
+# ---------------- Options ----------------
+parser = argparse.ArgumentParser(description="Debate every step of proposal.json")
+parser.add_argument("--concurrent", action="store_true",
+                    default=os.environ.get("DEBATE_CONCURRENT") == "1",
+                    help="Run independent phases and steps in parallel")
+parser.add_argument("--workers", type=int, default=int(os.environ.get("DEBATE_WORKERS", "4")),
+                    help="Global limit on in-flight model calls (concurrent mode)")
+parser.add_argument("--per-model", type=int, default=int(os.environ.get("DEBATE_PER_MODEL", "1")),
+                    help="Limit on in-flight calls per model (concurrent and affinity modes)")
+parser.add_argument("--affinity", action="store_true",
+                    default=os.environ.get("DEBATE_AFFINITY") == "1",
+                    help="Group all jobs by model so each model is loaded once per debate")
+parser.add_argument("--keep-alive", default=os.environ.get("DEBATE_KEEP_ALIVE", "10m"),
+                    help="keep_alive sent with batched requests (affinity mode)")
+parser.add_argument("--no-memo", action="store_true",
+                    default=os.environ.get("DEBATE_MEMO") == "0",
+                    help="Debate every step even if an identical one was judged before")
+parser.add_argument("--refresh-memo", action="store_true",
+                    help="Re-debate every step and overwrite the stored phase results")
+args = parser.parse_args()
+
 # ---------------- Logging ----------------
+log_lock = threading.Lock()
+
 def log(msg):
     line = f"[{datetime.datetime.now().isoformat()}] {msg}"
-    print(line)
-    with LOG.open("a") as f:
-        f.write(line + "\n")
+    with log_lock:
+        print(line)
+        with LOG.open("a") as f:
+            f.write(line + "\n")
 
 # ---------------- Load proposal ----------------
 if not PROP.exists():
@@ -40,19 +73,16 @@ if not steps:
     sys.exit(0)
 
 # ---------------- Ollama helper ----------------
-def ask(model, prompt, timeout=120):
-    started = time.time()
-    try:
-        out = subprocess.check_output(
-            ["ollama", "run", model, prompt],
-            text=True,
-            timeout=timeout
-        ).strip()
-        duration = time.time() - started
-        return out, duration, None
-    except Exception as e:
-        duration = time.time() - started
-        return "", duration, f"{model} unavailable ({e})"
+# Same server `ollama run` would talk to, reached over one pooled connection.
+API = os.environ.get("DEBATE_API") or ollama_client.local_api()
+
+def ask(model, prompt, timeout=120, keep_alive=None, caller="debate"):
+    result = ollama_client.generate(model, prompt, api=API, timeout=timeout,
+                                    keep_alive=keep_alive, caller=caller,
+                                    cache="off" if memo is None else "miss")
+    if result.error:
+        return "", result.duration_s, result.error
+    return result.response.strip(), result.duration_s, None
 
 def log_phase(step_id, phase_name, model, prompt):
     log(f"[step {step_id}] phase={phase_name} model={model}")
@@ -65,17 +95,18 @@ def log_phase_result(step_id, phase_name, model, output, duration, error):
     log(f"[step {step_id}] phase={phase_name} model={model} duration={duration:.2f}s")
     log(f"[step {step_id}] output:\n{output}")
 
+PROMPTS = {
+    "interpretation": "Explain the intent of this command:\n",
+    "safety": "Assess the safety risks of executing this command on a Linux system:\n",
+    "explanation": "Explain this command clearly to a system operator:\n",
+    "alternate_view": "Provide an alternate perspective, edge cases, or hidden consequences:\n",
+    "persona_review": "Review this command from a specialist persona perspective and identify overlooked issues:\n",
+    "final_judge": "Provide a final verdict with concise approval/reject recommendation and confidence:\n",
+}
+
 def prompt_for(phase, step):
     command_payload = json.dumps(step, indent=2)
-    prompts = {
-        "interpretation": "Explain the intent of this command:\n",
-        "safety": "Assess the safety risks of executing this command on a Linux system:\n",
-        "explanation": "Explain this command clearly to a system operator:\n",
-        "alternate_view": "Provide an alternate perspective, edge cases, or hidden consequences:\n",
-        "persona_review": "Review this command from a specialist persona perspective and identify overlooked issues:\n",
-        "final_judge": "Provide a final verdict with concise approval/reject recommendation and confidence:\n",
-    }
-    return prompts[phase] + command_payload
+    return PROMPTS[phase] + command_payload
 
 POPPOOB_MODELS = [
     "PopPooB-Linux:latest",
@@ -87,39 +118,101 @@ POPPOOB_MODELS = [
 ]
 DEFAULT_TIMEOUT = 120
 
-# ---------------- Per-step debate ----------------
-step_debates = []
-
-for step in steps:
-    log(f"=== DEBATING STEP: {step['id']} ===")
-
-    phases = [
-        ("interpretation", POPPOOB_MODELS[0]),
-        ("safety", POPPOOB_MODELS[1]),
-        ("explanation", POPPOOB_MODELS[2]),
-        ("alternate_view", POPPOOB_MODELS[3]),
-        ("persona_review", POPPOOB_MODELS[4]),
-        ("final_judge", POPPOOB_MODELS[5]),
-    ]
+PHASES = [
+    ("interpretation", POPPOOB_MODELS[0]),
+    ("safety", POPPOOB_MODELS[1]),
+    ("explanation", POPPOOB_MODELS[2]),
+    ("alternate_view", POPPOOB_MODELS[3]),
+    ("persona_review", POPPOOB_MODELS[4]),
+    ("final_judge", POPPOOB_MODELS[5]),
+]
+# final_judge waits for the other phases of its step; the rest are independent.
+JUDGE_PHASE = "final_judge"
 
-    phase_outputs = []
-    phase_text = {}
-    for phase_name, model in phases:
-        prompt = prompt_for(phase_name, step)
-        log_phase(step["id"], phase_name, model, prompt)
-        output, duration, error = ask(model, prompt, timeout=DEFAULT_TIMEOUT)
-        log_phase_result(step["id"], phase_name, model, output, duration, error)
-        if error:
-            output = error
-        phase_outputs.append({
-            "phase": phase_name,
-            "model": model,
-            "prompt": prompt,
-            "output": output,
-            "duration_s": round(duration, 2),
-            "error": error,
-        })
-        phase_text[phase_name] = output
+# ---------------- Phase memo ----------------
+# A phase result is reused when the step payload, phase, model and prompt
+# template are all unchanged. Failed phases are never stored, entries expire
+# after DEBATE_MEMO_TTL and the store is capped at DEBATE_MEMO_MAX_MB.
+MEMO_VERSION = 1
+memo = None
+if not args.no_memo:
+    try:
+        memo = response_cache.open_debate_memo()
+    except Exception as e:
+        log(f"Debate memo unavailable: {e}")
+
+def memo_key(step, phase_name, model):
+    return response_cache.make_key(
+        version=MEMO_VERSION,
+        step=json.dumps(step, sort_keys=True),
+        phase=phase_name,
+        model=model,
+        template=PROMPTS[phase_name],
+    )
+
+def memo_get(step, phase_name, model):
+    if memo is None or args.refresh_memo:
+        return None
+    try:
+        entry = memo.get_with_age(memo_key(step, phase_name, model))
+    except Exception:
+        return None
+    if entry is None:
+        return None
+    value, age = entry
+    try:
+        phase = json.loads(value)
+    except ValueError:
+        phase = None
+    if not isinstance(phase, dict):
+        # A corrupt or truncated row is a miss; the fresh result replaces it.
+        log(f"[step {step['id']}] phase={phase_name} model={model} memo entry unreadable, re-running")
+        return None
+    phase["cached"] = True
+    phase["cached_age_s"] = int(age)
+    telemetry.record(telemetry.make_span(f"debate:{phase_name}", model, None, "hit"))
+    log(f"[step {step['id']}] phase={phase_name} model={model} cached (age {int(age)}s)")
+    return phase
+
+def memo_put(step, phase_name, model, phase):
+    if memo is None:
+        return
+    try:
+        memo.put(memo_key(step, phase_name, model), json.dumps(phase))
+    except Exception as e:
+        log(f"Debate memo write failed: {e}")
+
+# ---------------- Phase runner ----------------
+model_slots = {}
+
+def run_phase(step, phase_name, model, keep_alive=None, check_memo=True):
+    if check_memo:
+        cached = memo_get(step, phase_name, model)
+        if cached:
+            return cached
+    prompt = prompt_for(phase_name, step)
+    log_phase(step["id"], phase_name, model, prompt)
+    with model_slots.get(model) or contextlib.nullcontext():
+        output, duration, error = ask(model, prompt, timeout=DEFAULT_TIMEOUT,
+                                      keep_alive=keep_alive, caller=f"debate:{phase_name}")
+    log_phase_result(step["id"], phase_name, model, output, duration, error)
+    if error:
+        output = error
+    phase = {
+        "phase": phase_name,
+        "model": model,
+        "prompt": prompt,
+        "output": output,
+        "duration_s": round(duration, 2),
+        "error": error,
+    }
+    if not error:
+        memo_put(step, phase_name, model, phase)
+    phase["cached"] = False
+    return phase
+
+def summarize(step, phase_outputs):
+    phase_text = {p["phase"]: p["output"] for p in phase_outputs}
 
     # Agreement heuristic
     agreement = 0.7
@@ -133,7 +226,11 @@ for step in steps:
         agreement = 0.85
         risk = "low"
 
-    step_debates.append({
+    log(
+        f"[step {step['id']}] result risk={risk} agreement={agreement} "
+        f"command={step['command']}"
+    )
+    return {
         "step_id": step["id"],
         "command": step["command"],
         "summary": {
@@ -141,13 +238,127 @@ for step in steps:
             "agreement": agreement
         },
         "phases": phase_outputs
-    })
+    }
+
+# ---------------- Serial debate ----------------
+def debate_serial():
+    step_debates = []
+    for step in steps:
+        log(f"=== DEBATING STEP: {step['id']} ===")
+        phase_outputs = [run_phase(step, name, model) for name, model in PHASES]
+        step_debates.append(summarize(step, phase_outputs))
+    return step_debates
+
+# ---------------- Concurrent debate ----------------
+def debate_concurrent(workers, per_model):
+    for _, model in PHASES:
+        model_slots.setdefault(model, threading.BoundedSemaphore(max(per_model, 1)))
+    log(f"Concurrent debate: {len(steps)} step(s), workers={workers}, per_model={per_model}")
+
+    results = [dict() for _ in steps]
+    pending = {}
+    remaining = [0] * len(steps)
+    judges = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for i, step in enumerate(steps):
+            log(f"=== DEBATING STEP: {step['id']} ===")
+            for name, model in PHASES:
+                if name == JUDGE_PHASE:
+                    continue
+                pending[pool.submit(run_phase, step, name, model)] = (i, name)
+                remaining[i] += 1
+
+        # Queue each step's judge as soon as its inputs are in, so judges of
+        # early steps overlap with the independent phases of later ones.
+        for fut in concurrent.futures.as_completed(list(pending)):
+            i, name = pending[fut]
+            results[i][name] = fut.result()
+            remaining[i] -= 1
+            if remaining[i] == 0:
+                judge_model = dict(PHASES)[JUDGE_PHASE]
+                judges.append((i, pool.submit(run_phase, steps[i], JUDGE_PHASE, judge_model)))
+
+        for i, fut in judges:
+            results[i][JUDGE_PHASE] = fut.result()
+
+    return [
+        summarize(step, [results[i][name] for name, _ in PHASES])
+        for i, step in enumerate(steps)
+    ]
+
+# ---------------- Model-affinity debate ----------------
+def count_loads(models):
+    """Model loads on a host that keeps one model resident at a time."""
+    loads, current = 0, None
+    for model in models:
+        if model != current:
+            loads += 1
+            current = model
+    return loads
 
+def debate_affinity(per_model, keep_alive):
+    # Every (step, phase) job up front, then one batch per model in PHASES
+    # order. Judges form the last batch so their inputs are always ready.
+    results = [dict() for _ in steps]
+    jobs = []
+    for i, step in enumerate(steps):
+        for name, model in PHASES:
+            cached = memo_get(step, name, model)
+            if cached:
+                results[i][name] = cached
+            else:
+                jobs.append((i, name, model))
+    grouped = {}
+    for job in jobs:
+        if job[1] != JUDGE_PHASE:
+            grouped.setdefault(job[2], []).append(job)
+    batches = list(grouped.items())
+    judge_jobs = [job for job in jobs if job[1] == JUDGE_PHASE]
+    if judge_jobs:
+        batches.append((dict(PHASES)[JUDGE_PHASE], judge_jobs))
+
+    serial_loads = count_loads(model for _, _, model in jobs)
+    affinity_loads = count_loads(model for model, _ in batches)
     log(
-        f"[step {step['id']}] result risk={risk} agreement={agreement} "
-        f"command={step['command']}"
+        f"Affinity debate: {len(jobs)} job(s) in {len(batches)} model batch(es), "
+        f"keep_alive={keep_alive}"
     )
 
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(per_model, 1)) as pool:
+        for model, batch in batches:
+            batch_started = time.time()
+            log(f"=== MODEL BATCH: {model} ({len(batch)} job(s)) ===")
+            futures = {
+                pool.submit(run_phase, steps[i], name, model, keep_alive, False): (i, name)
+                for i, name, _ in batch
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                i, name = futures[fut]
+                results[i][name] = fut.result()
+            log(f"=== MODEL BATCH DONE: {model} in {time.time() - batch_started:.2f}s ===")
+
+    log(
+        f"Model loads: {affinity_loads} (serial order would need {serial_loads}; "
+        f"avoided {serial_loads - affinity_loads})"
+    )
+    return [
+        summarize(step, [results[i][name] for name, _ in PHASES])
+        for i, step in enumerate(steps)
+    ]
+
+# ---------------- Per-step debate ----------------
+started = time.time()
+if args.affinity:
+    step_debates = debate_affinity(args.per_model, args.keep_alive)
+elif args.concurrent:
+    step_debates = debate_concurrent(args.workers, args.per_model)
+else:
+    step_debates = debate_serial()
+log(f"Debated {len(steps)} step(s) in {time.time() - started:.2f}s")
+reused = sum(p.get("cached", False) for d in step_debates for p in d["phases"])
+log(f"Memo: reused {reused}/{len(steps) * len(PHASES)} phase result(s)")
+
 # ---------------- Final debate object ----------------
 timestamp = int(time.time())
 debate = {
@@ -159,8 +370,13 @@ debate = {
 
 # ---------------- Persist ----------------
 OUT.write_text(json.dumps(debate, indent=2))
-with HIST.open("a") as f:
-    f.write(json.dumps(debate) + "\n")
+try:
+    history = debate_history.DebateHistory()
+    history.record(debate)
+    history.maybe_compact()
+    history.close()
+except sqlite3.Error as e:
+    log(f"History not recorded: {e}")
 
 log("Per-step debate completed.")
 sys.exit(0)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Indexed history of debate results.
+
+Every debated step is stored in ~/.autonomy/debate-history.sqlite3 with its
+risk level, agreement and per-phase model outputs and latencies. Commands
+and outputs are indexed with SQLite FTS5. Steps older than the retention
+window are compacted (phase outputs cut to a short excerpt, latencies kept)
+and very old ones are dropped.
+
+  debate_history.py search [TEXT] [--risk R] [--model M] [--since 7d] [--until DATE]
+  debate_history.py show STEP
+  debate_history.py stats [--since 30d]
+  debate_history.py compact [--keep-days N] [--drop-days N]
+  debate_history.py import [FILE]          load an old debate-history.jsonl
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+AUTON = pathlib.Path.home() / ".autonomy"
+DB_PATH = AUTON / "debate-history.sqlite3"
+LEGACY_JSONL = AUTON / "debate-history.jsonl"
+KEEP_DAYS = float(os.environ.get("DEBATE_HISTORY_KEEP_DAYS", "90"))
+DROP_DAYS = float(os.environ.get("DEBATE_HISTORY_DROP_DAYS", "365"))
+EXCERPT_CHARS = 200
+COMPACT_EVERY_S = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS debates (
+    id    INTEGER PRIMARY KEY,
+    task  TEXT,
+    ts    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    id        INTEGER PRIMARY KEY,
+    debate_id INTEGER NOT NULL REFERENCES debates (id) ON DELETE CASCADE,
+    step_id   TEXT,
+    command   TEXT NOT NULL,
+    risk      TEXT,
+    agreement REAL,
+    ts        REAL NOT NULL,
+    compacted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS steps_ts ON steps (ts);
+CREATE INDEX IF NOT EXISTS steps_risk_ts ON steps (risk, ts);
+CREATE TABLE IF NOT EXISTS phases (
+    id         INTEGER PRIMARY KEY,
+    step       INTEGER NOT NULL REFERENCES steps (id) ON DELETE CASCADE,
+    phase      TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    output     TEXT,
+    duration_s REAL,
+    error      TEXT,
+    cached     INTEGER NOT NULL DEFAULT 0,
+    ts         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phases_step ON phases (step);
+CREATE INDEX IF NOT EXISTS phases_model_ts ON phases (model, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS steps_fts USING fts5 (command, outputs);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_time(value: str) -> float:
+    """Epoch seconds for '7d' / '12h' / '30m' (ago) or an ISO date/time."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([dhm])", value.strip())
+    if match:
+        scale = {"d": 86400, "h": 3600, "m": 60}[match.group(2)]
+        return time.time() - float(match.group(1)) * scale
+    return datetime.fromisoformat(value).timestamp()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return round(values[index], 2)
+
+
+class DebateHistory:
+    def __init__(self, path=DB_PATH):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    # ---------------- Writing ----------------
+    def record(self, debate: dict) -> int:
+        """Store one debate object as written to debate.json; returns its id."""
+        ts = float(debate.get("timestamp") or time.time())
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            debate_id = self.db.execute(
+                "INSERT INTO debates (task, ts) VALUES (?, ?)", (debate.get("task"), ts)
+            ).lastrowid
+            for step in debate.get("steps", []):
+                summary = step.get("summary", {})
+                step_row = self.db.execute(
+                    "INSERT INTO steps (debate_id, step_id, command, risk, agreement, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (debate_id, str(step.get("step_id")), step.get("command", ""),
+                     summary.get("risk_level"), summary.get("agreement"), ts),
+                ).lastrowid
+                outputs = []
+                for phase in step.get("phases", []):
+                    self.db.execute(
+                        "INSERT INTO phases (step, phase, model, output, duration_s, error, cached, ts) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (step_row, phase.get("phase"), phase.get("model"), phase.get("output"),
+                         phase.get("duration_s"), phase.get("error"),
+                         int(bool(phase.get("cached"))), ts),
+                    )
+                    outputs.append(phase.get("output") or "")
+                self.db.execute(
+                    "INSERT INTO steps_fts (rowid, command, outputs) VALUES (?, ?, ?)",
+                    (step_row, step.get("command", ""), "\n".join(outputs)),
+                )
+        return debate_id
+
+    def maybe_compact(self) -> None:
+        """Apply the retention policy at most once a day."""
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'compacted_at'").fetchone()
+        if row and time.time() - float(row[0]) < COMPACT_EVERY_S:
+            return
+        self.compact()
+
+    def compact(self, keep_days: float = KEEP_DAYS, drop_days: float = DROP_DAYS) -> dict:
+        """Excerpt outputs older than keep_days; delete steps older than drop_days."""
+        now = time.time()
+        keep_cutoff = now - keep_days * 86400
+        drop_cutoff = now - drop_days * 86400
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            old = [r[0] for r in self.db.execute("SELECT id FROM steps WHERE ts < ?", (drop_cutoff,))]
+            for step_row in old:
+                self.db.execute("DELETE FROM steps_fts WHERE rowid = ?", (step_row,))
+            self.db.execute("DELETE FROM steps WHERE ts < ?", (drop_cutoff,))
+            self.db.execute("DELETE FROM debates WHERE id NOT IN (SELECT debate_id FROM steps)")
+            stale = [r[0] for r in self.db.execute(
+                "SELECT id FROM steps WHERE ts < ? AND compacted = 0", (keep_cutoff,))]
+            for step_row in stale:
+                self.db.execute(
+                    "UPDATE phases SET output = substr(output, 1, ?) WHERE step = ?",
+                    (EXCERPT_CHARS, step_row),
+                )
+                outputs = "\n".join(r[0] or "" for r in self.db.execute(
+                    "SELECT output FROM phases WHERE step = ?", (step_row,)))
+                self.db.execute("UPDATE steps_fts SET outputs = ? WHERE rowid = ?", (outputs, step_row))
+                self.db.execute("UPDATE steps SET compacted = 1 WHERE id = ?", (step_row,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('compacted_at', ?)", (str(now),)
+            )
+        if old or stale:
+            # executescript steps the pragma to completion; execute() frees one page.
+            self.db.executescript("PRAGMA incremental_vacuum;")
+        return {"dropped": len(old), "compacted": len(stale)}
+
+    def import_jsonl(self, path=LEGACY_JSONL) -> int:
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    debate = json.loads(line)
+                except ValueError:
+                    continue
+                self.record(debate)
+                count += 1
+        return count
+
+    # ---------------- Reading ----------------
+    def search(self, text=None, risk=None, model=None, since=None, until=None, limit=20):
+        sql = ["SELECT s.id, s.step_id, s.command, s.risk, s.agreement, s.ts, d.task FROM steps s "
+               "JOIN debates d ON d.id = s.debate_id"]
+        where, params = [], []
+        if text:
+            sql.append("JOIN steps_fts f ON f.rowid = s.id")
+            where.append("steps_fts MATCH ?")
+            # Quote each word so punctuation in commands is not FTS syntax.
+            params.append(" ".join('"' + w.replace('"', '""') + '"' for w in text.split()))
+        if risk:
+            where.append("s.risk = ?")
+            params.append(risk)
+        if model:
+            where.append("EXISTS (SELECT 1 FROM phases p WHERE p.step = s.id AND p.model = ?)")
+            params.append(model)
+        if since is not None:
+            where.append("s.ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("s.ts < ?")
+            params.append(until)
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY s.ts DESC, s.id DESC LIMIT ?")
+        params.append(limit)
+        return [dict(r) for r in self.db.execute(" ".join(sql), params)]
+
+    def step(self, step_row: int):
+        row = self.db.execute(
+            "SELECT s.*, d.task FROM steps s JOIN debates d ON d.id = s.debate_id WHERE s.id = ?",
+            (step_row,),
+        ).fetchone()
+        if row is None:
+            return None
+        result = dict(row)
+        result["phases"] = [dict(r) for r in self.db.execute(
+            "SELECT phase, model, output, duration_s, error, cached FROM phases WHERE step = ? ORDER BY id",
+            (step_row,))]
+        return result
+
+    def latency_stats(self, since=None) -> dict:
+        """Per-model call count, errors and latency percentiles (fresh calls only)."""
+        params = [since or 0]
+        stats = {}
+        for row in self.db.execute(
+            "SELECT model, COUNT(*) AS calls, SUM(error IS NOT NULL) AS errors "
+            "FROM phases WHERE ts >= ? AND cached = 0 GROUP BY model", params
+        ):
+            durations = [r[0] for r in self.db.execute(
+                "SELECT duration_s FROM phases WHERE model = ? AND ts >= ? AND cached = 0 "
+                "AND error IS NULL AND duration_s IS NOT NULL", (row["model"], params[0]))]
+            stats[row["model"]] = {
+                "calls": row["calls"],
+                "errors": row["errors"],
+                "mean_s": round(sum(durations) / len(durations), 2) if durations else None,
+                "p50_s": percentile(durations, 50),
+                "p95_s": percentile(durations, 95),
+                "max_s": round(max(durations), 2) if durations else None,
+            }
+        return stats
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the debate history")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("search", help="Find debated steps")
+    p.add_argument("text", nargs="*", help="Full-text query over commands and outputs")
+    p.add_argument("--risk", choices=["low", "medium", "high"])
+    p.add_argument("--model")
+    p.add_argument("--since", help="e.g. 7d, 12h or 2026-01-31")
+    p.add_argument("--until")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("show", help="Print one step with its phases")
+    p.add_argument("step", type=int)
+    p = sub.add_parser("stats", help="Per-model latency statistics")
+    p.add_argument("--since")
+    p = sub.add_parser("compact", help="Apply the retention policy now")
+    p.add_argument("--keep-days", type=float, default=KEEP_DAYS)
+    p.add_argument("--drop-days", type=float, default=DROP_DAYS)
+    p = sub.add_parser("import", help="Load an old debate-history.jsonl")
+    p.add_argument("file", nargs="?", default=str(LEGACY_JSONL))
+    args = parser.parse_args()
+
+    history = DebateHistory()
+    try:
+        if args.cmd == "search":
+            started = time.monotonic()
+            rows = history.search(
+                " ".join(args.text) or None, risk=args.risk, model=args.model,
+                since=parse_time(args.since) if args.since else None,
+                until=parse_time(args.until) if args.until else None,
+                limit=args.limit,
+            )
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            else:
+                for r in rows:
+                    when = datetime.fromtimestamp(r["ts"]).strftime("%Y-%m-%d %H:%M")
+                    print(f"#{r['id']:<6} {when}  {r['risk'] or '-':6} {r['agreement'] or 0:.2f}  {r['command']}")
+                print(f"{len(rows)} result(s) in {(time.monotonic() - started) * 1000:.1f} ms",
+                      file=sys.stderr)
+        elif args.cmd == "show":
+            step = history.step(args.step)
+            if step is None:
+                print(f"No such step: {args.step}", file=sys.stderr)
+                return 1
+            print(json.dumps(step, indent=2))
+        elif args.cmd == "stats":
+            since = parse_time(args.since) if args.since else None
+            for model, s in sorted(history.latency_stats(since).items()):
+                print(f"{model:28} calls={s['calls']:<5} errors={s['errors']:<4} "
+                      f"mean={s['mean_s']}s p50={s['p50_s']}s p95={s['p95_s']}s max={s['max_s']}s")
+        elif args.cmd == "compact":
+            result = history.compact(args.keep_days, args.drop_days)
+            print(f"Compacted {result['compacted']} step(s), dropped {result['dropped']}")
+        elif args.cmd == "import":
+            print(f"Imported {history.import_jsonl(args.file)} debate(s)")
+    except (ValueError, sqlite3.Error, OSError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Pool of Ollama endpoints with health probes, routing and failover.
+
+Endpoints are configured in one place, ~/.autonomy/endpoints.json:
+
+  {"endpoints": [{"url": "http://96.242.172.92:11434", "max_inflight": 4},
+                 {"url": "http://10.0.0.5:11434", "weight": 2}],
+   "hedge_after_s": 1.5, "probe_interval_s": 15}
+
+or $OLLAMA_ENDPOINTS (comma-separated base URLs). Without either there is
+no pool and every tool talks to its single configured host as before.
+
+Each endpoint is probed with /api/tags (models it has) and /api/ps (models
+loaded right now) from a background thread; the results are shared between
+processes through endpoints-state.json. A request goes to the healthy
+endpoint that already has the model loaded, then one that has it, with
+ties broken by this process's in-flight calls per weight and probe latency.
+Endpoints already running max_inflight of this process's calls go last.
+Connection errors and 5xx replies fail over to the next endpoint as long
+as no tokens have been delivered. Interactive calls can be hedged: when
+the first endpoint has produced nothing after hedge_after_s, the same
+request goes to the next one and whichever answers first wins.
+
+  endpoint_pool.py status     health, models and per-endpoint stats
+  endpoint_pool.py probe      probe every endpoint now
+"""
+import argparse
+import fcntl
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama_client
+import telemetry
+
+AUTON = pathlib.Path.home() / ".autonomy"
+CONFIG = AUTON / "endpoints.json"
+STATE = AUTON / "endpoints-state.json"
+PROBE_TIMEOUT = float(os.environ.get("OLLAMA_PROBE_TIMEOUT", "1"))
+PROBE_INTERVAL = 15.0
+HEDGE_AFTER = 0.0  # off unless configured
+STAT_KEYS = ("requests", "failures", "failovers", "hedges", "hedge_wins")
+
+
+def model_name(name: str) -> str:
+    return name if ":" in name else name + ":latest"
+
+
+class Endpoint:
+    def __init__(self, url, max_inflight=4, weight=1.0):
+        self.url = url.rstrip("/")
+        self.api = self.url + "/api/generate"
+        self.max_inflight = max_inflight
+        self.weight = weight or 1.0
+        self.healthy = True  # until a probe or a call says otherwise
+        self.checked = 0.0
+        self.models = None   # None = not probed yet
+        self.loaded = []
+        self.probe_ms = None
+        self.error = None
+        self.inflight = 0
+
+    def has(self, model) -> int:
+        """0 loaded, 1 available (or unknown), 2 known to be missing."""
+        if model in self.loaded:
+            return 0
+        return 1 if self.models is None or model in self.models else 2
+
+    def state(self) -> dict:
+        return {"healthy": self.healthy, "checked": self.checked, "models": self.models,
+                "loaded": self.loaded, "probe_ms": self.probe_ms, "error": self.error}
+
+    def restore(self, saved: dict) -> None:
+        for key in ("healthy", "checked", "models", "loaded", "probe_ms", "error"):
+            if key in saved:
+                setattr(self, key, saved[key])
+
+
+def probe(endpoint: Endpoint, timeout=PROBE_TIMEOUT) -> None:
+    started = time.monotonic()
+    try:
+        with urllib.request.urlopen(endpoint.url + "/api/tags", timeout=timeout) as resp:
+            tags = json.load(resp)
+        endpoint.probe_ms = round((time.monotonic() - started) * 1000, 1)
+        with urllib.request.urlopen(endpoint.url + "/api/ps", timeout=timeout) as resp:
+            ps = json.load(resp)
+        endpoint.models = sorted(model_name(m["name"]) for m in tags.get("models", []))
+        endpoint.loaded = sorted(model_name(m["name"]) for m in ps.get("models", []))
+        endpoint.healthy, endpoint.error = True, None
+    except (OSError, ValueError, KeyError) as exc:
+        endpoint.healthy, endpoint.error = False, f"{exc.__class__.__name__}: {exc}"
+    endpoint.checked = time.time()
+
+
+# ---------------- Shared state ----------------
+def update_state(change, path=STATE) -> dict:
+    """Read-modify-write endpoints-state.json under a lock; returns the new state."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = json.loads(path.read_text())
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("endpoints", {})
+        change(state)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, path)
+    return state
+
+
+def read_state(path=STATE) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {"endpoints": {}}
+
+
+# ---------------- Pool ----------------
+class EndpointPool:
+    def __init__(self, endpoints, hedge_after_s=HEDGE_AFTER, probe_interval_s=PROBE_INTERVAL,
+                 state_path=STATE):
+        self.endpoints = endpoints
+        self.hedge_after_s = hedge_after_s
+        self.probe_interval_s = probe_interval_s
+        self.state_path = state_path
+        self.lock = threading.Lock()
+        self.prober = None
+        saved = read_state(state_path).get("endpoints", {})
+        for endpoint in endpoints:
+            endpoint.restore(saved.get(endpoint.url, {}))
+
+    def probe_all(self) -> None:
+        with ThreadPoolExecutor(max_workers=len(self.endpoints)) as pool:
+            list(pool.map(probe, self.endpoints))
+
+        def change(state):
+            for endpoint in self.endpoints:
+                state["endpoints"].setdefault(endpoint.url, {}).update(endpoint.state())
+        update_state(change, self.state_path)
+
+    def refresh(self) -> None:
+        """Probe now if nothing was ever probed; keep a background prober running."""
+        if all(e.checked == 0 for e in self.endpoints):
+            self.probe_all()
+        with self.lock:
+            if self.prober is None:
+                self.prober = threading.Thread(target=self._probe_loop, daemon=True)
+                self.prober.start()
+
+    def _probe_loop(self):
+        while True:
+            oldest = min(e.checked for e in self.endpoints)
+            time.sleep(max(oldest + self.probe_interval_s - time.time(), 0.5))
+            try:
+                self.probe_all()
+            except OSError:
+                pass
+
+    def candidates(self, model) -> list:
+        model = model_name(model)
+        with self.lock:
+            def score(e):
+                # An endpoint at max_inflight is only used once the others are full too.
+                return (not e.healthy, e.inflight >= e.max_inflight, e.has(model),
+                        e.inflight / e.weight, e.probe_ms or 0)
+            ranked = sorted(self.endpoints, key=score)
+        # Endpoints known to lack the model are kept only as a last resort.
+        return [e for e in ranked if e.has(model) < 2] + [e for e in ranked if e.has(model) == 2]
+
+    def count(self, endpoint, **increments) -> None:
+        def change(state):
+            stats = state["endpoints"].setdefault(endpoint.url, {}).setdefault("stats", {})
+            for key, value in increments.items():
+                stats[key] = stats.get(key, 0) + value
+            if "healthy" in increments or "failures" in increments:
+                state["endpoints"][endpoint.url].update(endpoint.state())
+        try:
+            update_state(change, self.state_path)
+        except OSError:
+            pass
+
+    def _call(self, endpoint, model, prompt, kwargs):
+        with self.lock:
+            endpoint.inflight += 1
+        try:
+            client = ollama_client.get_client(endpoint.api)
+            return client.generate(model, prompt, **kwargs)
+        finally:
+            with self.lock:
+                endpoint.inflight -= 1
+
+    def generate(self, model, prompt, interactive=False, **kwargs):
+        """Like OllamaClient.generate, on the best endpoint, with failover."""
+        self.refresh()
+        order = self.candidates(model)
+        if interactive and self.hedge_after_s > 0 and len(order) > 1:
+            result, order = self._hedged(order, model, prompt, kwargs)
+            if result.ok or not result.retryable or not order:
+                return result
+        result = None
+        for i, endpoint in enumerate(order):
+            result = self._call(endpoint, model, prompt, kwargs)
+            if result.ok or not result.retryable:
+                self.count(endpoint, requests=1, failovers=int(i > 0))
+                return result
+            endpoint.healthy, endpoint.error = False, result.error
+            self.count(endpoint, requests=1, failures=1)
+        return result
+
+    def _hedged(self, order, model, prompt, kwargs):
+        """Race the first endpoint against the second once hedge_after_s passes.
+
+        Returns (result, endpoints not yet tried) for the caller to fail over to.
+        """
+        on_token = kwargs.get("on_token")
+        until = kwargs.get("until")
+        cond = threading.Condition()
+        race = {"winner": None, "results": {}}
+
+        def run(endpoint):
+            def gate(token):
+                with cond:
+                    if race["winner"] is None:
+                        race["winner"] = endpoint
+                        cond.notify_all()
+                    won = race["winner"] is endpoint
+                if won and on_token:
+                    on_token(token)
+
+            def stop(text):
+                # The loser drops its connection at its next token.
+                return race["winner"] not in (None, endpoint) or bool(until and until(text))
+
+            call = dict(kwargs, on_token=gate, until=stop)
+            # Always leave a result, or the waiting caller never wakes up.
+            result = ollama_client.GenerateResult(model=model, error="hedged call did not finish")
+            try:
+                result = self._call(endpoint, model, prompt, call)
+            except Exception as exc:
+                result.error = f"{model} call failed ({exc.__class__.__name__}: {exc})"
+            finally:
+                with cond:
+                    race["results"][endpoint.url] = result
+                    cond.notify_all()
+
+        first, second = order[0], order[1]
+        threading.Thread(target=run, args=(first,), daemon=True).start()
+        with cond:
+            cond.wait_for(lambda: race["winner"] or race["results"], timeout=self.hedge_after_s)
+            hedged = not (race["winner"] or race["results"])
+        if hedged:
+            threading.Thread(target=run, args=(second,), daemon=True).start()
+        racers = [first, second] if hedged else [first]
+        with cond:
+            # Done when a winner has finished, or every racer has failed.
+            cond.wait_for(lambda: (race["winner"] and race["winner"].url in race["results"])
+                          or len(race["results"]) == len(racers))
+            winner = race["winner"]
+        if winner is None:  # nobody streamed a token; take any clean finish
+            winner = next((e for e in racers if race["results"][e.url].ok), None)
+        if winner is not None:
+            result = race["results"][winner.url]
+            if hedged:
+                self.count(first, hedges=1)
+            self.count(winner, requests=1, hedge_wins=int(hedged and winner is second))
+            return result, []
+        for endpoint in racers:
+            result = race["results"][endpoint.url]
+            if result.retryable:
+                endpoint.healthy, endpoint.error = False, result.error
+            self.count(endpoint, requests=1, failures=1)
+        return result, order[len(racers):]
+
+
+def load_config(path=CONFIG):
+    urls = [u.strip() for u in os.environ.get("OLLAMA_ENDPOINTS", "").split(",") if u.strip()]
+    config = {}
+    if not urls:
+        try:
+            config = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+    entries = [{"url": u} for u in urls] or config.get("endpoints", [])
+    endpoints = [Endpoint(e["url"], e.get("max_inflight", 4), e.get("weight", 1.0))
+                 for e in entries if e.get("url")]
+    if not endpoints:
+        return None
+    return endpoints, config
+
+
+_pool = None
+_pool_loaded = False
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, or None when no endpoints are configured."""
+    global _pool, _pool_loaded
+    with _pool_lock:
+        if not _pool_loaded:
+            _pool_loaded = True
+            loaded = load_config()
+            if loaded:
+                endpoints, config = loaded
+                _pool = EndpointPool(
+                    endpoints,
+                    float(os.environ.get("OLLAMA_HEDGE_AFTER", config.get("hedge_after_s", HEDGE_AFTER))),
+                    float(config.get("probe_interval_s", PROBE_INTERVAL)),
+                )
+        return _pool
+
+
+# ---------------- CLI ----------------
+def print_status(pool) -> None:
+    state = read_state().get("endpoints", {})
+    latency = telemetry.aggregate(telemetry.iter_spans(time.time() - 86400), "endpoint")
+    print(f"{'ENDPOINT':32} {'UP':3} {'PROBE':>7} {'REQ':>6} {'FAIL':>5} {'FOVR':>5} "
+          f"{'HEDGE':>5} {'WON':>4} {'P50':>7} {'P90':>7}  LOADED")
+    for endpoint in pool.endpoints:
+        saved = state.get(endpoint.url, {})
+        stats = saved.get("stats", {})
+        durations = latency.get((f"{endpoint.url.split('://')[-1]}",), {}).get("duration_s", [])
+        probe_ms = f"{saved['probe_ms']:.0f}ms" if saved.get("probe_ms") is not None else "-"
+        print(f"{endpoint.url[:32]:32} {'yes' if saved.get('healthy', True) else 'NO':3} {probe_ms:>7} "
+              f"{stats.get('requests', 0):>6} {stats.get('failures', 0):>5} {stats.get('failovers', 0):>5} "
+              f"{stats.get('hedges', 0):>5} {stats.get('hedge_wins', 0):>4} "
+              f"{telemetry.fmt(telemetry.percentile(durations, 0.5)):>7} "
+              f"{telemetry.fmt(telemetry.percentile(durations, 0.9)):>7}  "
+              f"{', '.join(saved.get('loaded') or []) or '-'}")
+        if saved.get("error"):
+            print(f"    {saved['error']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ollama endpoint pool")
+    parser.add_argument("cmd", choices=("status", "probe"))
+    args = parser.parse_args()
+
+    pool = get_pool()
+    if pool is None:
+        print(f"No endpoints configured (set OLLAMA_ENDPOINTS or write {CONFIG}).", file=sys.stderr)
+        return 1
+    if args.cmd == "probe":
+        pool.probe_all()
+    print_status(pool)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
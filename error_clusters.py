@@ -0,0 +1,272 @@
+"""Clustered, cached explanations of journal errors for `ask-error`.
+
+Journal messages are reduced to templates (numbers, addresses, ids and the
+like masked) and grouped, so a burst of one error becomes a single entry
+with a count and first/last timestamps. The new clusters of a run go to the
+model together in one numbered prompt; the answer is split per cluster and
+cached by template, so a known cluster never goes back to the model. With
+--incremental only entries newer than the cursor saved by the previous run
+are considered.
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+import ask_core
+import observer
+import response_cache
+
+AUTON = pathlib.Path.home() / ".autonomy"
+CURSORS = AUTON / "ask-error-cursor.json"
+EXPLANATIONS = AUTON / "error-explanations.sqlite3"
+EXPLANATION_TTL = float(os.environ.get("ASK_ERROR_CACHE_TTL", 30 * 24 * 3600))
+MAX_CLUSTERS = int(os.environ.get("ASK_ERROR_MAX_CLUSTERS", "8"))
+DEFAULT_PROMPT = "Explain these system errors and what they usually mean."
+
+USAGE = """Usage:
+  ask-error [options]
+
+Options:
+  --lines <n>         Number of journal lines to fetch (default: 30)
+  --priority <level>  Journal priority (default: err)
+  --incremental       Only entries since the last --incremental run
+  --translate         Translate the error text
+  --explain           Explain the error text (default)
+  --prompt <text>     Custom prompt for the assistant
+  --timeout <seconds> Request timeout in seconds
+  --max-clusters <n>  Explain at most n new clusters per run (default: 8)
+  --clusters          Only list the clusters; do not ask the model
+  --no-cache          Skip the explanation cache
+  --refresh           Ignore cached explanations and store fresh ones
+  -h | --help         Show this help
+
+Environment:
+  ASK_ERROR_INCREMENTAL=1     Make --incremental the default
+"""
+
+MASKS = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}\b"), "<mac>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b"), "<hex>"),
+    (re.compile(r"(?<![A-Za-z_])\d+(?:\.\d+)?"), "<n>"),
+]
+
+
+def template(message: str) -> str:
+    for pattern, token in MASKS:
+        message = pattern.sub(token, message)
+    return " ".join(message.split())
+
+
+def cluster(entries) -> list:
+    """Group entries by (ident, template); largest clusters first."""
+    groups = {}
+    for entry in entries:
+        key = (entry["ident"], template(entry["message"]))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {"ident": key[0], "template": key[1], "count": 1,
+                           "first": entry["ts"], "last": entry["ts"], "example": entry["message"]}
+            continue
+        group["count"] += 1
+        if entry["ts"]:
+            group["first"] = min(filter(None, (group["first"], entry["ts"])))
+            group["last"] = max(filter(None, (group["last"], entry["ts"])))
+    return sorted(groups.values(), key=lambda g: (-g["count"], -(g["last"] or 0)))
+
+
+def _when(ts) -> str:
+    return datetime.fromtimestamp(ts).strftime("%b %d %H:%M:%S") if ts else "?"
+
+
+def describe(group) -> str:
+    span = _when(group["first"])
+    if group["count"] > 1:
+        span += f" … {_when(group['last'])}"
+    return f"[{group['count']}×  {span}]  {group['ident']}: {group['template']}"
+
+
+def cluster_prompt(group) -> str:
+    text = f"{group['ident']}: {group['template']}\n"
+    text += f"(seen {group['count']} time(s) between {_when(group['first'])} and {_when(group['last'])}"
+    if group["example"] != group["template"]:
+        text += f"; example: {group['example']}"
+    return text + ")"
+
+
+def batch_prompt(groups) -> str:
+    if len(groups) == 1:
+        return cluster_prompt(groups[0])
+    numbered = "\n".join(f"{i}. {cluster_prompt(g)}" for i, g in enumerate(groups, 1))
+    return ("Explain each numbered error separately. Start each explanation on its own "
+            "line with the error's number, like \"1.\", and keep the numbering.\n\n" + numbered)
+
+
+ANSWER_START = re.compile(r"^[\s#*]*(?:error\s*)?\[?(\d+)[.):\]]", re.IGNORECASE | re.MULTILINE)
+
+
+def split_answer(answer, count):
+    """Explanations 1..count from a numbered reply, or None if it cannot be split."""
+    if count == 1:
+        return [answer]
+    parts = {}
+    matches = list(ANSWER_START.finditer(answer))
+    for match, following in zip(matches, matches[1:] + [None]):
+        number = int(match.group(1))
+        text = answer[match.end():following.start() if following else len(answer)].strip()
+        if 1 <= number <= count and number not in parts and text:
+            parts[number] = text.strip("* ").strip()
+    if len(parts) != count:
+        return None
+    return [parts[i] for i in range(1, count + 1)]
+
+
+def explanation_key(group, args) -> str:
+    return response_cache.make_key(kind="error-cluster", ident=group["ident"], template=group["template"],
+                                   mode=args.mode, task=args.prompt, model=args.model)
+
+
+def open_explanations():
+    try:
+        return response_cache.ResponseCache(EXPLANATIONS, max_bytes=8 * 1024 * 1024, ttl=EXPLANATION_TTL)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"Explanation cache unavailable: {exc}", file=sys.stderr)
+        return None
+
+
+def load_cursor(priority):
+    try:
+        return json.loads(CURSORS.read_text()).get(str(priority))
+    except (OSError, ValueError):
+        return None
+
+
+def save_cursor(priority, cursor) -> None:
+    try:
+        cursors = json.loads(CURSORS.read_text())
+    except (OSError, ValueError):
+        cursors = {}
+    cursors[str(priority)] = cursor
+    AUTON.mkdir(parents=True, exist_ok=True)
+    tmp = CURSORS.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cursors))
+    os.replace(tmp, CURSORS)
+
+
+def explain_clusters(groups, args, out=print) -> bool:
+    """Print each cluster with its explanation; False if the model call failed."""
+    cache = None if args.no_cache else open_explanations()
+    known = {}
+    for i, group in enumerate(groups):
+        if cache and not args.refresh:
+            try:
+                cached = cache.get(explanation_key(group, args))
+            except sqlite3.Error:
+                cached = None
+            if cached is not None:
+                known[i] = f"(known) {cached}"
+    new = [i for i in range(len(groups)) if i not in known]
+    asked, skipped = new[:args.max_clusters], new[args.max_clusters:]
+    ok = not skipped
+    combined = None  # the whole reply when it could not be split per cluster
+
+    if asked:
+        req = ask_core.make_request(batch_prompt([groups[i] for i in asked]), args.model, args.api,
+                                    mode=args.mode, task=args.prompt, timeout=args.timeout,
+                                    use_cache=False, caller="ask-error")
+        reply = ask_core.dispatch(req)
+        answer = reply["response"].strip()
+        parts = None if reply["error"] else split_answer(answer, len(asked))
+        if reply["error"]:
+            ok = False
+            for i in asked:
+                known[i] = reply["error"]
+        elif parts is None:
+            combined = answer
+        else:
+            for i, part in zip(asked, parts):
+                known[i] = part
+                if cache and part:
+                    try:
+                        cache.put(explanation_key(groups[i], args), part)
+                    except sqlite3.Error:
+                        pass
+
+    for i, group in enumerate(groups):
+        out(describe(group))
+        if i in known:
+            out(f"  {known[i]}\n")
+        elif i in skipped:
+            out("  (not explained this run)\n")
+        else:
+            out("")
+    if combined is not None:
+        # Not cached: without a per-cluster split there is nothing to key it by.
+        out(combined + "\n")
+    return ok
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="ask-error", add_help=False, allow_abbrev=False)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--priority", default="err")
+    parser.add_argument("--incremental", action="store_true",
+                        default=os.environ.get("ASK_ERROR_INCREMENTAL") == "1")
+    parser.add_argument("--translate", dest="mode", action="store_const", const="translate")
+    parser.add_argument("--explain", dest="mode", action="store_const", const="explain")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--max-clusters", type=int, default=MAX_CLUSTERS)
+    parser.add_argument("--clusters", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--model", default=os.environ.get("ASK_MODEL", ask_core.MODEL_DEFAULT))
+    parser.add_argument("--api", default=os.environ.get("ASK_API", ask_core.API_DEFAULT))
+    parser.add_argument("-h", "--help", action="store_true")
+    parser.set_defaults(mode="explain")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    try:
+        args = parse_args(sys.argv[1:] if argv is None else argv)
+    except SystemExit:
+        print(USAGE, end="", file=sys.stderr)
+        return 1
+    if args.help:
+        print(USAGE, end="")
+        return 0
+    if args.lines <= 0:
+        print("Lines must be a positive integer.", file=sys.stderr)
+        return 1
+
+    cursor = load_cursor(args.priority) if args.incremental else None
+    try:
+        entries, new_cursor = observer.read_journal(cursor, args.priority, last=args.lines,
+                                                    max_new=args.lines, strict=True)
+    except OSError as exc:
+        print(f"Could not read the journal: {exc}", file=sys.stderr)
+        return 1
+    if not entries:
+        print("No new system errors since the last run." if cursor else "No recent system errors found.")
+        return 0
+
+    groups = cluster(entries)
+    print(f"{len(entries)} journal entries in {len(groups)} cluster(s)\n")
+    if args.clusters:
+        for group in groups:
+            print(describe(group))
+        return 0
+
+    ok = explain_clusters(groups, args)
+    # Advance only when every cluster got an answer, so failures are retried.
+    if args.incremental and ok and new_cursor:
+        save_cursor(args.priority, new_cursor)
+    return 0 if ok else 1
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Append-only event store for autonomy audit events.
+
+Events are JSON lines in time-based segments under ~/.autonomy/events
+(events-YYYY-MM-DD.jsonl, or hourly with AUTONOMY_EVENT_SEGMENT=hour).
+Each segment has a binary .idx sidecar of fixed-size (offset, timestamp)
+records, so an event can be read by number without scanning the segment,
+and rollups.json holds counts per segment, subsystem and decision that are
+updated on every append. Readers such as the heat-map and fatigue check
+use the rollups instead of rescanning events.
+
+  event_store.py append --action A --content C [--subsystem S --decision D]
+  event_store.py count                  total events
+  event_store.py rollups                rollups as JSON
+  event_store.py list [--limit N]       newest events with their ids
+  event_store.py show ID                one event (ID as printed by list)
+  event_store.py migrate [--remove]     import ~/.autonomy/logs/*.json
+  event_store.py rebuild                regenerate indexes and rollups
+"""
+import argparse
+import fcntl
+import json
+import os
+import pathlib
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+AUTON = pathlib.Path.home() / ".autonomy"
+STORE = pathlib.Path(os.environ.get("AUTONOMY_EVENT_STORE", AUTON / "events"))
+LEGACY_LOGS = AUTON / "logs"
+SEGMENT_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%d_%H"}
+INDEX_RECORD = struct.Struct("<Qd")
+
+
+def segment_name(ts: float) -> str:
+    fmt = SEGMENT_FORMATS.get(os.environ.get("AUTONOMY_EVENT_SEGMENT", "day"), SEGMENT_FORMATS["day"])
+    return "events-" + datetime.fromtimestamp(ts).strftime(fmt)
+
+
+def empty_rollups() -> dict:
+    return {"total": 0, "segments": {}, "subsystems": {}, "actions": {}}
+
+
+def add_to_rollups(rollups: dict, segment: str, event: dict) -> None:
+    rollups["total"] += 1
+    rollups["segments"][segment] = rollups["segments"].get(segment, 0) + 1
+    sub = rollups["subsystems"].setdefault(event.get("subsystem") or "unknown", {"total": 0, "decisions": {}})
+    sub["total"] += 1
+    decision = event.get("decision") or "none"
+    sub["decisions"][decision] = sub["decisions"].get(decision, 0) + 1
+    action = event.get("action") or "unknown"
+    rollups["actions"][action] = rollups["actions"].get(action, 0) + 1
+
+
+class EventStore:
+    def __init__(self, root=STORE):
+        self.root = pathlib.Path(root)
+        self.rollups_path = self.root / "rollups.json"
+
+    @contextmanager
+    def locked(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def rollups(self) -> dict:
+        try:
+            return json.loads(self.rollups_path.read_text())
+        except (OSError, ValueError):
+            return empty_rollups()
+
+    def _save_rollups(self, rollups: dict) -> None:
+        tmp = self.rollups_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(rollups, sort_keys=True))
+        os.replace(tmp, self.rollups_path)
+
+    def _write(self, event: dict, rollups: dict) -> str:
+        segment = segment_name(event["ts"])
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode()
+        with open(self.root / f"{segment}.jsonl", "ab") as data:
+            offset = data.tell()
+            data.write(line)
+        with open(self.root / f"{segment}.idx", "ab") as idx:
+            number = idx.tell() // INDEX_RECORD.size
+            idx.write(INDEX_RECORD.pack(offset, event["ts"]))
+        add_to_rollups(rollups, segment, event)
+        return f"{segment[len('events-'):]}:{number}"
+
+    def append(self, action: str, content: str = "", ts: float = None, **fields) -> str:
+        """Store one event; returns its id ("<segment>:<n>")."""
+        ts = time.time() if ts is None else ts
+        event = {"ts": ts, "time": datetime.fromtimestamp(ts).isoformat(timespec="seconds"),
+                 "action": action, "content": content}
+        event.update({k: v for k, v in fields.items() if v})
+        with self.locked():
+            rollups = self.rollups()
+            event_id = self._write(event, rollups)
+            self._save_rollups(rollups)
+        return event_id
+
+    def segments(self):
+        return sorted(p.stem for p in self.root.glob("events-*.jsonl"))
+
+    def count(self, segment: str) -> int:
+        try:
+            return (self.root / f"{segment}.idx").stat().st_size // INDEX_RECORD.size
+        except OSError:
+            return 0
+
+    def read(self, event_id: str) -> dict:
+        name, _, number = event_id.rpartition(":")
+        segment = f"events-{name}"
+        with open(self.root / f"{segment}.idx", "rb") as idx:
+            idx.seek(int(number) * INDEX_RECORD.size)
+            record = idx.read(INDEX_RECORD.size)
+        if len(record) < INDEX_RECORD.size:
+            raise KeyError(event_id)
+        offset, _ts = INDEX_RECORD.unpack(record)
+        with open(self.root / f"{segment}.jsonl", "rb") as data:
+            data.seek(offset)
+            return json.loads(data.readline())
+
+    def recent(self, limit: int = 50):
+        """(id, event) pairs, newest first, touching only the segments needed."""
+        for segment in reversed(self.segments()):
+            for number in range(self.count(segment) - 1, -1, -1):
+                if limit <= 0:
+                    return
+                event_id = f"{segment[len('events-'):]}:{number}"
+                yield event_id, self.read(event_id)
+                limit -= 1
+
+    def rebuild(self) -> dict:
+        """Regenerate every index and the rollups from the segment data."""
+        with self.locked():
+            rollups = empty_rollups()
+            for segment in self.segments():
+                with open(self.root / f"{segment}.jsonl", "rb") as data, \
+                        open(self.root / f"{segment}.idx", "wb") as idx:
+                    offset = 0
+                    for line in data:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            offset += len(line)
+                            continue
+                        idx.write(INDEX_RECORD.pack(offset, float(event.get("ts", 0))))
+                        add_to_rollups(rollups, segment, event)
+                        offset += len(line)
+            self._save_rollups(rollups)
+        return rollups
+
+    def migrate(self, logs=LEGACY_LOGS, remove: bool = False) -> int:
+        """Import the old one-file-per-event logs; already imported files are skipped."""
+        done_path = self.root / "migrated.txt"
+        try:
+            done = set(done_path.read_text().split("\n"))
+        except OSError:
+            done = set()
+        files = sorted(pathlib.Path(logs).glob("*.json"), key=lambda p: p.stat().st_mtime)
+        imported = []
+        with self.locked():
+            rollups = self.rollups()
+            for path in files:
+                if path.name in done:
+                    continue
+                try:
+                    event = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                event.setdefault("action", "unknown")
+                event.setdefault("content", "")
+                event["legacy_time"] = event.pop("time", None)
+                event["ts"] = path.stat().st_mtime
+                event["time"] = datetime.fromtimestamp(event["ts"]).isoformat(timespec="seconds")
+                event["migrated_from"] = path.name
+                self._write(event, rollups)
+                imported.append(path)
+            self._save_rollups(rollups)
+            with open(done_path, "a") as out:
+                out.writelines(f"{p.name}\n" for p in imported)
+        if remove:
+            for path in imported:
+                path.unlink(missing_ok=True)
+        return len(imported)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Autonomy event store")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("append", help="Store one event")
+    p.add_argument("--action", required=True)
+    p.add_argument("--content", default="")
+    p.add_argument("--subsystem")
+    p.add_argument("--decision")
+    sub.add_parser("count", help="Print the total number of events")
+    sub.add_parser("rollups", help="Print rollups as JSON")
+    p = sub.add_parser("list", help="List the newest events")
+    p.add_argument("--limit", type=int, default=50)
+    p = sub.add_parser("show", help="Print one event as JSON")
+    p.add_argument("id")
+    p = sub.add_parser("migrate", help="Import ~/.autonomy/logs/*.json")
+    p.add_argument("--logs", default=str(LEGACY_LOGS))
+    p.add_argument("--remove", action="store_true", help="Delete files once imported")
+    sub.add_parser("rebuild", help="Regenerate indexes and rollups")
+    args = parser.parse_args()
+
+    store = EventStore()
+    if args.cmd == "append":
+        print(store.append(args.action, args.content, subsystem=args.subsystem, decision=args.decision))
+    elif args.cmd == "count":
+        print(store.rollups()["total"])
+    elif args.cmd == "rollups":
+        print(json.dumps(store.rollups(), indent=2, sort_keys=True))
+    elif args.cmd == "list":
+        for event_id, event in store.recent(args.limit):
+            content = event.get("content", "").replace("\n", " ")[:60]
+            print(f"{event_id:22} {event.get('time', '')}  {event.get('action', '')}: {content}")
+    elif args.cmd == "show":
+        try:
+            print(json.dumps(store.read(args.id), ensure_ascii=False))
+        except (OSError, KeyError, ValueError):
+            print(f"No such event: {args.id}", file=sys.stderr)
+            return 1
+    elif args.cmd == "migrate":
+        print(f"Imported {store.migrate(args.logs, args.remove)} event(s)")
+    elif args.cmd == "rebuild":
+        print(f"Indexed {store.rebuild()['total']} event(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,38 +4,24 @@ set -e
 POLICY="$HOME/.autonomy/policy.conf"
 CMD="$*"
 
-# Read policy safely
-DENY_PATTERNS=()
-ALLOW_PREFIXES=()
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
 
-while IFS='=' read -r key value; do
-  case "$key" in
-    DENY)  DENY_PATTERNS+=("$value") ;;
-    ALLOW) ALLOW_PREFIXES+=("$value") ;;
-  esac
-done < <(grep -E '^(DENY|ALLOW)=' "$POLICY")
+# DENY substrings and ALLOW prefixes are matched in one pass by the
+# compiled policy (cached beside policy.conf, rebuilt when it changes).
+VERDICT=$(python3 "$LIB_DIR/policy_engine.py" --policy "$POLICY" check -- "$CMD" || true)
+RULE="${VERDICT#*$'\t'}"
 
-# Enforce deny rules
-for pat in "${DENY_PATTERNS[@]}"; do
-  if echo "$CMD" | grep -Fq "$pat"; then
-    echo "❌ DENIED by policy: $pat"
+case "${VERDICT%%$'\t'*}" in
+  allow) ;;
+  deny)
+    echo "❌ DENIED by policy: $RULE"
     exit 1
-  fi
-done
-
-# Enforce allow rules
-ALLOWED=false
-for pre in "${ALLOW_PREFIXES[@]}"; do
-  if [[ "$CMD" == "$pre"* ]]; then
-    ALLOWED=true
-    break
-  fi
-done
-
-if [ "$ALLOWED" != true ]; then
-  echo "❌ Command not in allowlist"
-  exit 1
-fi
+    ;;
+  *)
+    echo "❌ Command not in allowlist"
+    exit 1
+    ;;
+esac
 
 echo "✅ Policy check passed"
 bash -c "$CMD"
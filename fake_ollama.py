@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Local stand-in for an Ollama server, for offline tests and benchmarks.
+
+Serves /api/generate (streamed or not), /api/tags and /api/ps with
+simulated timing: a prompt-eval delay, a token rate, a cold-load penalty
+the first time a model is used or after its keep_alive expires, and
+optional failure injection. Replies are filler text, except that operator
+prompts ("Next step ...") get a harmless shell command so ask-operator.sh
+can run end to end. The subcommands mirror the ollama CLI, so a script
+named `ollama` that execs this file works as an `ollama run` shim:
+
+  fake_ollama.py serve [--tps 50 --cold-load 2 --fail-rate 0.1 ...]
+  fake_ollama.py run MODEL [PROMPT]      prompt from stdin when omitted
+  fake_ollama.py ps
+
+The address comes from $OLLAMA_HOST (default 127.0.0.1:11434), as for ollama.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ollama_client
+
+DEFAULT_KEEP_ALIVE = 300.0
+MODEL_SIZE = 4 * 1024 ** 3
+FILLER = ("the service restarted cleanly after the configuration reload and "
+          "no further errors were reported by the kernel or systemd units").split()
+OPERATOR_MARKER = "Next step (ONE command only or DONE)"
+OPERATOR_COMMAND = "echo bench-step"
+
+
+def parse_keep_alive(value, default=DEFAULT_KEEP_ALIVE):
+    """Seconds from an Ollama keep_alive ("10m", "30s", 300, -1 = forever)."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return default
+    seconds = float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class Simulator:
+    """Model residency and timing shared by all request threads."""
+
+    def __init__(self, prompt_delay=0.0, prompt_tps=0.0, tps=50.0, tokens=40, cold_load=0.0,
+                 fail_rate=0.0, drop_rate=0.0, seed=None, keep_alive=DEFAULT_KEEP_ALIVE):
+        self.prompt_delay = prompt_delay
+        self.prompt_tps = prompt_tps
+        self.tps = tps
+        self.tokens = tokens
+        self.cold_load = cold_load
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.keep_alive = keep_alive
+        self.rng = random.Random(seed)
+        self.loaded = {}  # model -> expiry (time.time())
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "cold_loads": 0, "failures": 0, "drops": 0}
+
+    def load(self, model, keep_alive) -> float:
+        """Seconds spent loading model (0 when resident); renews its expiry."""
+        now = time.time()
+        with self.lock:
+            self.counts["requests"] += 1
+            cold = self.loaded.get(model, 0) <= now
+            if cold:
+                self.counts["cold_loads"] += 1
+            ttl = parse_keep_alive(keep_alive, self.keep_alive)
+            if ttl == 0:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded[model] = now + ttl
+        return self.cold_load if cold else 0.0
+
+    def roll(self, rate, counter) -> bool:
+        with self.lock:
+            hit = rate > 0 and self.rng.random() < rate
+            if hit:
+                self.counts[counter] += 1
+        return hit
+
+    def reply_tokens(self, prompt, limit=None) -> list:
+        count = self.tokens if not limit or limit < 0 else min(self.tokens, limit)
+        words = [FILLER[i % len(FILLER)] + " " for i in range(max(count, 1))]
+        if OPERATOR_MARKER in prompt:
+            return [OPERATOR_COMMAND, "\n", *words]
+        return words
+
+    def resident(self) -> list:
+        now = time.time()
+        with self.lock:
+            return [(m, exp) for m, exp in self.loaded.items() if exp > now]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    sim: Simulator = None
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/api/tags":
+            models = sorted({m for m, _ in self.sim.resident()})
+            self.send_json(200, {"models": [{"name": m, "model": m, "size": MODEL_SIZE} for m in models]})
+        elif path == "/api/ps":
+            models = []
+            for model, expiry in self.sim.resident():
+                expires = (datetime.fromtimestamp(min(expiry, 4102444800), timezone.utc)
+                           .isoformat(timespec="seconds"))
+                models.append({"name": model, "model": model, "size": MODEL_SIZE,
+                               "size_vram": MODEL_SIZE, "expires_at": expires})
+            self.send_json(200, {"models": models})
+        elif path in ("/", "/api/version"):
+            self.send_json(200, {"version": "0.0.0-fake"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urllib.parse.urlsplit(self.path).path != "/api/generate":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            model = req["model"]
+        except (ValueError, KeyError) as exc:
+            self.send_json(400, {"error": f"bad request: {exc}"})
+            return
+        sim = self.sim
+        if sim.roll(sim.fail_rate, "failures"):
+            self.send_json(500, {"error": "injected failure"})
+            return
+
+        started = time.monotonic()
+        prompt = req.get("prompt", "")
+        load_s = sim.load(model, req.get("keep_alive"))
+        if not prompt:  # an empty prompt only loads (or unloads) the model
+            time.sleep(load_s)
+            self.send_json(200, {"model": model, "response": "", "done": True,
+                                 "done_reason": "load", "load_duration": int(load_s * 1e9)})
+            return
+        prompt_tokens = max(len(prompt) // 4, 1)
+        prompt_s = sim.prompt_delay + (prompt_tokens / sim.prompt_tps if sim.prompt_tps > 0 else 0)
+        time.sleep(load_s + prompt_s)
+
+        tokens = sim.reply_tokens(prompt, (req.get("options") or {}).get("num_predict"))
+        per_token = 1 / sim.tps if sim.tps > 0 else 0
+        drop_at = len(tokens) // 2 if sim.roll(sim.drop_rate, "drops") else None
+
+        def final():
+            total = time.monotonic() - started
+            return {"model": model, "response": "", "done": True, "done_reason": "stop",
+                    "total_duration": int(total * 1e9), "load_duration": int(load_s * 1e9),
+                    "prompt_eval_count": prompt_tokens, "prompt_eval_duration": int(prompt_s * 1e9),
+                    "eval_count": len(tokens), "eval_duration": int(len(tokens) * per_token * 1e9)}
+
+        if not req.get("stream", True):
+            time.sleep(per_token * len(tokens))
+            if drop_at is not None:
+                self.close_connection = True
+                return
+            self.send_json(200, dict(final(), response="".join(tokens)))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(tokens):
+                if i == drop_at:
+                    self.close_connection = True
+                    return
+                time.sleep(per_token)
+                self.write_chunk({"model": model, "response": token, "done": False})
+            self.write_chunk(final())
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, sim: Simulator):
+        handler = type("BoundHandler", (Handler,), {"sim": sim})
+        super().__init__(address, handler)
+        self.sim = sim
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(sim: Simulator = None, host="127.0.0.1", port=0) -> FakeServer:
+    """Serve in a background thread; port 0 picks a free one (see .url)."""
+    server = FakeServer((host, port), sim or Simulator())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def host_port():
+    host = os.environ.get("OLLAMA_HOST", "").strip() or "127.0.0.1:11434"
+    parsed = urllib.parse.urlsplit(host if "://" in host else "http://" + host)
+    return parsed.hostname or "127.0.0.1", parsed.port or 11434
+
+
+# ---------------- CLI ----------------
+def cmd_run(args) -> int:
+    prompt = " ".join(args.prompt) if args.prompt else sys.stdin.read()
+
+    def on_token(token):
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    # Straight to $OLLAMA_HOST, like ollama run; never through the endpoint pool.
+    result = ollama_client.get_client(ollama_client.local_api()).generate(
+        args.model, prompt, stream=True, on_token=on_token, keep_alive=args.keepalive)
+    if result.response and not result.response.endswith("\n"):
+        print()
+    if result.error:
+        print(f"Error: {result.error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_ps(_args) -> int:
+    import urllib.request
+
+    host, port = host_port()
+    with urllib.request.urlopen(f"http://{host}:{port}/api/ps", timeout=5) as resp:
+        models = json.load(resp).get("models", [])
+    print(f"{'NAME':32} UNTIL")
+    for model in models:
+        print(f"{model['name']:32} {model.get('expires_at', '')}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fake Ollama server and `ollama run` shim")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="Serve the fake API on $OLLAMA_HOST")
+    p.add_argument("--prompt-delay", type=float, default=0.0, help="Fixed prompt-eval seconds")
+    p.add_argument("--prompt-tps", type=float, default=0.0,
+                   help="Prompt-eval tokens/s on top of the fixed delay (0 = off)")
+    p.add_argument("--tps", type=float, default=50.0, help="Generated tokens per second")
+    p.add_argument("--tokens", type=int, default=40, help="Tokens per reply")
+    p.add_argument("--cold-load", type=float, default=0.0, help="Seconds to load a model that is not resident")
+    p.add_argument("--keep-alive", default=str(int(DEFAULT_KEEP_ALIVE)), help="Default residency (e.g. 5m)")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    p.add_argument("--drop-rate", type=float, default=0.0, help="Share of replies cut off mid-way")
+    p.add_argument("--seed", type=int)
+    p = sub.add_parser("run", help="Like `ollama run MODEL [PROMPT]`")
+    p.add_argument("model")
+    p.add_argument("prompt", nargs="*")
+    p.add_argument("--keepalive")
+    sub.add_parser("ps", help="List resident models")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "run":
+        return cmd_run(args)
+    if args.cmd == "ps":
+        return cmd_ps(args)
+
+    sim = Simulator(args.prompt_delay, args.prompt_tps, args.tps, args.tokens, args.cold_load,
+                    args.fail_rate, args.drop_rate, args.seed, parse_keep_alive(args.keep_alive))
+    server = FakeServer(host_port(), sim)
+    print(f"fake ollama listening on {server.url}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,7 @@
 #!/usr/bin/env bash
-LOGS=$(ls ~/.autonomy/logs 2>/dev/null | wc -l)
+LIB_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+# Precomputed total from the event store rollups; no directory scan.
+LOGS=$(python3 "$LIB_DIR/event_store.py" count 2>/dev/null || echo 0)
 if [ "$LOGS" -gt 20 ]; then
   rm -f ~/.autonomy/enabled
   systemctl --user stop autonomy.service
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Autonomy health state from ~/.autonomy/health.json.
+
+The one place that maps a health report to green/yellow/red, shared by the
+tray (in-process) and autonomy-health-state.sh / autonomy-health-summary.sh:
+
+  health_state.py state      prints green|yellow|red|unknown
+  health_state.py summary    prints the one-line tooltip text
+  health_state.py trends     per-check latency over recent self-test runs
+"""
+import argparse
+import json
+import os
+import pathlib
+import time
+from datetime import datetime
+
+HEALTH = pathlib.Path.home() / ".autonomy" / "health.json"
+HISTORY = HEALTH.with_name("health-history.jsonl")
+HISTORY_MAX = int(os.environ.get("AUTONOMY_HEALTH_HISTORY", "200"))
+# Up to this many failed checks is yellow; more is red.
+YELLOW_MAX_FAILURES = int(os.environ.get("AUTONOMY_HEALTH_YELLOW_MAX", "3"))
+
+
+def read_health(path=HEALTH):
+    """The report as a dict, or None if missing or unreadable."""
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Reports captured with the human-readable self-test output in front
+    # still end with the JSON line.
+    for line in reversed(text.splitlines()):
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    return None
+
+
+def failures(health):
+    value = (health or {}).get("failures")
+    return value if isinstance(value, int) else None
+
+
+def state(health) -> str:
+    if health is None:
+        return "unknown"
+    count = failures(health) or 0
+    if count == 0:
+        return "green"
+    return "yellow" if count <= YELLOW_MAX_FAILURES else "red"
+
+
+def summary(health, mtime=None) -> str:
+    if health is None:
+        return "No health data yet"
+    count = failures(health)
+    status = "HEALTHY" if count == 0 else f"ISSUES ({'?' if count is None else count})"
+    when = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S") if mtime else "?"
+    text = f"Autonomy: {status} | Last check: {when}"
+    if health.get("partial"):
+        text += " (running)"
+    elif isinstance(health.get("total_s"), (int, float)):
+        text += f" in {health['total_s']:.1f}s"
+    return text
+
+
+# ---------------- Latency history ----------------
+def record_history(health, path=HISTORY) -> None:
+    """Append one finished self-test run; keeps the newest HISTORY_MAX runs."""
+    entry = {
+        "ts": time.time(),
+        "failures": health.get("failures"),
+        "total_s": health.get("total_s"),
+        "durations": {r["key"]: r["duration_s"] for r in health.get("results", []) if "key" in r},
+        "failed": [r["key"] for r in health.get("results", []) if r.get("status") == "fail" and "key" in r],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        f.write(json.dumps(entry) + "\n")
+    lines = path.read_text().splitlines()
+    # Trim rarely: only once the file holds twice the limit.
+    if len(lines) > 2 * HISTORY_MAX:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text("\n".join(lines[-HISTORY_MAX:]) + "\n")
+        os.replace(tmp, path)
+
+
+def read_history(limit=20, path=HISTORY) -> list:
+    try:
+        lines = path.read_text().splitlines()[-limit:]
+    except OSError:
+        return []
+    runs = []
+    for line in lines:
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+    return runs
+
+
+def latency_trends(limit=20, path=HISTORY) -> dict:
+    """{check: {runs, last, avg, max, failures}} over the last `limit` runs, "total" included."""
+    trends = {}
+    for run in read_history(limit, path):
+        samples = dict(run.get("durations", {}))
+        if run.get("total_s") is not None:
+            samples["total"] = run["total_s"]
+        for key, seconds in samples.items():
+            t = trends.setdefault(key, {"runs": 0, "sum": 0.0, "max": 0.0, "failures": 0})
+            t["runs"] += 1
+            t["sum"] += seconds
+            t["max"] = max(t["max"], seconds)
+            t["last"] = seconds
+        for key in run.get("failed", []):
+            if key in trends:
+                trends[key]["failures"] += 1
+    for t in trends.values():
+        t["avg"] = round(t.pop("sum") / t["runs"], 3)
+    return trends
+
+
+def format_trends(trends, top=None) -> list:
+    """Lines for the slowest checks by average, "total" first."""
+    keys = sorted((k for k in trends if k != "total"), key=lambda k: -trends[k]["avg"])
+    if "total" in trends:
+        keys.insert(0, "total")
+    lines = []
+    for key in keys[:top]:
+        t = trends[key]
+        trend = "↑" if t["last"] > 1.5 * t["avg"] else "↓" if t["last"] < t["avg"] / 1.5 else "="
+        line = f"{key:14} last {t['last']:6.2f}s  avg {t['avg']:6.2f}s  max {t['max']:6.2f}s  {trend}"
+        if t["failures"]:
+            line += f"  failed {t['failures']}/{t['runs']}"
+        lines.append(line)
+    return lines
+
+
+class HealthMonitor:
+    """Re-reads health.json only when its stat changes."""
+
+    def __init__(self, path=HEALTH):
+        self.path = path
+        self.stamp = False  # never matches a real stamp, so the first check reads
+        self.current = None
+
+    def check(self):
+        """(state, summary, changed) where changed means either differs from before."""
+        try:
+            st = self.path.stat()
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            st, stamp = None, None
+        if stamp == self.stamp:
+            return (*self.current, False)
+        self.stamp = stamp
+        health = read_health(self.path) if st else None
+        result = (state(health), summary(health, st.st_mtime if st else None))
+        changed = result != self.current
+        self.current = result
+        return (*result, changed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report autonomy health")
+    parser.add_argument("what", choices=("state", "summary", "trends"))
+    parser.add_argument("--file", default=str(HEALTH), help="Health report")
+    parser.add_argument("--runs", type=int, default=20, help="Runs to include in trends")
+    args = parser.parse_args()
+
+    if args.what == "trends":
+        lines = format_trends(latency_trends(args.runs))
+        print("\n".join(lines) if lines else "No self-test history yet")
+        return 0
+
+    state_now, text, _ = HealthMonitor(pathlib.Path(args.file)).check()
+    print(state_now if args.what == "state" else text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
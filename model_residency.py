@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Which models are loaded, which should be, and warming them up.
+
+The residency plan lives in ~/.autonomy/residency.json:
+
+  {"plan": [{"model": "PopPooB-Linux:latest", "days": "mon-fri",
+             "hours": "08:00-19:00", "keep_alive": "30m"}],
+   "bursts": {"review": ["PopPooB-Linux:latest"]}}
+
+Inside a plan window every request for that model carries the window's
+keep_alive (ollama_client asks keep_alive_for), and maintain() loads the
+model again if it was evicted anyway. Outside it the server default
+applies. bursts lists the models to load before a scheduler action, so
+the load overlaps the debounce and the tool start-up instead of the first
+phase. Without the file nothing is planned or warmed; RESIDENCY=0 turns
+planning and warm-ups off even with it. The autonomy scheduler runs maintain()
+every observe interval; without it, run `model_residency.py maintain`
+from a timer.
+
+Cold hits show up in telemetry: a span whose load time is over
+TELEMETRY_COLD_S is marked cold.
+
+  model_residency.py status               resident models, plan and cold-hit rate
+  model_residency.py warmup [MODEL ...]   load now (default: models planned for now)
+  model_residency.py maintain             warm every model whose window is open
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+import ollama_client
+import telemetry
+
+CONFIG = pathlib.Path.home() / ".autonomy" / "residency.json"
+ENABLED = os.environ.get("RESIDENCY", "1") != "0"
+PS_TIMEOUT = 2
+WARMUP_TIMEOUT = float(os.environ.get("RESIDENCY_WARMUP_TIMEOUT", "300"))
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+# Nothing is kept resident unless residency.json asks for it.
+DEFAULT_CONFIG = {"plan": [], "bursts": {}}
+
+
+# ---------------- Plan ----------------
+_config = {"key": None, "value": DEFAULT_CONFIG}
+
+
+def model_name(model: str) -> str:
+    return model if ":" in model else model + ":latest"
+
+
+def load_config(path=CONFIG) -> dict:
+    """The residency config, re-read only when the file changes."""
+    try:
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if key != _config["key"]:
+        value = DEFAULT_CONFIG
+        if key is not None:
+            try:
+                value = dict(DEFAULT_CONFIG, **json.loads(path.read_text()))
+            except (OSError, ValueError) as exc:
+                print(f"model_residency: ignoring {path}: {exc}", file=sys.stderr)
+        _config.update(key=key, value=value)
+    return _config["value"]
+
+
+def parse_days(text) -> set:
+    """Weekday numbers from "mon-fri", "sat,sun" or "*"."""
+    text = (text or "*").strip().lower()
+    if text in ("*", "all", "daily"):
+        return set(range(7))
+    days = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        start = DAYS.index(first[:3])
+        end = DAYS.index(last[:3]) if last else start
+        days.update(d % 7 for d in range(start, start + (end - start) % 7 + 1))
+    return days
+
+
+def parse_hours(text):
+    """(start, end) minutes of the day from "08:00-19:00"; end may wrap past midnight."""
+    match = re.fullmatch(r"(\d{1,2})(?::(\d\d))?-(\d{1,2})(?::(\d\d))?", (text or "00:00-24:00").strip())
+    if not match:
+        raise ValueError(f"bad hours: {text}")
+    h1, m1, h2, m2 = match.groups()
+    return int(h1) * 60 + int(m1 or 0), int(h2) * 60 + int(m2 or 0)
+
+
+def in_window(entry: dict, now=None) -> bool:
+    now = now or datetime.now()
+    try:
+        start, end = parse_hours(entry.get("hours"))
+        days = parse_days(entry.get("days"))
+    except ValueError:
+        return False
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return now.weekday() in days and start <= minute < end
+    # Overnight window: the part after midnight belongs to the previous day.
+    if minute >= start:
+        return now.weekday() in days
+    return minute < end and (now.weekday() - 1) % 7 in days
+
+
+def active_plan(now=None) -> list:
+    if not ENABLED:
+        return []
+    return [e for e in load_config().get("plan", []) if e.get("model") and in_window(e, now)]
+
+
+def keep_alive_for(model, now=None):
+    """keep_alive for a request to model: its open window's, else None (server default)."""
+    name = model_name(model)
+    for entry in active_plan(now):
+        if model_name(entry["model"]) == name:
+            return entry.get("keep_alive", "30m")
+    return None
+
+
+# ---------------- Residency ----------------
+def base_urls(api=None) -> list:
+    """Server base URLs behind api: every pool endpoint, or the one host."""
+    if ollama_client.pooled(api):
+        import endpoint_pool
+        pool = endpoint_pool.get_pool()
+        if pool is not None:
+            return [e.url for e in pool.endpoints]
+    parsed = urllib.parse.urlsplit(api or ollama_client.DEFAULT_API)
+    return [f"{parsed.scheme}://{parsed.netloc}"]
+
+
+def resident(api=None) -> dict:
+    """{model: [(base_url, expires_at), ...]} from /api/ps on every server behind api."""
+    loaded = {}
+    for url in base_urls(api):
+        try:
+            with urllib.request.urlopen(url + "/api/ps", timeout=PS_TIMEOUT) as resp:
+                models = json.load(resp).get("models", [])
+        except (OSError, ValueError):
+            continue
+        for m in models:
+            loaded.setdefault(model_name(m.get("name", "?")), []).append((url, m.get("expires_at")))
+    return loaded
+
+
+def warmup(model, api=None, keep_alive=None, force=False, caller="warmup"):
+    """Load model with an empty prompt unless it is already resident.
+
+    Returns the GenerateResult, or None when nothing had to be done.
+    """
+    model = model_name(model)
+    if not force and model in resident(api):
+        return None
+    if keep_alive is None:
+        keep_alive = keep_alive_for(model)
+    return ollama_client.generate(model, "", api=api, keep_alive=keep_alive,
+                                  timeout=WARMUP_TIMEOUT, caller=caller)
+
+
+_warming = set()
+_warming_lock = threading.Lock()
+
+
+def warmup_async(models, api=None, caller="warmup") -> list:
+    """Warm models in background threads; a model already warming here is skipped."""
+    threads = []
+    if not ENABLED:
+        return threads
+
+    def run(model):
+        try:
+            warmup(model, api, caller=caller)
+        finally:
+            with _warming_lock:
+                _warming.discard(model)
+
+    for model in dict.fromkeys(model_name(m) for m in models):
+        with _warming_lock:
+            if model in _warming:
+                continue
+            _warming.add(model)
+        thread = threading.Thread(target=run, args=(model,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def prewarm(action, api=None) -> list:
+    """Start warming the models configured for a burst (e.g. "review")."""
+    return warmup_async(load_config().get("bursts", {}).get(action, []), api, caller=f"warmup:{action}")
+
+
+def maintain(api=None, now=None) -> list:
+    """Warm each model whose plan window is open; returns the models warmed."""
+    warmed = []
+    for entry in active_plan(now):
+        result = warmup(entry["model"], api, entry.get("keep_alive"))
+        if result is not None:
+            warmed.append((entry["model"], result))
+    return warmed
+
+
+# ---------------- CLI ----------------
+def cold_rates(since):
+    """{model: (cold calls, model calls)} excluding warm-ups and cache hits."""
+    rates = {}
+    for span in telemetry.iter_spans(since):
+        if span.get("cache") == "hit" or str(span.get("caller", "")).startswith("warmup"):
+            continue
+        cold, total = rates.get(span.get("model") or "?", (0, 0))
+        rates[span.get("model") or "?"] = (cold + bool(span.get("cold")), total + 1)
+    return rates
+
+
+def print_status(api) -> None:
+    loaded = resident(api)
+    config = load_config()
+    rates = cold_rates(time.time() - 86400)
+    planned = {model_name(e["model"]) for e in config.get("plan", []) if e.get("model")}
+    print(f"{'MODEL':32} {'RESIDENT':9} {'PLAN':6} {'COLD 24h':>10}  UNTIL")
+    for model in sorted(set(loaded) | planned | set(rates)):
+        cold, total = rates.get(model, (0, 0))
+        cold_text = f"{cold}/{total}" if total else "-"
+        window = "open" if keep_alive_for(model) else ("closed" if model in planned else "-")
+        until = ", ".join(f"{url.split('://')[-1]} {exp or '?'}" for url, exp in loaded.get(model, []))
+        print(f"{model[:32]:32} {'yes' if model in loaded else 'no':9} {window:6} {cold_text:>10}  {until or '-'}")
+    for entry in config.get("plan", []):
+        print(f"plan: {entry.get('model')} {entry.get('days', '*')} {entry.get('hours', 'all day')} "
+              f"keep_alive={entry.get('keep_alive', '30m')}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ollama model residency and warm-up")
+    parser.add_argument("--api", default=os.environ.get("ASK_API") or ollama_client.DEFAULT_API,
+                        help="Generate endpoint (default: $ASK_API or the ask default; pooled when configured)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status", help="Resident models, plan windows and cold-hit rate")
+    p = sub.add_parser("warmup", help="Load models now")
+    p.add_argument("models", nargs="*", help="Default: the models planned for now")
+    p.add_argument("--keep-alive", help="Override the plan's keep_alive (e.g. 1h, -1)")
+    p.add_argument("--force", action="store_true", help="Send the load even if already resident")
+    sub.add_parser("maintain", help="Warm every model whose plan window is open")
+    args = parser.parse_args()
+
+    if args.cmd == "status":
+        print_status(args.api)
+        return 0
+    if args.cmd == "maintain":
+        for model, result in maintain(args.api):
+            print(f"{model}: {result.error or f'loaded in {result.duration_s:.2f}s'}")
+        return 0
+    keep_alive = args.keep_alive
+    if keep_alive and re.fullmatch(r"-?\d+", keep_alive):
+        keep_alive = int(keep_alive)  # Ollama reads a bare number as seconds
+    models = args.models or [e["model"] for e in active_plan()]
+    if not models:
+        print("Nothing planned for now; name a model.", file=sys.stderr)
+        return 1
+    failed = 0
+    for model in models:
+        result = warmup(model, args.api, keep_alive, args.force)
+        if result is None:
+            print(f"{model}: already resident")
+        elif result.error:
+            failed += 1
+            print(f"{model}: {result.error}", file=sys.stderr)
+        else:
+            print(f"{model}: loaded in {result.duration_s:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""System observer for the autonomy loop.
+
+Reads memory from /proc/meminfo and disk usage from statvfs, follows the
+journal's error entries from a saved cursor so each run only handles new
+ones, and writes ~/.autonomy/observer.json atomically with the deltas since
+the previous snapshot. Failed units need systemctl, so they are refreshed at
+most every OBSERVER_UNITS_EVERY seconds and reused from state in between.
+
+  observer.py                     one snapshot
+  observer.py --daemon            snapshot every --interval seconds
+  observer.py --print             show the current snapshot (no refresh)
+
+Other tools read the snapshot with observer.read_snapshot().
+"""
+import argparse
+import collections
+import json
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+AUTON = pathlib.Path.home() / ".autonomy"
+OUT = AUTON / "observer.json"
+STATE = AUTON / "observer-state.json"
+INTERVAL = float(os.environ.get("OBSERVER_INTERVAL", "60"))
+UNITS_EVERY = float(os.environ.get("OBSERVER_UNITS_EVERY", "60"))
+RECENT_ERRORS = 20
+MAX_NEW_ENTRIES = 1000
+
+
+# ---------------- Readers ----------------
+def read_meminfo() -> dict:
+    values = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("MemTotal", "MemAvailable", "SwapTotal", "SwapFree"):
+                values[name] = int(rest.split()[0]) * 1024
+    total = values.get("MemTotal", 0)
+    available = values.get("MemAvailable", 0)
+    return {
+        "total": total,
+        "available": available,
+        "used_pct": round(100 * (total - available) / total, 1) if total else None,
+        "swap_total": values.get("SwapTotal", 0),
+        "swap_used": values.get("SwapTotal", 0) - values.get("SwapFree", 0),
+    }
+
+
+def read_disk(path="/") -> dict:
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = total - st.f_bfree * st.f_frsize
+    return {
+        "path": path,
+        "total": total,
+        "free": free,
+        "used_pct": round(100 * used / (used + free), 1) if used + free else None,
+    }
+
+
+def human(size) -> str:
+    for unit in ("B", "K", "M", "G", "T"):
+        if abs(size) < 1024 or unit == "T":
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size}B"
+        size /= 1024
+
+
+PRIORITIES = ["emerg", "alert", "crit", "err", "warning", "notice", "info", "debug"]
+
+
+def priority_levels(priority) -> list:
+    """Levels selected by a journalctl -p value: "err", "3" or a range "err..crit".
+
+    Raises ValueError for anything else.
+    """
+    def level(name):
+        name = str(name).strip().lower()
+        return int(name) if name.isdigit() and int(name) < len(PRIORITIES) else PRIORITIES.index(name)
+
+    first, dots, last = str(priority).partition("..")
+    if not dots:
+        return list(range(level(first) + 1))
+    low, high = level(first or 0), level(last or len(PRIORITIES) - 1)
+    return list(range(min(low, high), max(low, high) + 1))
+
+
+def _entry(ts, ident, message, cursor) -> dict:
+    if isinstance(message, list):  # journalctl -o json gives undecodable text as bytes
+        message = bytes(message).decode(errors="replace")
+    return {"ts": ts, "ident": ident or "?", "message": message, "cursor": cursor}
+
+
+def entry_line(entry: dict) -> str:
+    when = datetime.fromtimestamp(entry["ts"]).strftime("%b %d %H:%M:%S") if entry["ts"] else ""
+    return f"{when} {entry['ident']}: {entry['message']}".strip()
+
+
+def read_journal(cursor, priority="err", last=RECENT_ERRORS, max_new=MAX_NEW_ENTRIES, strict=False):
+    """(entries, cursor after them): entries since cursor, or the last few without one.
+
+    Entries are dicts with ts, ident, message and cursor. A journal that
+    cannot be read gives no entries, or OSError with strict.
+    """
+    try:
+        from systemd import journal
+        levels = priority_levels(priority)
+    except (ImportError, ValueError):
+        journal = None  # journalctl knows the priority syntax, or reports it
+
+    if journal is not None:
+        reader = journal.Reader()
+        for level in levels:
+            reader.add_match(PRIORITY=str(level))
+        raw = []
+        if cursor:
+            reader.seek_cursor(cursor)
+            reader.get_next()  # the entry at the cursor was handled last time
+            # Keep the newest max_new, as journalctl -n does.
+            raw = list(collections.deque(reader, maxlen=max_new))
+        else:
+            reader.seek_tail()
+            for _ in range(last):
+                entry = reader.get_previous()
+                if not entry:
+                    break
+                raw.insert(0, entry)
+        entries = [
+            _entry(e["__REALTIME_TIMESTAMP"].timestamp() if "__REALTIME_TIMESTAMP" in e else None,
+                   e.get("SYSLOG_IDENTIFIER") or e.get("_SYSTEMD_UNIT"), e.get("MESSAGE", ""),
+                   e.get("__CURSOR"))
+            for e in raw
+        ]
+    else:
+        cmd = ["journalctl", "-p", str(priority), "-o", "json", "--no-pager"]
+        cmd += ["--after-cursor", cursor, "-n", str(max_new)] if cursor else ["-n", str(last)]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            if strict:
+                raise OSError(f"journalctl failed: {exc}") from exc
+            return [], cursor
+        if proc.returncode != 0 and strict:
+            raise OSError(f"journalctl failed: {proc.stderr.strip() or f'exit status {proc.returncode}'}")
+        out = proc.stdout
+        entries = []
+        for line in out.splitlines():
+            try:
+                e = json.loads(line)
+            except ValueError:
+                continue
+            stamp = e.get("__REALTIME_TIMESTAMP")
+            entries.append(_entry(int(stamp) / 1e6 if stamp else None,
+                                  e.get("SYSLOG_IDENTIFIER") or e.get("_SYSTEMD_UNIT"),
+                                  e.get("MESSAGE", ""), e.get("__CURSOR")))
+    if entries and entries[-1]["cursor"]:
+        cursor = entries[-1]["cursor"]
+    return entries, cursor
+
+
+def read_journal_errors(cursor):
+    """(new error lines, cursor after them) since cursor, or the last few on first run."""
+    entries, cursor = read_journal(cursor, "err")
+    return [entry_line(e) for e in entries], cursor
+
+
+def read_failed_units():
+    """(unit names, the full `systemctl --failed` text observer.sh stored)."""
+    try:
+        out = subprocess.run(
+            ["systemctl", "--failed", "--no-pager"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return [], ""
+    units = []
+    for line in out.splitlines():
+        if not line.strip():
+            break  # the legend follows the table after a blank line
+        fields = line.lstrip("●*× ").split()
+        if fields and fields[0] != "UNIT":
+            units.append(fields[0])
+    return units, out.rstrip("\n")
+
+
+# ---------------- Snapshots ----------------
+def load_json(path, default):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return default
+
+
+def write_atomic(path, data) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def read_snapshot(max_age=None):
+    """Latest snapshot, or None if missing or older than max_age seconds."""
+    snap = load_json(OUT, None)
+    if snap is None or (max_age is not None and time.time() - snap.get("ts", 0) > max_age):
+        return None
+    return snap
+
+
+def observe() -> dict:
+    started = time.perf_counter()
+    AUTON.mkdir(parents=True, exist_ok=True)
+    state = load_json(STATE, {})
+    prev = load_json(OUT, {})
+    now = time.time()
+
+    memory = read_meminfo()
+    disk = read_disk("/")
+    new_errors, cursor = read_journal_errors(state.get("cursor"))
+    recent = (state.get("recent_errors", []) + new_errors)[-RECENT_ERRORS:]
+    if now - state.get("units_checked", 0) >= UNITS_EVERY:
+        failed, failed_text = read_failed_units()
+        state["units_checked"] = now
+    else:
+        failed = state.get("failed_units", [])
+        failed_text = state.get("failed_services", "\n".join(failed))
+
+    prev_failed = set(prev.get("failed_units", []))
+    deltas = {
+        "interval_s": round(now - prev["ts"], 1) if "ts" in prev else None,
+        "new_errors": len(new_errors),
+        "mem_available": memory["available"] - prev["memory"]["available"] if "memory" in prev else None,
+        "disk_free": disk["free"] - prev["disk_usage"]["free"] if "disk_usage" in prev else None,
+        "units_failed": sorted(set(failed) - prev_failed),
+        "units_recovered": sorted(prev_failed - set(failed)),
+    }
+
+    snap = {
+        "ts": now,
+        "time": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+        # Text fields as the old observer.sh wrote them
+        "errors": "\n".join(recent),
+        "failed_services": failed_text,
+        "disk": f"{human(disk['total'])} total, {human(disk['free'])} free ({disk['used_pct']}% used) on /",
+        "mem": f"{human(memory['total'])} total, {human(memory['available'])} available ({memory['used_pct']}% used)",
+        "memory": memory,
+        "disk_usage": disk,
+        "failed_units": failed,
+        "new_errors": new_errors,
+        "deltas": deltas,
+    }
+    snap["run_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    write_atomic(OUT, snap)
+    state.update(cursor=cursor, recent_errors=recent, failed_units=failed, failed_services=failed_text)
+    write_atomic(STATE, state)
+    return snap
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write ~/.autonomy/observer.json")
+    parser.add_argument("--daemon", action="store_true", help="Keep observing every --interval seconds")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="Seconds between snapshots")
+    parser.add_argument("--print", action="store_true", help="Print the current snapshot and exit")
+    args = parser.parse_args()
+
+    if args.print:
+        snap = read_snapshot()
+        if snap is None:
+            print("No snapshot yet.", file=sys.stderr)
+            return 1
+        print(json.dumps(snap, indent=2))
+        return 0
+
+    if not args.daemon:
+        observe()
+        return 0
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while True:
+            started = time.monotonic()
+            observe()
+            time.sleep(max(args.interval - (time.monotonic() - started), 1))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Persistent OCR worker.
+
+Keeps one tesseract engine per language set loaded (tesserocr when it is
+installed, otherwise the tesseract CLI fed through stdin/stdout) and answers
+requests carrying image bytes on a Unix socket ($XDG_RUNTIME_DIR/ocrd.sock,
+or OCRD_SOCKET). Results are cached by a hash of the decoded pixels, so
+capturing the same region again skips recognition. Large screenshots are
+downscaled first and can optionally be binarized (both need Pillow).
+
+ask-ocr and ask-ocr-float.py use it when it is running and recognize
+in-process when it is not.
+
+Start it once per session, e.g. from autostart:  ocr_worker.py --detach
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import pathlib
+import signal
+import socket
+import socketserver
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import response_cache
+
+DEFAULT_LANG = "chi_sim+eng"
+MAX_WIDTH = int(os.environ.get("OCR_MAX_WIDTH", "2000"))
+OCR_CACHE = response_cache.AUTON / "ocr-cache.sqlite3"
+CLI_TIMEOUT = 60
+
+
+# ---------------- Preprocessing ----------------
+def load_image(data: bytes):
+    """Pillow image for data, or None when Pillow is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def image_hash(data: bytes, image=None) -> str:
+    """Hash of the pixels when decodable, so re-encoded captures still match."""
+    digest = hashlib.sha256()
+    if image is not None:
+        digest.update(f"{image.mode}{image.size}".encode())
+        digest.update(image.tobytes())
+    else:
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def preprocess(image, max_width: int = MAX_WIDTH, binarize: bool = False):
+    image = image.convert("L")
+    if max_width and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height))
+    if binarize:
+        from PIL import ImageOps
+
+        image = ImageOps.autocontrast(image).point(lambda p: 255 if p > 128 else 0)
+    return image
+
+
+# ---------------- Engines ----------------
+class Engine:
+    """Loaded tesseract for one language set; calls are serialized."""
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.lock = threading.Lock()
+        self.api = None
+        try:
+            import tesserocr
+            self.api = tesserocr.PyTessBaseAPI(lang=lang)
+            self.name = "tesserocr"
+        except (ImportError, RuntimeError):
+            self.name = "tesseract-cli"
+
+    def recognize(self, data: bytes, image=None) -> str:
+        with self.lock:
+            if self.api is not None and image is not None:
+                self.api.SetImage(image)
+                return self.api.GetUTF8Text()
+        if image is not None:
+            buf = io.BytesIO()
+            image.save(buf, format="PNG")
+            data = buf.getvalue()
+        proc = subprocess.run(
+            ["tesseract", "stdin", "stdout", "-l", self.lang],
+            input=data, capture_output=True, timeout=CLI_TIMEOUT,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode(errors="replace").strip() or "tesseract failed")
+        return proc.stdout.decode(errors="replace")
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+
+
+class OcrWorker:
+    def __init__(self, use_cache: bool = True):
+        self.engines = {}
+        self.lock = threading.Lock()
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = response_cache.ResponseCache(OCR_CACHE, max_bytes=16 * 1024 * 1024)
+            except sqlite3.Error:
+                self.cache = None
+
+    def engine(self, lang: str) -> Engine:
+        with self.lock:
+            if lang not in self.engines:
+                self.engines[lang] = Engine(lang)
+            return self.engines[lang]
+
+    def recognize(self, data: bytes, lang: str = DEFAULT_LANG,
+                  max_width: int = MAX_WIDTH, binarize: bool = False) -> dict:
+        started = time.monotonic()
+        reply = {"text": "", "error": None, "cached": False, "engine": None, "ocr_s": 0.0}
+        try:
+            image = load_image(data)
+            key = response_cache.make_key(kind="ocr", lang=lang, max_width=max_width,
+                                          binarize=binarize, image=image_hash(data, image))
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                reply.update(text=cached, cached=True)
+            else:
+                if image is not None:
+                    image = preprocess(image, max_width, binarize)
+                engine = self.engine(lang)
+                reply["engine"] = engine.name
+                text = "\n".join(l for l in engine.recognize(data, image).splitlines() if l.strip())
+                reply["text"] = text
+                if self.cache:
+                    self.cache.put(key, text)
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired, sqlite3.Error) as exc:
+            reply["error"] = f"{exc.__class__.__name__}: {exc}"
+        reply["ocr_s"] = time.monotonic() - started
+        return reply
+
+
+# ---------------- Client ----------------
+def worker_socket() -> pathlib.Path:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = pathlib.Path(runtime) if runtime else pathlib.Path.home() / ".autonomy"
+    return pathlib.Path(os.environ.get("OCRD_SOCKET", base / "ocrd.sock"))
+
+
+def worker_recognize(data: bytes, **options):
+    """Recognize via the running worker; None means it is not running."""
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(0.25)
+        sock.connect(str(worker_socket()))
+    except OSError:
+        return None
+    with sock:
+        sock.settimeout(CLI_TIMEOUT + 10)
+        try:
+            header = {"op": "ocr", "size": len(data), **options}
+            sock.sendall((json.dumps(header) + "\n").encode() + data)
+            line = sock.makefile("r", encoding="utf-8").readline()
+            return json.loads(line) if line else {"text": "", "error": "ocrd closed the connection"}
+        except (OSError, ValueError) as exc:
+            return {"text": "", "error": f"ocrd: {exc}"}
+
+
+def recognize(data: bytes, use_worker: bool = True, **options) -> dict:
+    """OCR image bytes through the worker when available, else in-process."""
+    if use_worker and os.environ.get("OCR_WORKER") != "0":
+        reply = worker_recognize(data, **options)
+        if reply is not None:
+            return reply
+    return OcrWorker().recognize(data, **options)
+
+
+# ---------------- Service ----------------
+class OcrHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            req = json.loads(line)
+            data = self.rfile.read(int(req["size"]))
+            options = {k: req[k] for k in ("lang", "max_width", "binarize") if k in req}
+        except (ValueError, KeyError, TypeError) as exc:
+            self.send({"text": "", "error": f"bad request ({exc})"})
+            return
+        self.send(self.server.worker.recognize(data, **options))
+        self.server.served += 1
+
+    def send(self, msg):
+        self.wfile.write((json.dumps(msg) + "\n").encode())
+        self.wfile.flush()
+
+
+class OcrServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, worker):
+        self.worker = worker
+        self.served = 0
+        super().__init__(str(path), OcrHandler)
+
+
+def is_running(path) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve(path, preload) -> int:
+    if path.exists():
+        if is_running(path):
+            print(f"ocrd already running on {path}", file=sys.stderr)
+            return 1
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    worker = OcrWorker()
+    for lang in preload:
+        worker.engine(lang)
+    old_umask = os.umask(0o077)
+    try:
+        server = OcrServer(path, worker)
+    finally:
+        os.umask(old_umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"ocrd listening on {path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        for engine in worker.engines.values():
+            engine.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Persistent tesseract OCR worker")
+    parser.add_argument("image", nargs="?", help="Image file to recognize ('-' or omitted: stdin)")
+    parser.add_argument("--lang", default=DEFAULT_LANG, help="Tesseract language(s)")
+    parser.add_argument("--max-width", type=int, default=MAX_WIDTH,
+                        help="Downscale wider images to this width (0 = never)")
+    parser.add_argument("--binarize", action="store_true", help="Threshold to black and white first")
+    parser.add_argument("--time", action="store_true", help="Report OCR time on stderr")
+    parser.add_argument("--socket", help="Socket path (default: $XDG_RUNTIME_DIR/ocrd.sock)")
+    parser.add_argument("--serve", action="store_true", help="Run the worker in the foreground")
+    parser.add_argument("--detach", action="store_true", help="Start the worker in the background")
+    parser.add_argument("--status", action="store_true", help="Exit 0 if the worker is listening")
+    args = parser.parse_args()
+
+    if args.socket:
+        os.environ["OCRD_SOCKET"] = args.socket
+    path = worker_socket()
+
+    if args.status:
+        running = is_running(path)
+        print(f"ocrd {'running' if running else 'not running'} ({path})")
+        return 0 if running else 1
+
+    if args.serve:
+        return serve(path, [args.lang])
+
+    if args.detach:
+        if is_running(path):
+            return 0
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", "--lang", args.lang],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return 0
+
+    if args.image and args.image != "-":
+        data = pathlib.Path(args.image).read_bytes()
+    else:
+        data = sys.stdin.buffer.read()
+    if not data:
+        print("No image data.", file=sys.stderr)
+        return 1
+
+    reply = recognize(data, lang=args.lang, max_width=args.max_width, binarize=args.binarize)
+    if args.time:
+        source = "cached" if reply.get("cached") else reply.get("engine") or "worker"
+        print(f"OCR: {reply.get('ocr_s', 0):.2f}s ({source})", file=sys.stderr)
+    if reply.get("error"):
+        print(reply["error"], file=sys.stderr)
+        return 1
+    print(reply["text"])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""End-to-end latency benchmarks against a local fake Ollama server.
+
+Each scenario runs the real entry point as a subprocess in a scratch HOME
+(no askd, empty caches) pointed at fake_ollama.py, and records
+time-to-first-token and total latency per run:
+
+  ask              ask "<question>"
+  ask-stream       ask --stream "<question>"
+  operator         ask-operator.sh --auto-approve --max-steps N
+  debate           debate.py on an N-step proposal
+  hub              autonomy-hub.py --bench-output N (needs a display)
+
+Results are written as JSON to ~/.autonomy/bench/ and compared with the
+previous run; a median that grows by more than --threshold is reported as
+a regression (exit status 1 with --fail-on-regression).
+
+  ollama_bench.py [--runs 5] [--scenario ask --scenario debate ...]
+  ollama_bench.py --api http://host:11434      measure a real server instead
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import selectors
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import fake_ollama
+
+LIB_DIR = pathlib.Path(__file__).resolve().parent
+RESULTS = pathlib.Path.home() / ".autonomy" / "bench"
+SCENARIOS = ("ask", "ask-stream", "operator", "debate", "hub")
+RUN_TIMEOUT = 300
+QUESTION = "Why would a systemd unit fail with status=203/EXEC?"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = (len(ordered) - 1) * pct / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def summarize(values) -> dict:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {}
+    return {
+        "min": round(min(values), 4),
+        "p50": round(statistics.median(values), 4),
+        "p90": round(percentile(values, 90), 4),
+        "max": round(max(values), 4),
+    }
+
+
+class Sandbox:
+    """Scratch HOME and environment wired to the endpoint under test."""
+
+    def __init__(self, base_url):
+        self.dir = pathlib.Path(tempfile.mkdtemp(prefix="ollama-bench-"))
+        self.home = self.dir / "home"
+        (self.home / ".autonomy").mkdir(parents=True)
+        shim_dir = self.dir / "bin"
+        shim_dir.mkdir()
+        # `ollama run ...` goes to the fake server too.
+        shim = shim_dir / "ollama"
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{LIB_DIR / "fake_ollama.py"}" "$@"\n')
+        shim.chmod(0o755)
+        api = base_url.rstrip("/") + "/api/generate"
+        self.env = dict(
+            os.environ,
+            HOME=str(self.home),
+            XDG_RUNTIME_DIR=str(self.dir),  # no askd socket here
+            PATH=f"{shim_dir}:{os.environ.get('PATH', '')}",
+            OLLAMA_HOST=base_url,
+            ASK_API=api,
+            ASK_OPERATOR_API=api,
+            DEBATE_API=api,
+            ASK_CACHE="0",
+            DEBATE_MEMO="0",
+            PYTHONDONTWRITEBYTECODE="1",
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def timed_run(cmd, env, first_output=None, stdin_text=""):
+    """(ttft_s, total_s, returncode, stdout) for one run.
+
+    TTFT is when the first stdout bytes arrive, or when a line matching
+    the first_output regex does.
+    """
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+    proc.stdin.write(stdin_text.encode())
+    proc.stdin.close()
+    sel = selectors.DefaultSelector()
+    sel.register(proc.stdout, selectors.EVENT_READ)
+    os.set_blocking(proc.stdout.fileno(), False)
+    ttft = None
+    out = bytearray()
+    pattern = re.compile(first_output.encode()) if first_output else None
+    while True:
+        if time.monotonic() - started > RUN_TIMEOUT:
+            proc.kill()
+            break
+        if not sel.select(timeout=1):
+            continue
+        chunk = proc.stdout.read()
+        if not chunk:
+            break
+        out += chunk
+        if ttft is None and (pattern.search(out) if pattern else out.strip()):
+            ttft = time.monotonic() - started
+    proc.wait()
+    sel.close()
+    return ttft, time.monotonic() - started, proc.returncode, out.decode(errors="replace")
+
+
+# ---------------- Scenarios ----------------
+def bench_ask(box, args, stream=False):
+    cmd = [sys.executable, str(LIB_DIR / "ask"), "--no-daemon", "--no-cache"]
+    if stream:
+        cmd.append("--stream")
+    return [timed_run(cmd + [QUESTION], box.env) for _ in range(args.runs)]
+
+
+def bench_operator(box, args):
+    cmd = ["bash", str(LIB_DIR / "ask-operator.sh"), "--auto-approve",
+           "--max-steps", str(args.steps), "--log", str(box.dir / "operator.log"),
+           "Check free disk space"]
+    return [timed_run(cmd, box.env, first_output=r"Proposed step") for _ in range(args.runs)]
+
+
+def bench_debate(box, args):
+    proposal = {
+        "task": "benchmark",
+        "confidence": 0.8,
+        "steps": [{"id": f"step-{i}", "description": f"Benchmark step {i}",
+                   "command": f"echo step {i}", "risk": "low"} for i in range(args.steps)],
+    }
+    (box.home / ".autonomy" / "proposal.json").write_text(json.dumps(proposal, indent=2))
+    cmd = [sys.executable, str(LIB_DIR / "debate.py")]
+    # debate.py does not stream; its first model reply is the first phase result.
+    return [timed_run(cmd, box.env, first_output=r"duration=\d") for _ in range(args.runs)]
+
+
+def bench_hub(box, args):
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        return None
+    cmd = [sys.executable, str(LIB_DIR / "autonomy-hub.py"), "--bench-output", str(args.hub_lines)]
+    runs = []
+    for _ in range(args.runs):
+        ttft, total, rc, out = timed_run(cmd, box.env)
+        match = re.search(r"\(([\d.]+) lines/s\)", out)
+        runs.append((ttft, total, rc, out, float(match.group(1)) if match else None))
+    return runs
+
+
+def run_scenario(name, box, args) -> dict:
+    if name == "ask":
+        runs = bench_ask(box, args)
+    elif name == "ask-stream":
+        runs = bench_ask(box, args, stream=True)
+    elif name == "operator":
+        runs = bench_operator(box, args)
+    elif name == "debate":
+        runs = bench_debate(box, args)
+    else:
+        runs = bench_hub(box, args)
+    if runs is None:
+        return {"skipped": "no display"}
+    ok = [r for r in runs if r[2] == 0]
+    result = {
+        "runs": len(runs),
+        "ok": len(ok),
+        "ttft_s": summarize(r[0] for r in ok),
+        "total_s": summarize(r[1] for r in ok),
+    }
+    if name in ("operator", "debate"):
+        result["steps"] = args.steps
+        result["per_step_s"] = summarize(r[1] / args.steps for r in ok)
+    if name == "hub":
+        result["lines"] = args.hub_lines
+        result["lines_per_s"] = summarize(r[4] for r in ok)
+    return result
+
+
+# ---------------- Comparison ----------------
+# Metrics where bigger is worse; throughput is compared the other way round.
+COMPARED = ("ttft_s", "total_s", "per_step_s")
+
+
+def previous_result(out_dir, current):
+    files = sorted(p for p in out_dir.glob("bench-*.json") if p != current)
+    for path in reversed(files):
+        try:
+            return path, json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+    return None, None
+
+
+def compare(prev, cur, threshold) -> list:
+    """Lines describing changes in p50; regressions are marked."""
+    lines = []
+    for name, result in cur["scenarios"].items():
+        before = prev.get("scenarios", {}).get(name, {})
+        metrics = [(m, False) for m in COMPARED] + [("lines_per_s", True)]
+        for metric, higher_is_better in metrics:
+            old = before.get(metric, {}).get("p50")
+            new = result.get(metric, {}).get("p50")
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "")
+            lines.append((flag == "REGRESSION",
+                          f"{name:11} {metric:12} {old:9.3f} -> {new:9.3f}  {change:+6.1%}  {flag}".rstrip()))
+    return lines
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", str(LIB_DIR), "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ask, operator, debate and hub latency")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario")
+    parser.add_argument("--steps", type=int, default=3, help="Operator steps / proposal steps for debate")
+    parser.add_argument("--hub-lines", type=int, default=20000, help="Lines for the hub throughput run")
+    parser.add_argument("--api", help="Benchmark this server (base URL) instead of the fake one")
+    parser.add_argument("--prompt-delay", type=float, default=0.05)
+    parser.add_argument("--tps", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--cold-load", type=float, default=0.5)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=str(RESULTS), help="Directory for result JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative p50 change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    server = None
+    if args.api:
+        base_url = re.sub(r"/api/generate/?$", "", args.api.rstrip("/"))
+    else:
+        sim = fake_ollama.Simulator(prompt_delay=args.prompt_delay, tps=args.tps, tokens=args.tokens,
+                                    cold_load=args.cold_load, fail_rate=args.fail_rate, seed=args.seed)
+        server = fake_ollama.start(sim)
+        base_url = server.url
+
+    report = {
+        "ts": time.time(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "endpoint": args.api or "fake",
+        "config": {"runs": args.runs, "steps": args.steps, "prompt_delay": args.prompt_delay,
+                   "tps": args.tps, "tokens": args.tokens, "cold_load": args.cold_load,
+                   "fail_rate": args.fail_rate},
+        "scenarios": {},
+    }
+    box = Sandbox(base_url)
+    try:
+        for name in args.scenario or SCENARIOS:
+            print(f"running {name} ...", file=sys.stderr, flush=True)
+            result = report["scenarios"][name] = run_scenario(name, box, args)
+            if "skipped" in result:
+                print(f"  skipped: {result['skipped']}")
+                continue
+            print(f"  {name:11} ok {result['ok']}/{result['runs']}  "
+                  f"ttft p50 {result['ttft_s'].get('p50', float('nan')):.3f}s  "
+                  f"total p50 {result['total_s'].get('p50', float('nan')):.3f}s")
+    finally:
+        box.cleanup()
+        if server:
+            report["server"] = dict(server.sim.counts)
+            server.shutdown()
+
+    out_dir = pathlib.Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"results: {path}")
+
+    prev_path, prev = previous_result(out_dir, path)
+    regressed = False
+    if prev:
+        print(f"compared with {prev_path.name}:")
+        if prev.get("config") != report["config"] or prev.get("endpoint") != report["endpoint"]:
+            print("  (note: different settings or endpoint than that run)")
+        for bad, line in compare(prev, report, args.threshold):
+            regressed |= bad
+            print(f"  {line}")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""Pooled HTTP client for the Ollama /api/generate endpoint.
+
+Connections are kept open and reused between calls, streamed NDJSON is
+decoded incrementally and every call returns a GenerateResult instead of
+raising, so callers can report failures the same way they report output.
+Each call is recorded as a telemetry span tagged with its caller.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+import telemetry
+
+DEFAULT_MODEL = "PopPooB-Linux:latest"
+DEFAULT_API = "http://96.242.172.92:11434/api/generate"
+DEFAULT_TIMEOUT = 120
+MAX_IDLE_PER_HOST = 8
+
+STAT_KEYS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+
+def first_line_complete(text: str) -> bool:
+    """True once text holds a full non-blank line (e.g. one shell command)."""
+    return "\n" in text.lstrip()
+
+
+def local_api() -> str:
+    """Endpoint used by `ollama run`: $OLLAMA_HOST or the local default."""
+    host = os.environ.get("OLLAMA_HOST", "").strip() or "127.0.0.1:11434"
+    if "://" not in host:
+        host = "http://" + host
+    return host.rstrip("/") + "/api/generate"
+
+
+@dataclass
+class GenerateResult:
+    model: str
+    response: str = ""
+    error: Optional[str] = None
+    duration_s: float = 0.0
+    ttft_s: Optional[float] = None
+    stopped_early: bool = False
+    stats: dict = field(default_factory=dict)
+    # True when another endpoint could serve the same request: the call
+    # failed to connect or got a 5xx before any token was delivered.
+    retryable: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections, keyed by (scheme, host, port)."""
+
+    def __init__(self, max_idle: int = MAX_IDLE_PER_HOST):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+def parse_api(api: str):
+    """urlsplit(api), or ValueError when it is not an http(s) endpoint."""
+    parsed = urllib.parse.urlsplit(api)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Invalid API endpoint: {api}")
+    return parsed
+
+
+class OllamaClient:
+    def __init__(self, api: str = DEFAULT_API, timeout: float = DEFAULT_TIMEOUT,
+                 pool: Optional[ConnectionPool] = None):
+        parsed = parse_api(api)
+        self.api = api
+        self.timeout = timeout
+        self.pool = pool or ConnectionPool()
+        default_port = 443 if parsed.scheme == "https" else 80
+        self._key = (parsed.scheme, parsed.hostname, parsed.port or default_port)
+        self.endpoint = f"{self._key[1]}:{self._key[2]}"
+        self._path = parsed.path or "/api/generate"
+        if parsed.query:
+            self._path += "?" + parsed.query
+
+    def generate(self, model: str, prompt: str, stream: bool = False,
+                 on_token: Optional[Callable[[str], None]] = None,
+                 options: Optional[dict] = None, keep_alive=None,
+                 timeout: Optional[float] = None,
+                 until: Optional[Callable[[str], bool]] = None,
+                 caller: Optional[str] = None, cache: str = "off") -> GenerateResult:
+        """Run one generation. Tokens go to on_token as they arrive.
+
+        With until, the response is streamed and the connection is dropped
+        as soon as until(text so far) is true, which stops generation.
+        caller and cache ("off" or "miss") tag the telemetry span. Without
+        keep_alive, the residency plan's value for model (if any) is sent.
+        """
+        timeout = timeout or self.timeout
+        if keep_alive is None:
+            import model_residency
+            keep_alive = model_residency.keep_alive_for(model)
+        payload = {"model": model, "prompt": prompt, "stream": bool(stream or on_token or until)}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        body = json.dumps(payload).encode()
+
+        started = time.monotonic()
+        result = GenerateResult(model=model)
+        try:
+            self._request(body, payload["stream"], on_token, until, started, timeout, result)
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            result.error = f"{model} unavailable ({exc.__class__.__name__}: {exc})"
+            result.retryable = result.ttft_s is None
+        result.duration_s = time.monotonic() - started
+        telemetry.record(telemetry.make_span(caller, model, self.endpoint, cache, result))
+        return result
+
+    def _request(self, body, streaming, on_token, until, started, timeout, result):
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh one before reporting the failure.
+        for attempt in range(2):
+            conn, reused = self.pool.acquire(self._key, timeout)
+            try:
+                conn.request("POST", self._path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            break
+
+        try:
+            if resp.status != 200:
+                detail = resp.read().decode(errors="replace").strip()
+                try:
+                    detail = json.loads(detail).get("error", detail)
+                except (ValueError, AttributeError):
+                    pass
+                result.error = f"HTTP {resp.status}: {detail or resp.reason}"
+                result.retryable = resp.status >= 500
+            elif streaming:
+                self._read_stream(resp, on_token, until, started, timeout, result)
+            else:
+                self._apply(json.loads(resp.read() or b"{}"), result)
+                if result.response and result.ttft_s is None:
+                    result.ttft_s = time.monotonic() - started
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+        else:
+            self.pool.release(self._key, conn)
+
+    def _read_stream(self, resp, on_token, until, started, timeout, result):
+        parts = []
+        for raw in iter(resp.readline, b""):
+            line = raw.strip()
+            if not line:
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+            if token:
+                if result.ttft_s is None:
+                    result.ttft_s = time.monotonic() - started
+                parts.append(token)
+                if on_token:
+                    on_token(token)
+            self._apply(chunk, result, append=False)
+            if chunk.get("done") or result.error:
+                break
+            if until and token and until("".join(parts)):
+                # Leave the rest unread; the connection is closed, not pooled.
+                result.stopped_early = True
+                result.response = "".join(parts)
+                return
+            if time.monotonic() - started > timeout:
+                raise socket.timeout(f"generation exceeded {timeout}s")
+        resp.read()
+        result.response = "".join(parts)
+
+    @staticmethod
+    def _apply(chunk, result, append=True):
+        if "error" in chunk:
+            result.error = str(chunk["error"])
+        if append:
+            result.response = chunk.get("response", "")
+        for key in STAT_KEYS:
+            if key in chunk:
+                result.stats[key] = chunk[key]
+
+    def close(self):
+        self.pool.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api: str = DEFAULT_API, timeout: float = DEFAULT_TIMEOUT) -> OllamaClient:
+    """Process-wide client per endpoint, so every caller shares one pool."""
+    with _clients_lock:
+        client = _clients.get(api)
+        if client is None:
+            client = _clients[api] = OllamaClient(api, timeout=timeout)
+        return client
+
+
+def pooled(api: str) -> bool:
+    """True when api is a default that the endpoint pool stands in for."""
+    return api in (None, DEFAULT_API, local_api())
+
+
+def generate(model: str, prompt: str, api: str = DEFAULT_API, interactive: bool = False,
+             **kwargs) -> GenerateResult:
+    """One generation on api, or through the endpoint pool when one is
+    configured and api is not an explicit override. interactive allows hedging.
+    """
+    if pooled(api):
+        import endpoint_pool
+        pool = endpoint_pool.get_pool()
+        if pool is not None:
+            return pool.generate(model, prompt, interactive=interactive, **kwargs)
+    return get_client(api or DEFAULT_API).generate(model, prompt, **kwargs)
+
+
+# ---------------- CLI ----------------
+def serve(api: str, default_model: str, caller: Optional[str] = None,
+          timeout: float = DEFAULT_TIMEOUT) -> int:
+    """JSON-lines loop: one request object in, one result object out.
+
+    Lets shell loops keep a single warm connection for their lifetime.
+    A request with "first_line": true stops at the first complete line.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+            result = generate(
+                req.get("model") or default_model,
+                req.get("prompt", ""),
+                api=api,
+                options=req.get("options"),
+                keep_alive=req.get("keep_alive"),
+                timeout=req.get("timeout") or timeout,
+                until=first_line_complete if req.get("first_line") else None,
+                caller=req.get("caller") or caller,
+            )
+            out = result.to_dict()
+        except (ValueError, AttributeError) as exc:
+            out = {"model": default_model, "response": "", "error": f"bad request ({exc})"}
+        sys.stdout.write(json.dumps(out) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Send a prompt to Ollama /api/generate")
+    parser.add_argument("prompt", nargs="*", help="Prompt text (default: stdin)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--api", default=DEFAULT_API)
+    parser.add_argument("--stream", action="store_true", help="Print tokens as they arrive")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--keep-alive", help="How long the model stays loaded (e.g. 10m)")
+    parser.add_argument("--serve", action="store_true", help="Answer JSON-lines requests on stdin")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    parser.add_argument("--caller", default=os.environ.get("ASK_CALLER"),
+                        help="Caller tag for telemetry (default: $ASK_CALLER)")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_api(args.api)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    # The timeout goes with every call: a shared client may already exist
+    # for this endpoint with its own default.
+    if args.serve:
+        return serve(args.api, args.model, args.caller, args.timeout)
+
+    prompt = " ".join(args.prompt) if args.prompt else sys.stdin.read()
+    on_token = None
+    if args.stream and not args.json:
+        def on_token(token):
+            sys.stdout.write(token)
+            sys.stdout.flush()
+
+    result = generate(args.model, prompt, api=args.api, stream=args.stream, on_token=on_token,
+                      keep_alive=args.keep_alive, timeout=args.timeout, caller=args.caller,
+                      interactive=True)
+    if args.json:
+        print(json.dumps(result.to_dict()))
+    elif not args.stream:
+        print(result.response)
+    elif result.response:
+        print()
+    if result.error:
+        print(result.error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Token-budgeted context for the ask-operator step loop.
+
+Command output is compressed before it reaches the prompt: runs of
+repeated lines are collapsed, oversized output is cut to its head and tail
+under a one-line summary, and earlier steps are kept as a rolling history
+of short digests. Budgets are in estimated tokens (about 4 characters each).
+
+Run with --serve to answer JSON-lines requests on stdin, one per line:
+  {"op": "add", "command": "...", "output": "..."}
+  {"op": "note", "text": "..."}          (declined step, empty reply, ...)
+  {"op": "render"}                       -> {"context": "...", "tokens": N}
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+DEFAULT_BUDGET = int(os.environ.get("ASK_OPERATOR_CONTEXT_TOKENS", "1500"))
+HISTORY_SHARE = 0.3
+MAX_NOTABLE = 5
+ERROR_HINT = re.compile(r"error|fail|denied|not found|no such|cannot|refused", re.I)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def collapse_repeats(lines):
+    """Fold runs of identical lines into one line with a repeat count."""
+    out = []
+    prev, count = None, 0
+    for line in lines:
+        if line == prev:
+            count += 1
+            continue
+        if prev is not None:
+            out.append(prev if count == 1 else f"{prev}  [repeated {count}x]")
+        prev, count = line, 1
+    if prev is not None:
+        out.append(prev if count == 1 else f"{prev}  [repeated {count}x]")
+    return out
+
+
+def summarize(lines, raw: str) -> str:
+    errors = sum(1 for line in lines if ERROR_HINT.search(line))
+    summary = f"[output: {len(raw.splitlines())} lines, {len(raw)} chars"
+    if errors:
+        summary += f", {errors} error-like lines"
+    return summary + "]"
+
+
+def head_tail(lines, budget: int):
+    """Keep lines from both ends within budget tokens, marking the gap."""
+    head, tail = [], []
+    used = 0
+    i, j = 0, len(lines) - 1
+    take_head = True
+    while i <= j:
+        line = lines[i] if take_head else lines[j]
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        used += cost
+        if take_head:
+            head.append(line)
+            i += 1
+        else:
+            tail.append(line)
+            j -= 1
+        take_head = not take_head
+    omitted = j - i + 1
+    if omitted <= 0:
+        return head + tail[::-1]
+    return head + [f"... [{omitted} lines omitted] ..."] + tail[::-1]
+
+
+def compress_output(raw: str, budget: int) -> str:
+    if not raw.strip():
+        return "(no output)"
+    lines = collapse_repeats(raw.rstrip("\n").splitlines())
+    text = "\n".join(lines)
+    if estimate_tokens(text) <= budget:
+        return text
+    header = summarize(lines, raw)
+    # Very long single lines are cut too, so one line cannot eat the budget.
+    limit = max(budget * 2, 80)
+    lines = [line if len(line) <= limit else line[:limit] + " ..." for line in lines]
+    # Error-like lines from the omitted middle are worth more than filler.
+    kept = set(head_tail(lines, max(budget - estimate_tokens(header), 16)))
+    notable = [line for line in lines if ERROR_HINT.search(line) and line not in kept][:MAX_NOTABLE]
+    reserve = sum(estimate_tokens(line) + 1 for line in notable)
+    body = head_tail(lines, max(budget - estimate_tokens(header) - reserve, 16))
+    if notable:
+        body = body + ["[error-like lines from the omitted part:]", *notable]
+    return "\n".join([header, *body])
+
+
+def digest(command: str, raw: str) -> str:
+    lines = [line for line in raw.splitlines() if line.strip()]
+    if not lines:
+        return f"$ {command} -> (no output)"
+    first = lines[0][:120]
+    return f"$ {command} -> {len(lines)} lines, first: {first}"
+
+
+class OperatorContext:
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget = budget
+        self.history = []
+        self.last = "(none yet)"
+
+    def add(self, command: str, output: str) -> None:
+        self.history.append(digest(command, output))
+        self.last = compress_output(output, int(self.budget * (1 - HISTORY_SHARE)))
+
+    def note(self, text: str) -> None:
+        self.history.append(text.splitlines()[0][:200] if text else "(note)")
+        self.last = text
+
+    def render(self) -> str:
+        # Newest digests first until the history share is spent, then shown
+        # oldest to newest. The latest entry is already in "Previous command output".
+        room = int(self.budget * HISTORY_SHARE)
+        kept = []
+        for line in reversed(self.history[:-1]):
+            cost = estimate_tokens(line) + 1
+            if cost > room:
+                break
+            room -= cost
+            kept.append(line)
+        dropped = len(self.history) - 1 - len(kept)
+        parts = []
+        if kept or dropped > 0:
+            parts.append("Earlier steps:")
+            if dropped > 0:
+                parts.append(f"- ({dropped} older steps omitted)")
+            parts.extend(f"- {line}" for line in reversed(kept))
+            parts.append("")
+        parts.append("Previous command output:")
+        parts.append(self.last)
+        return "\n".join(parts)
+
+
+def serve(ctx: OperatorContext) -> int:
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            req = json.loads(line)
+            op = req.get("op")
+            if op == "add":
+                ctx.add(req.get("command", ""), req.get("output", ""))
+                out = {"ok": True}
+            elif op == "note":
+                ctx.note(req.get("text", ""))
+                out = {"ok": True}
+            elif op == "render":
+                context = ctx.render()
+                out = {"context": context, "tokens": estimate_tokens(context)}
+            else:
+                out = {"error": f"unknown op: {op}"}
+        except (ValueError, AttributeError) as exc:
+            out = {"error": f"bad request ({exc})"}
+        sys.stdout.write(json.dumps(out) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compress command output for operator prompts")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="Context budget in tokens")
+    parser.add_argument("--serve", action="store_true", help="Answer JSON-lines requests on stdin")
+    args = parser.parse_args(argv)
+
+    ctx = OperatorContext(args.budget)
+    if args.serve:
+        return serve(ctx)
+    print(compress_output(sys.stdin.read(), int(args.budget * (1 - HISTORY_SHARE))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
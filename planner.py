@@ -5,12 +5,15 @@ import pathlib
 import sys
 import datetime
 
+import observer
+
 HOME = pathlib.Path.home()
 AUTON = HOME / ".autonomy"
 PROP = AUTON / "proposal.json"
 LOG = AUTON / "planner.log"
 
 DEFAULT_CONFIDENCE = 0.4
+OBSERVATION_MAX_AGE = 15 * 60
 
 
 def log(msg: str) -> None:
@@ -28,10 +31,26 @@ def read_task(args) -> str:
     return ""
 
 
+def observations() -> dict:
+    # Latest observer snapshot (written by observer.py, possibly as a daemon);
+    # reading it is a single small file read.
+    snap = observer.read_snapshot(max_age=OBSERVATION_MAX_AGE)
+    if snap is None:
+        return {}
+    return {
+        "time": snap.get("time"),
+        "mem_used_pct": snap.get("memory", {}).get("used_pct"),
+        "disk_used_pct": snap.get("disk_usage", {}).get("used_pct"),
+        "failed_units": snap.get("failed_units", []),
+        "new_errors": snap.get("deltas", {}).get("new_errors", 0),
+    }
+
+
 def build_proposal(task: str) -> dict:
     return {
         "task": task,
         "confidence": DEFAULT_CONFIDENCE,
+        "observations": observations(),
         "steps": [
             {
                 "id": "step-1",
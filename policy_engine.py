@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Compiled command policy for executor.sh.
+
+policy.conf holds DENY=<substring> and ALLOW=<prefix> lines. DENY patterns
+are compiled into one Aho-Corasick automaton, so a command is checked
+against all of them in a single pass, and ALLOW prefixes into a trie walked
+once along the command. When several rules match, the earliest one in the
+file is reported, as the old shell loops did. The compiled policy is cached
+as JSON next to policy.conf, keyed by a hash of the file's contents.
+
+  policy_engine.py check -- CMD       prints "allow|deny|unlisted<TAB>rule"
+  policy_engine.py compile            rebuild the cache now
+  policy_engine.py bench              time checks against a large policy
+"""
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from collections import deque
+
+POLICY = pathlib.Path.home() / ".autonomy" / "policy.conf"
+CACHE_VERSION = 2
+
+
+class Verdict:
+    # Plain class rather than a dataclass: this runs once per executor.sh
+    # call and the dataclasses import costs more than the check.
+    def __init__(self, decision: str, rule: str = None, line: int = None):
+        self.decision = decision  # "allow", "deny" or "unlisted"
+        self.rule = rule
+        self.line = line
+
+    @property
+    def allowed(self) -> bool:
+        return self.decision == "allow"
+
+
+class PatternAutomaton:
+    """Aho-Corasick over substrings; reports the lowest-numbered match."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        best = [None]
+        for number, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    best.append(None)
+                node = nxt
+            if best[node] is None:
+                best[node] = number
+        # Breadth-first failure links; each node inherits the best match of
+        # its failure target so the scan needs one lookup per character.
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                target = self.fail[node]
+                while target and ch not in self.goto[target]:
+                    target = self.fail[target]
+                nxt = self.goto[target].get(ch, 0)
+                self.fail[child] = nxt if nxt != child else 0
+            inherited = best[self.fail[node]]
+            if inherited is not None and (best[node] is None or inherited < best[node]):
+                best[node] = inherited
+        self.best = best
+
+    def first_match(self, text: str) -> int:
+        goto, fail, best = self.goto, self.fail, self.best
+        found = best[0]
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = best[node]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+                if found == 0:
+                    break
+        return found
+
+
+class PrefixTrie:
+    """Trie of prefixes; reports the lowest-numbered prefix of a string."""
+
+    def __init__(self, prefixes):
+        self.children = [{}]
+        self.terminal = [None]
+        for number, prefix in enumerate(prefixes):
+            node = 0
+            for ch in prefix:
+                nxt = self.children[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.children)
+                    self.children[node][ch] = nxt
+                    self.children.append({})
+                    self.terminal.append(None)
+                node = nxt
+            if self.terminal[node] is None:
+                self.terminal[node] = number
+
+    def first_prefix(self, text: str) -> int:
+        children, terminal = self.children, self.terminal
+        found = terminal[0]
+        node = 0
+        for ch in text:
+            node = children[node].get(ch)
+            if node is None:
+                break
+            hit = terminal[node]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+        return found
+
+
+class CompiledPolicy:
+    def __init__(self, deny, allow):
+        # (value, line number) pairs in file order
+        self.deny = deny
+        self.allow = allow
+        self.deny_automaton = PatternAutomaton([value for value, _ in deny])
+        self.allow_trie = PrefixTrie([value for value, _ in allow])
+
+    # Plain lists and dicts, so the cache is JSON and never executes code.
+    def to_state(self):
+        return [self.deny, self.allow, vars(self.deny_automaton), vars(self.allow_trie)]
+
+    @classmethod
+    def from_state(cls, state):
+        policy = cls.__new__(cls)
+        policy.deny, policy.allow, automaton, trie = state
+        policy.deny_automaton = PatternAutomaton.__new__(PatternAutomaton)
+        policy.deny_automaton.__dict__.update(automaton)
+        policy.allow_trie = PrefixTrie.__new__(PrefixTrie)
+        policy.allow_trie.__dict__.update(trie)
+        return policy
+
+    def check(self, command: str) -> Verdict:
+        hit = self.deny_automaton.first_match(command)
+        if hit is not None:
+            return Verdict("deny", *self.deny[hit])
+        hit = self.allow_trie.first_prefix(command)
+        if hit is not None:
+            return Verdict("allow", *self.allow[hit])
+        return Verdict("unlisted")
+
+
+def parse_policy(text: str) -> CompiledPolicy:
+    deny, allow = [], []
+    for number, line in enumerate(text.splitlines(), 1):
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        if key == "DENY":
+            deny.append((value, number))
+        elif key == "ALLOW":
+            allow.append((value, number))
+    return CompiledPolicy(deny, allow)
+
+
+_loaded = {}
+
+
+def load_policy(path=POLICY) -> CompiledPolicy:
+    """Compiled policy for path, from memory or the on-disk cache when fresh."""
+    path = pathlib.Path(path)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return CompiledPolicy([], [])
+    stamp = f"{CACHE_VERSION}:{hashlib.sha256(data).hexdigest()}"
+    cached = _loaded.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    cache_path = path.with_name(path.name + ".compiled")
+    policy = None
+    try:
+        saved = json.loads(cache_path.read_text())
+        if saved.get("stamp") == stamp:
+            policy = CompiledPolicy.from_state(saved["policy"])
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        pass
+    if policy is None:
+        policy = parse_policy(data.decode(errors="replace"))
+        tmp = cache_path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            tmp.write_text(json.dumps({"stamp": stamp, "policy": policy.to_state()}, separators=(",", ":")))
+            os.replace(tmp, cache_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    _loaded[path] = (stamp, policy)
+    return policy
+
+
+def check(command: str, path=POLICY) -> Verdict:
+    return load_policy(path).check(command)
+
+
+# ---------------- Benchmark ----------------
+def bench(rules: int, commands: int, seed: int = 0) -> int:
+    import random
+    import string
+
+    rng = random.Random(seed)
+
+    def word(n):
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(n))
+
+    deny = [(f"{word(4)} {word(rng.randint(3, 10))}", i) for i in range(rules)]
+    allow = [(f"{word(rng.randint(2, 6))} {word(rng.randint(0, 6))}".rstrip(), i) for i in range(rules)]
+    cmds = []
+    for _ in range(commands):
+        parts = [rng.choice(allow)[0] if rng.random() < 0.5 else word(5)]
+        parts += [word(rng.randint(2, 8)) for _ in range(rng.randint(2, 8))]
+        if rng.random() < 0.1:
+            parts.append(rng.choice(deny)[0])
+        cmds.append(" ".join(parts))
+
+    started = time.perf_counter()
+    policy = CompiledPolicy(deny, allow)
+    compile_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fast = [policy.check(c).decision for c in cmds]
+    fast_s = time.perf_counter() - started
+
+    # The old executor.sh logic, in-process: one substring test per DENY
+    # rule and one prefix test per ALLOW rule.
+    def linear(command):
+        for value, _ in deny:
+            if value in command:
+                return "deny"
+        for value, _ in allow:
+            if command.startswith(value):
+                return "allow"
+        return "unlisted"
+
+    started = time.perf_counter()
+    slow = [linear(c) for c in cmds]
+    slow_s = time.perf_counter() - started
+
+    if fast != slow:
+        print("MISMATCH between compiled and linear checks", file=sys.stderr)
+        return 1
+    print(f"rules: {rules} DENY + {rules} ALLOW, commands: {commands}")
+    print(f"compile:  {compile_s * 1000:.1f} ms")
+    print(f"compiled: {fast_s / commands * 1e6:.1f} us/check")
+    print(f"linear:   {slow_s / commands * 1e6:.1f} us/check")
+    print(f"verdicts: {fast.count('deny')} deny, {fast.count('allow')} allow, "
+          f"{fast.count('unlisted')} unlisted")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check commands against policy.conf")
+    parser.add_argument("--policy", default=str(POLICY), help="Policy file")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("check", help="Check one command; exit 0 only if allowed")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("command", nargs=argparse.REMAINDER)
+    sub.add_parser("compile", help="Rebuild the compiled cache")
+    p = sub.add_parser("bench", help="Benchmark compiled vs linear checks")
+    p.add_argument("--rules", type=int, default=5000)
+    p.add_argument("--commands", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.cmd == "bench":
+        return bench(args.rules, args.commands)
+    if args.cmd == "compile":
+        policy = load_policy(args.policy)
+        print(f"{len(policy.deny)} DENY, {len(policy.allow)} ALLOW rule(s)")
+        return 0
+
+    words = args.command[1:] if args.command[:1] == ["--"] else args.command
+    verdict = check(" ".join(words), args.policy)
+    if args.json:
+        print(json.dumps({"decision": verdict.decision, "rule": verdict.rule, "line": verdict.line}))
+    else:
+        print(f"{verdict.decision}\t{verdict.rule or ''}")
+    return 0 if verdict.allowed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
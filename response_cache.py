@@ -0,0 +1,153 @@
+"""Content-addressed response cache backed by SQLite.
+
+Entries are keyed by a hash of whatever identifies a request (model, mode,
+prompt, ...), expire after a TTL and are evicted least-recently-used once
+the stored text exceeds a size cap. The database runs in WAL mode with a
+busy timeout so several processes can read and write it at once.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+AUTON = pathlib.Path.home() / ".autonomy"
+ASK_CACHE = AUTON / "ask-cache.sqlite3"
+DEBATE_MEMO = AUTON / "debate-memo.sqlite3"
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_key(**parts) -> str:
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=ASK_CACHE, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL):
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def _bump(self, name, by=1):
+        self.db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, by),
+        )
+
+    def get(self, key: str):
+        """Cached value for key, or None. Expired entries count as misses."""
+        entry = self.get_with_age(key)
+        return entry[0] if entry else None
+
+    def get_with_age(self, key: str):
+        """(value, age in seconds) for key, or None."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump("expired")
+                row = None
+            if row is None:
+                self._bump("misses")
+                return None
+            self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._bump("hits")
+            return row[0], now - row[1]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode())
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self.db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump("evictions", evicted)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            counters = dict(self.db.execute("SELECT name, value FROM counters"))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "expired": counters.get("expired", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self) -> None:
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM counters")
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def open_ask_cache() -> ResponseCache:
+    """The cache `ask` uses, sized from ASK_CACHE_MAX_MB / ASK_CACHE_TTL."""
+    max_mb = float(os.environ.get("ASK_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+    ttl = float(os.environ.get("ASK_CACHE_TTL", DEFAULT_TTL))
+    return ResponseCache(ASK_CACHE, max_bytes=int(max_mb * 1024 * 1024), ttl=ttl)
+
+
+def open_debate_memo() -> ResponseCache:
+    """Per-phase debate memo, sized from DEBATE_MEMO_MAX_MB / DEBATE_MEMO_TTL."""
+    max_mb = float(os.environ.get("DEBATE_MEMO_MAX_MB", 32))
+    ttl = float(os.environ.get("DEBATE_MEMO_TTL", DEFAULT_TTL))
+    return ResponseCache(DEBATE_MEMO, max_bytes=int(max_mb * 1024 * 1024), ttl=ttl)
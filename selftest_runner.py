@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Parallel autonomy self-test.
+
+Each check is a short shell snippet run in its own process group with its
+own timeout; independent checks run concurrently, and `needs` orders the
+few that touch the same state. Results carry per-check durations and the
+total runtime, and every full run (not --only) is appended to
+health-history.jsonl so the tray and dashboard can show latency trends
+(health_state.latency_trends).
+
+  autonomy-selftest.sh                      human-readable report
+  autonomy-selftest.sh --json               JSON report on stdout
+  autonomy-selftest.sh --output FILE        also write the report to FILE
+  autonomy-selftest.sh --partial            print and write results as they finish
+
+The exit status is the number of failed checks.
+"""
+import argparse
+import json
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import health_state
+
+DEFAULT_TIMEOUT = float(os.environ.get("AUTONOMY_SELFTEST_TIMEOUT", "20"))
+JOBS = int(os.environ.get("AUTONOMY_SELFTEST_JOBS", "8"))
+
+GREEN = "\033[1;32m"
+RED = "\033[1;31m"
+YELLOW = "\033[1;33m"
+RESET = "\033[0m"
+
+SUGGESTIONS = {
+    "OLLAMA_HOST missing": "Suggestion: run systemctl --user daemon-reexec and re-login",
+    "Ollama unreachable": "Suggestion: check sudo systemctl status ollama",
+    "proposal-ui syntax error": "Suggestion: PYTHONDONTWRITEBYTECODE=1 avoids pycache issues",
+    "debate failed": "Suggestion: ensure debate.py exits 0 on NO_ACTION",
+}
+
+
+class Check:
+    def __init__(self, key, passed, failed, script, timeout=DEFAULT_TIMEOUT, needs=(),
+                 on_fail="fail", report=True):
+        self.key = key
+        self.passed = passed      # label when the script exits 0
+        self.failed = failed      # label otherwise
+        self.script = script
+        self.timeout = timeout
+        self.needs = needs        # keys of checks that must finish first
+        self.on_fail = on_fail    # "fail" or "info"
+        self.report = report      # False for setup steps with no result
+
+
+CHECKS = [
+    Check("env", "OLLAMA_HOST set", "OLLAMA_HOST missing", '[ -n "$OLLAMA_HOST" ]'),
+    Check("ollama", "Ollama reachable", "Ollama unreachable",
+          '[ -n "$OLLAMA_HOST" ] && curl -s --connect-timeout 3 --max-time 5 "$OLLAMA_HOST/api/tags" >/dev/null',
+          timeout=8),
+    Check("bootstrap", "", "", "~/.local/bin/ollama-bootstrap.sh >/dev/null 2>&1 || true",
+          timeout=120, needs=("ollama",), report=False),
+    Check("ask", "ask works", "ask unavailable (likely no models yet)",
+          'ask "say test" 2>/dev/null | grep -qi test', timeout=60, needs=("bootstrap",), on_fail="info"),
+    Check("tkinter", "tkinter available", "tkinter missing", "python3 -c 'import tkinter' >/dev/null 2>&1"),
+    Check("observer", "observer generated data", "observer failed",
+          "~/.local/bin/observer.sh >/dev/null || true; [ -f ~/.autonomy/observer.json ]"),
+    Check("planner", "planner produced proposal JSON", "planner output invalid",
+          "~/.local/bin/planner.py --quiet >/dev/null || true; jq -e . ~/.autonomy/proposal.json >/dev/null 2>&1",
+          timeout=60, needs=("observer",)),
+    Check("proposal-ui", "proposal-ui syntax OK", "proposal-ui syntax error",
+          "PYTHONDONTWRITEBYTECODE=1 python3 -m py_compile ~/.local/bin/proposal-ui.py"),
+    Check("policy", "policy file present", "policy missing", "[ -f ~/.autonomy/policy.conf ]"),
+    Check("executor", "executor blocks forbidden commands", "executor policy failed",
+          '~/.local/bin/executor.sh "rm -rf /" 2>&1 | grep -q DENIED'),
+    Check("toggle-on", "autonomy ON", "autonomy ON failed",
+          "~/.local/bin/autonomy-toggle.sh >/dev/null || true; [ -f ~/.autonomy/enabled ]"),
+    Check("toggle-off", "autonomy OFF", "autonomy OFF failed",
+          "~/.local/bin/autonomy-toggle.sh >/dev/null || true; [ ! -f ~/.autonomy/enabled ]",
+          needs=("toggle-on",)),
+    Check("audit", "audit logging works", "audit logging failed",
+          '~/.local/bin/audit-log.sh test "selftest" || true; '
+          '[ "$(python3 ~/.local/bin/event_store.py count 2>/dev/null || echo 0)" -gt 0 ]'),
+    Check("preferences", "preferences learning works", "preferences failed",
+          "python3 ~/.local/bin/update-preferences.py services test approved || true; "
+          "[ -f ~/.autonomy/preferences.json ]"),
+    Check("heatmap", "heat-map runnable", "heat-map error",
+          "python3 ~/.local/bin/autonomy-heatmap.py >/dev/null 2>&1", needs=("audit",)),
+    Check("tray", "tray dependencies OK", "tray deps missing",
+          "python3 -c 'import gi; from gi.repository import AppIndicator3' >/dev/null 2>&1"),
+    Check("voice", "voice pipeline present", "voice pipeline missing",
+          "command -v ask-voice.py >/dev/null", on_fail="info"),
+    Check("roles", "roles directory exists", "roles missing", "[ -d ~/.autonomy/roles ]"),
+    # fatigue-check.sh may clear the enabled flag the toggle checks look at.
+    Check("fatigue", "fatigue check runnable", "fatigue check runnable",
+          "~/.local/bin/fatigue-check.sh >/dev/null || true", needs=("toggle-off", "audit")),
+    Check("anomaly", "anomaly data path present", "anomaly path missing",
+          "jq -e '.errors' ~/.autonomy/observer.json >/dev/null", needs=("observer",)),
+    Check("remote", "remote approval tool present", "remote approval missing",
+          "[ -x /usr/local/bin/autonomy-approve ]"),
+]
+
+
+def import_user_environment() -> None:
+    """OLLAMA_* from the systemd user manager when not already set."""
+    if os.environ.get("OLLAMA_HOST"):
+        return
+    try:
+        out = subprocess.run(["systemctl", "--user", "show-environment"], capture_output=True,
+                             text=True, timeout=5).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return
+    for line in out.splitlines():
+        name, sep, value = line.partition("=")
+        if sep and name.startswith("OLLAMA_"):
+            os.environ[name] = value
+
+
+def run_check(check: Check) -> dict:
+    started = time.monotonic()
+    timed_out = False
+    try:
+        proc = subprocess.Popen(["bash", "-c", check.script], stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                start_new_session=True)
+        try:
+            ok = proc.wait(timeout=check.timeout) == 0
+        except subprocess.TimeoutExpired:
+            # Kill the whole group so pipelines and children go too.
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            ok, timed_out = False, True
+    except OSError:
+        ok = False
+    result = {
+        "key": check.key,
+        "check": check.passed if ok else check.failed,
+        "status": "pass" if ok else check.on_fail,
+        "duration_s": round(time.monotonic() - started, 3),
+    }
+    if timed_out:
+        result["timed_out"] = True
+        result["detail"] = f"timed out after {check.timeout:g}s"
+    return result
+
+
+class Report:
+    def __init__(self, json_mode, output, partial):
+        self.json_mode = json_mode
+        self.output = output
+        self.partial = partial
+        self.started = time.time()
+        self.results = []
+        self.failures = 0
+        # With --json the report owns stdout; the human lines go to stderr.
+        self.human = sys.stderr if json_mode else sys.stdout
+
+    def say(self, text, color=""):
+        print(f"{color}{text}{RESET if color else ''}", file=self.human, flush=True)
+
+    def add(self, result) -> None:
+        self.results.append(result)
+        if result["status"] == "pass":
+            self.say(f"✔ {result['check']}  ({result['duration_s']:.2f}s)", GREEN)
+        elif result["status"] == "info":
+            self.say(f"ℹ {result['check']}  ({result['duration_s']:.2f}s)", YELLOW)
+        else:
+            self.failures += 1
+            detail = f", {result['detail']}" if result.get("detail") else ""
+            self.say(f"✖ {result['check']}  ({result['duration_s']:.2f}s{detail})", RED)
+            suggestion = SUGGESTIONS.get(result["check"])
+            if suggestion:
+                self.say(f"ℹ {suggestion}", YELLOW)
+                self.results.append({"check": suggestion, "status": "info"})
+        if self.partial:
+            if self.json_mode:
+                print(json.dumps(result), flush=True)
+            self.write(done=False)
+
+    def data(self, done=True) -> dict:
+        return {
+            "failures": self.failures,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "total_s": round(time.time() - self.started, 3),
+            "partial": not done,
+            "results": self.results,
+        }
+
+    def write(self, done=True) -> None:
+        if self.output:
+            tmp = self.output.with_name(f".{self.output.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self.data(done), indent=2))
+            os.replace(tmp, self.output)
+
+
+def run_all(checks, report: Report, jobs=JOBS) -> None:
+    waiting = list(checks)
+    finished = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while waiting or running:
+            for check in [c for c in waiting if all(n in finished for n in c.needs)]:
+                waiting.remove(check)
+                running[pool.submit(run_check, check)] = check
+            if not running:  # needs that can never be met
+                for check in waiting:
+                    report.add({"key": check.key, "check": check.failed, "status": check.on_fail,
+                                "duration_s": 0.0, "detail": "unmet needs"})
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                check = running.pop(future)
+                finished.add(check.key)
+                if check.report:
+                    report.add(future.result())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Autonomy full system self-test")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON on stdout")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--partial", action="store_true",
+                        help="Report each result as it finishes (JSON lines with --json; "
+                             "--output is rewritten after every check)")
+    parser.add_argument("--jobs", type=int, default=JOBS, help="Checks to run at once")
+    parser.add_argument("--only", action="append", metavar="KEY",
+                        help="Run only these checks (" + ", ".join(c.key for c in CHECKS) + ")")
+    args = parser.parse_args()
+
+    checks = CHECKS
+    if args.only:
+        checks = [c for c in CHECKS if c.key in args.only]
+        keys = {c.key for c in checks}
+        for check in checks:
+            check.needs = tuple(n for n in check.needs if n in keys)
+
+    report = Report(args.json, pathlib.Path(args.output) if args.output else None, args.partial)
+    report.say("======================================")
+    report.say("🧠 AUTONOMY FULL SYSTEM SELF-TEST")
+    report.say("======================================")
+    report.say("")
+    import_user_environment()
+    run_all(checks, report, max(args.jobs, 1))
+
+    data = report.data()
+    report.say("")
+    report.say("======================================")
+    if report.failures == 0:
+        report.say(f"✔ SYSTEM HEALTHY  ({data['total_s']:.2f}s)", GREEN)
+    else:
+        report.say(f"✖ {report.failures} ISSUES DETECTED  ({data['total_s']:.2f}s)", RED)
+    report.say("======================================")
+
+    # Subset runs would skew the per-check trends and failure counts.
+    if not args.only:
+        health_state.record_history(data)
+    # After the history, so readers woken by health.json see this run's trends.
+    report.write()
+    if args.json:
+        print(json.dumps(data) if args.partial else json.dumps(data, indent=2))
+    return report.failures
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
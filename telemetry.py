@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Latency and throughput telemetry for model calls.
+
+Every call through ollama_client (and every answer served from a cache)
+appends one span to ~/.autonomy/metrics/spans.jsonl: caller tag, model,
+endpoint, cache status, TTFT, total time, load time (and whether the call
+hit a cold model) and token rates taken from Ollama's own counters. The log
+rotates by size to spans.jsonl.1..N. All-time totals per caller and model
+are kept beside it in counters.json, so the exported Prometheus counters
+never go backwards when an old log rotates out.
+
+  telemetry.py summary [--by model|caller|both] [--since 24h]
+  telemetry.py export [--textfile PATH]     Prometheus textfile collector format
+  telemetry.py tail [-n 20]
+
+Set TELEMETRY=0 to turn recording off.
+"""
+import argparse
+import fcntl
+import json
+import os
+import pathlib
+import re
+import sys
+import time
+
+METRICS_DIR = pathlib.Path.home() / ".autonomy" / "metrics"
+SPANS = METRICS_DIR / "spans.jsonl"
+PROM = METRICS_DIR / "ollama.prom"
+COUNTERS = METRICS_DIR / "counters.json"
+MAX_BYTES = int(os.environ.get("TELEMETRY_MAX_BYTES", 5 * 1024 * 1024))
+BACKUPS = int(os.environ.get("TELEMETRY_BACKUPS", "3"))
+ENABLED = os.environ.get("TELEMETRY", "1") != "0"
+QUANTILES = (0.5, 0.9, 0.99)
+TIMED = ("duration_s", "ttft_s", "tokens_per_s", "load_s")
+# A call whose model load took at least this long hit a cold model.
+COLD_S = float(os.environ.get("TELEMETRY_COLD_S", "1"))
+
+
+def default_caller() -> str:
+    return os.environ.get("ASK_CALLER") or os.path.basename(sys.argv[0] or "python") or "unknown"
+
+
+# ---------------- Recording ----------------
+def make_span(caller, model, endpoint, cache, result=None, **extra) -> dict:
+    """Span for one call; result is an ollama_client.GenerateResult or None for a cache hit."""
+    span = {"ts": round(time.time(), 3), "caller": caller or default_caller(), "model": model,
+            "endpoint": endpoint, "cache": cache}
+    if result is not None:
+        stats = result.stats
+        span.update(ok=result.ok, duration_s=round(result.duration_s, 4),
+                    ttft_s=None if result.ttft_s is None else round(result.ttft_s, 4),
+                    stopped_early=result.stopped_early)
+        if result.error:
+            span["error"] = result.error[:200]
+        if "load_duration" in stats:
+            span["load_s"] = round(stats["load_duration"] / 1e9, 4)
+            span["cold"] = span["load_s"] >= COLD_S
+        if "prompt_eval_count" in stats:
+            span["prompt_tokens"] = stats["prompt_eval_count"]
+            if stats.get("prompt_eval_duration"):
+                span["prompt_tps"] = round(stats["prompt_eval_count"] / (stats["prompt_eval_duration"] / 1e9), 2)
+        if "eval_count" in stats:
+            span["eval_tokens"] = stats["eval_count"]
+            if stats.get("eval_duration"):
+                span["tokens_per_s"] = round(stats["eval_count"] / (stats["eval_duration"] / 1e9), 2)
+    else:
+        span.update(ok=True, duration_s=0.0)
+    span.update(extra)
+    return span
+
+
+def rotate(path=SPANS, backups=BACKUPS) -> None:
+    for i in range(backups - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{i}")
+        if older.exists():
+            os.replace(older, path.with_name(f"{path.name}.{i + 1}"))
+    if path.exists():
+        os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def count(counters: dict, span: dict) -> None:
+    """Add one span to the all-time totals, keyed "caller<TAB>model"."""
+    key = f"{span.get('caller') or '?'}\t{span.get('model') or '?'}"
+    c = counters.setdefault(key, {"calls": 0, "errors": 0, "cache_hits": 0, "cold": 0, "eval_tokens": 0})
+    c["calls"] += 1
+    ok = span.get("ok", True)
+    if not ok:
+        c["errors"] += 1
+    if span.get("cache") == "hit":
+        c["cache_hits"] += 1
+        return
+    c["cold"] += bool(span.get("cold"))
+    c["eval_tokens"] += span.get("eval_tokens") or 0
+    for name in TIMED:
+        if span.get(name) is not None and ok:
+            c[name + "_sum"] = c.get(name + "_sum", 0) + span[name]
+            c[name + "_count"] = c.get(name + "_count", 0) + 1
+
+
+def read_counters(path=COUNTERS) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def update_counters(span, spans_path, path=COUNTERS) -> None:
+    """Called with the spans lock held, before span is appended."""
+    if path.exists():
+        counters = read_counters(path)
+    else:  # first run with counters: start from the spans already logged
+        counters = {}
+        for old in iter_spans(path=spans_path):
+            count(counters, old)
+    count(counters, span)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(counters))
+    os.replace(tmp, path)
+
+
+def record(span: dict, path=SPANS, counters_path=COUNTERS) -> None:
+    """Append a span; telemetry never fails the call it describes."""
+    if not ENABLED:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            update_counters(span, path, counters_path)
+            f.write(json.dumps(span) + "\n")
+            f.flush()
+            # Rotate under the lock; writers holding the old file finish
+            # their line there and reopen the path next time.
+            if os.fstat(f.fileno()).st_size > MAX_BYTES:
+                rotate(path)
+    except (OSError, ValueError):
+        pass
+
+
+# ---------------- Reading ----------------
+def iter_spans(since=None, path=SPANS):
+    """Spans oldest first, across rotated files."""
+    files = [path.with_name(f"{path.name}.{i}") for i in range(BACKUPS, 0, -1)] + [path]
+    for file in files:
+        try:
+            with open(file) as f:
+                for line in f:
+                    try:
+                        span = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since is None or span.get("ts", 0) >= since:
+                        yield span
+        except OSError:
+            continue
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = (len(ordered) - 1) * q
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def group_key(span, by):
+    if by == "model":
+        return (span.get("model") or "?",)
+    if by == "caller":
+        return (span.get("caller") or "?",)
+    if by == "endpoint":
+        return (span.get("endpoint") or "cache",)
+    return (span.get("caller") or "?", span.get("model") or "?")
+
+
+def aggregate(spans, by="both") -> dict:
+    groups = {}
+    for span in spans:
+        g = groups.setdefault(group_key(span, by), {
+            "calls": 0, "errors": 0, "cache_hits": 0, "cold": 0, "duration_s": [], "ttft_s": [],
+            "tokens_per_s": [], "load_s": [], "eval_tokens": 0, "prompt_tokens": 0,
+        })
+        g["calls"] += 1
+        if not span.get("ok", True):
+            g["errors"] += 1
+        if span.get("cache") == "hit":
+            g["cache_hits"] += 1
+            continue  # no model time to report
+        g["cold"] += bool(span.get("cold"))
+        for key in TIMED:
+            if span.get(key) is not None and span.get("ok", True):
+                g[key].append(span[key])
+        g["eval_tokens"] += span.get("eval_tokens") or 0
+        g["prompt_tokens"] += span.get("prompt_tokens") or 0
+    return groups
+
+
+def parse_since(text):
+    """Absolute start time for '30m', '24h', '7d' (None for everything)."""
+    if not text:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", text.strip())
+    if not match:
+        raise ValueError(f"bad duration: {text}")
+    return time.time() - float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+
+
+def fmt(value, unit="s"):
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+
+def summary(by="both", since=None, out=print) -> int:
+    groups = aggregate(iter_spans(since), by)
+    if not groups:
+        out("No spans recorded.")
+        return 1
+    label = {"model": "MODEL", "caller": "CALLER", "both": "CALLER / MODEL"}[by]
+    out(f"{label:40} {'CALLS':>6} {'ERR':>4} {'HIT%':>5} {'TTFT50':>8} {'TTFT90':>8} "
+        f"{'TOT50':>8} {'TOT90':>8} {'TOT99':>8} {'TOK/S50':>8} {'LOAD50':>8} {'COLD%':>6}")
+    for key in sorted(groups, key=lambda k: -groups[k]["calls"]):
+        g = groups[key]
+        out(f"{' / '.join(key)[:40]:40} {g['calls']:>6} {g['errors']:>4} "
+            f"{100 * g['cache_hits'] / g['calls']:>4.0f}% "
+            f"{fmt(percentile(g['ttft_s'], 0.5)):>8} {fmt(percentile(g['ttft_s'], 0.9)):>8} "
+            f"{fmt(percentile(g['duration_s'], 0.5)):>8} {fmt(percentile(g['duration_s'], 0.9)):>8} "
+            f"{fmt(percentile(g['duration_s'], 0.99)):>8} "
+            f"{fmt(percentile(g['tokens_per_s'], 0.5), ''):>8} {fmt(percentile(g['load_s'], 0.5)):>8} "
+            f"{100 * g['cold'] / g['calls']:>5.0f}%")
+    return 0
+
+
+# ---------------- Prometheus ----------------
+def _labels(**labels) -> str:
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(since=None) -> str:
+    """Counters and summary _sum/_count are all-time (counters.json); the
+    quantiles come from the spans still in the log (or since `since`)."""
+    counters = {tuple(key.split("\t", 1)): c for key, c in read_counters().items()}
+    groups = aggregate(iter_spans(since), "both")
+    lines = []
+
+    def metric(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for name, key, help_text in (
+        ("ollama_calls_total", "calls", "Model calls, including cache hits."),
+        ("ollama_call_errors_total", "errors", "Model calls that returned an error."),
+        ("ollama_cache_hits_total", "cache_hits", "Answers served from a cache."),
+        ("ollama_cold_calls_total", "cold", f"Model calls that waited at least {COLD_S:g}s for a model load."),
+        ("ollama_eval_tokens_total", "eval_tokens", "Generated tokens."),
+    ):
+        metric(name, "counter", help_text)
+        for (caller, model), c in counters.items():
+            lines.append(f"{name}{_labels(caller=caller, model=model)} {c.get(key, 0)}")
+    for name, key, help_text in (
+        ("ollama_call_duration_seconds", "duration_s", "Wall-clock time per model call."),
+        ("ollama_ttft_seconds", "ttft_s", "Time to first token."),
+        ("ollama_load_seconds", "load_s", "Model load time reported by Ollama."),
+        ("ollama_tokens_per_second", "tokens_per_s", "Generation rate reported by Ollama."),
+    ):
+        metric(name, "summary", help_text + " Quantiles cover the spans still in the log.")
+        for labels in sorted(set(counters) | set(groups)):
+            caller, model = labels
+            values = groups.get(labels, {}).get(key, [])
+            for q in QUANTILES:
+                value = percentile(values, q)
+                if value is not None:
+                    lines.append(f"{name}{_labels(caller=caller, model=model, quantile=q)} {value:.6g}")
+            c = counters.get(labels, {})
+            lines.append(f"{name}_sum{_labels(caller=caller, model=model)} {c.get(key + '_sum', 0):.6g}")
+            lines.append(f"{name}_count{_labels(caller=caller, model=model)} {c.get(key + '_count', 0)}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=PROM, since=None) -> None:
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # node_exporter reads *.prom, so the temporary name must not end in it.
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(prometheus_text(since))
+    os.replace(tmp, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Model call telemetry")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("summary", help="Percentiles per model and/or caller")
+    p.add_argument("--by", choices=("model", "caller", "both"), default="both")
+    p.add_argument("--since", help="Only spans newer than this (e.g. 30m, 24h, 7d)")
+    p = sub.add_parser("export", help="Write a Prometheus textfile")
+    p.add_argument("--textfile", default=os.environ.get("TELEMETRY_PROM", str(PROM)))
+    p.add_argument("--since", help="Only spans newer than this (e.g. 24h)")
+    p = sub.add_parser("tail", help="Show the latest spans")
+    p.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        since = parse_since(getattr(args, "since", None))
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if args.cmd == "summary":
+        return summary(args.by, since)
+    if args.cmd == "export":
+        export(args.textfile, since)
+        print(args.textfile)
+        return 0
+    spans = list(iter_spans())[-args.n:]
+    for span in spans:
+        print(json.dumps(span))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Resident speech-to-text service.
+
+Loads the Whisper model once and answers "listen" requests on a Unix socket
+($XDG_RUNTIME_DIR/voiced.sock, or VOICED_SOCKET). Audio is captured as a
+stream in 30 ms frames; voice-activity detection starts the utterance at the
+first speech and ends it after a short silence, and the samples go to
+Whisper as an in-memory array. ask-voice.py and ask-voice-operator.py are
+clients and fall back to doing the same work in-process when the service is
+not running.
+
+Start it once per session, e.g. from autostart:  voice_service.py --detach
+"""
+import argparse
+import collections
+import json
+import os
+import pathlib
+import queue
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+RATE = 16000
+FRAME_MS = 30
+FRAME = RATE * FRAME_MS // 1000
+MODEL_NAME = os.environ.get("VOICE_MODEL", "base")
+LANGUAGE = os.environ.get("VOICE_LANGUAGE") or None
+SILENCE_S = float(os.environ.get("VOICE_SILENCE_S", "0.8"))
+START_TIMEOUT_S = float(os.environ.get("VOICE_START_TIMEOUT_S", "8"))
+MAX_S = float(os.environ.get("VOICE_MAX_S", "30"))
+MIN_RMS = float(os.environ.get("VOICE_VAD_MIN_RMS", "300"))
+PRE_ROLL_S = 0.3
+CALIBRATE_FRAMES = 10
+ONSET_FRAMES = 3
+
+
+# ---------------- Voice activity ----------------
+class VoiceActivity:
+    """Per-frame speech decision.
+
+    Uses webrtcvad when it is installed; otherwise an energy gate set a few
+    times above the noise floor measured over the first frames.
+    """
+
+    def __init__(self, aggressiveness: int = 2):
+        self.floor = []
+        self.threshold = MIN_RMS
+        try:
+            import webrtcvad
+            self.vad = webrtcvad.Vad(aggressiveness)
+        except ImportError:
+            self.vad = None
+
+    def is_speech(self, frame) -> bool:
+        import numpy as np
+
+        if self.vad is not None:
+            return self.vad.is_speech(frame.tobytes(), RATE)
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        if len(self.floor) < CALIBRATE_FRAMES:
+            self.floor.append(rms)
+            self.threshold = max(MIN_RMS, 3 * float(np.median(self.floor)))
+            return False
+        return rms > self.threshold
+
+
+def capture_utterance(on_event=None, start_timeout=START_TIMEOUT_S,
+                      silence_s=SILENCE_S, max_s=MAX_S):
+    """Record from the default microphone until speech is followed by silence.
+
+    Returns (int16 samples or None when nobody spoke, seconds captured).
+    """
+    import numpy as np
+    import sounddevice as sd
+
+    frames = queue.Queue()
+
+    def callback(indata, _frames, _time, _status):
+        frames.put(indata[:, 0].copy())
+
+    vad = VoiceActivity()
+    pre_roll = collections.deque(maxlen=max(1, int(PRE_ROLL_S * 1000 / FRAME_MS)))
+    speech, run, silent = [], 0, 0
+    silence_frames = int(silence_s * 1000 / FRAME_MS)
+    started = time.monotonic()
+    with sd.InputStream(samplerate=RATE, channels=1, dtype="int16",
+                        blocksize=FRAME, callback=callback):
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed > max_s or (not speech and elapsed > start_timeout):
+                break
+            try:
+                frame = frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            voiced = vad.is_speech(frame)
+            if not speech:
+                pre_roll.append(frame)
+                run = run + 1 if voiced else 0
+                if run >= ONSET_FRAMES:
+                    speech.extend(pre_roll)
+                    if on_event:
+                        on_event("speech")
+                continue
+            speech.append(frame)
+            silent = 0 if voiced else silent + 1
+            if silent >= silence_frames:
+                break
+    captured = time.monotonic() - started
+    if not speech:
+        return None, captured
+    return np.concatenate(speech), captured
+
+
+class Transcriber:
+    """Whisper model loaded once and shared by every request."""
+
+    def __init__(self, name: str = MODEL_NAME):
+        self.name = name
+        self.model = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                import whisper
+                self.model = whisper.load_model(self.name)
+        return self.model
+
+    def transcribe(self, samples, language=LANGUAGE) -> str:
+        import numpy as np
+
+        model = self.load()
+        audio = samples.astype(np.float32) / 32768.0
+        with self.lock:
+            result = model.transcribe(audio, language=language, fp16=False)
+        return result["text"].strip()
+
+
+def listen(transcriber: Transcriber, on_event=None, **capture) -> dict:
+    """Capture one utterance and transcribe it."""
+    reply = {"text": "", "error": None, "capture_s": 0.0, "transcribe_s": 0.0}
+    try:
+        samples, reply["capture_s"] = capture_utterance(on_event, **capture)
+        if samples is None:
+            return reply
+        if on_event:
+            on_event("transcribing")
+        started = time.monotonic()
+        reply["text"] = transcriber.transcribe(samples)
+        reply["transcribe_s"] = time.monotonic() - started
+    except ImportError as exc:
+        reply["error"] = f"missing dependency: {exc.name}"
+    except Exception as exc:  # audio device errors surface as several types
+        reply["error"] = f"{exc.__class__.__name__}: {exc}"
+    return reply
+
+
+# ---------------- Client ----------------
+def service_socket() -> pathlib.Path:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = pathlib.Path(runtime) if runtime else pathlib.Path.home() / ".autonomy"
+    return pathlib.Path(os.environ.get("VOICED_SOCKET", base / "voiced.sock"))
+
+
+def service_listen(on_event=None):
+    """Listen through the running service; None means it is not running."""
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(0.25)
+        sock.connect(str(service_socket()))
+    except OSError:
+        return None
+    with sock:
+        # Model load on a fresh service plus a full capture can take a while.
+        sock.settimeout(MAX_S + 120)
+        try:
+            sock.sendall(b'{"op": "listen"}\n')
+            for line in sock.makefile("r", encoding="utf-8"):
+                msg = json.loads(line)
+                if "event" in msg:
+                    if on_event:
+                        on_event(msg["event"])
+                elif msg.get("done"):
+                    msg.pop("done")
+                    return msg
+        except (OSError, ValueError) as exc:
+            return {"text": "", "error": f"voiced: {exc}"}
+    return {"text": "", "error": "voiced closed the connection"}
+
+
+def transcribe_speech(on_event=None) -> dict:
+    """One utterance as text, via the service when available, else in-process."""
+    if os.environ.get("VOICE_SERVICE") != "0":
+        reply = service_listen(on_event)
+        if reply is not None:
+            return reply
+    return listen(Transcriber(), on_event)
+
+
+# ---------------- Service ----------------
+class VoiceHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            op = json.loads(line).get("op")
+        except (ValueError, AttributeError) as exc:
+            self.send({"done": True, "text": "", "error": f"bad request ({exc})"})
+            return
+        if op != "listen":
+            self.send({"done": True, "text": "", "error": f"unknown op: {op}"})
+            return
+        # One microphone: requests queue up behind each other.
+        with self.server.mic:
+            self.send({"event": "listening"})
+            reply = listen(self.server.transcriber, lambda event: self.send({"event": event}))
+        self.server.served += 1
+        self.send({"done": True, **reply})
+
+    def send(self, msg):
+        self.wfile.write((json.dumps(msg) + "\n").encode())
+        self.wfile.flush()
+
+
+class VoiceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, transcriber):
+        self.transcriber = transcriber
+        self.mic = threading.Lock()
+        self.served = 0
+        super().__init__(str(path), VoiceHandler)
+
+
+def is_running(path) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve(path, model_name: str) -> int:
+    if path.exists():
+        if is_running(path):
+            print(f"voiced already running on {path}", file=sys.stderr)
+            return 1
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    transcriber = Transcriber(model_name)
+    old_umask = os.umask(0o077)
+    try:
+        server = VoiceServer(path, transcriber)
+    finally:
+        os.umask(old_umask)
+    # Load in the background so the socket is up at once; early requests
+    # simply wait on the model lock.
+    def warm():
+        try:
+            transcriber.load()
+        except ImportError as exc:
+            print(f"voiced: cannot load model (missing {exc.name})", file=sys.stderr, flush=True)
+
+    threading.Thread(target=warm, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"voiced listening on {path} (model {model_name})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Resident Whisper speech-to-text service")
+    parser.add_argument("--socket", help="Socket path (default: $XDG_RUNTIME_DIR/voiced.sock)")
+    parser.add_argument("--model", default=MODEL_NAME, help="Whisper model name (VOICE_MODEL)")
+    parser.add_argument("--detach", action="store_true", help="Start in the background and return")
+    parser.add_argument("--status", action="store_true", help="Exit 0 if the service is listening")
+    parser.add_argument("--once", action="store_true", help="Listen once and print the text")
+    args = parser.parse_args()
+
+    if args.socket:
+        os.environ["VOICED_SOCKET"] = args.socket
+    path = service_socket()
+
+    if args.status:
+        running = is_running(path)
+        print(f"voiced {'running' if running else 'not running'} ({path})")
+        return 0 if running else 1
+
+    if args.once:
+        reply = transcribe_speech()
+        if reply.get("error"):
+            print(reply["error"], file=sys.stderr)
+            return 1
+        print(reply["text"])
+        return 0
+
+    if args.detach:
+        if is_running(path):
+            return 0
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--model", args.model],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return 0
+
+    return serve(path, args.model)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())